@@ -1,42 +1,73 @@
 """
 Streamlit RAG 시스템 UI
 """
+import re
+import hashlib
+import logging
+import threading
+from contextlib import contextmanager
+from pathlib import Path
 import streamlit as st
 import pandas as pd
-from rag_system import RAGSystem
-from faq_system import FAQSystem
-from integrated_search import IntegratedSearch
 from search_history import search_history_manager
+from semantic_cache import SemanticCache
 import config
 
+# 인사말이나 의미없는 검색어
+GREETING_WORDS = frozenset({"안녕", "안녕하세요", "hi", "hello", "헬로", "헬로우", "하이"})
+MEANINGLESS_WORDS = frozenset({"ㅋㅋ", "ㅎㅎ", "ㅠㅠ", "ㅜㅜ", "?", "!", "...", "음", "어", "아"})
+
+# 카테고리 선택 목록 (선택 위젯 기본값 계산용 위치 색인 포함)
+CODE_CATEGORIES = ("알림톡", "RCS", "일반", "기타")
+CODE_CATEGORY_INDEX = {category: i for i, category in enumerate(CODE_CATEGORIES)}
+FAQ_CATEGORIES = ("일반", "RCS", "알림톡")
+FAQ_CATEGORY_INDEX = {category: i for i, category in enumerate(FAQ_CATEGORIES)}
+
+# 결과코드 번호 질문 (예: "4007", "-4007", "결과코드 4007", "4007번")
+CODE_QUERY_PATTERN = re.compile(r'(?:결과\s*코드\s*)?(-?\d+)\s*(?:번|코드)?')
+
+# 고정 응답 (인사말 / 의미없는 검색어 / 결과 없음)
+GREETING_RESPONSE = '\n'.join([
+    "👋 **안녕하세요!** 무엇을 도와드릴까요?",
+    "\n**다음과 같은 질문을 해보세요:**",
+    "- 결과코드 검색: \"4202\", \"트래픽 초과\", \"인증 실패\"",
+    "- FAQ 검색: \"스팸 차단\", \"DB 오류\", \"전송 실패\"",
+    "- 일반 질문: \"메시지가 안 가요\", \"오류가 나와요\"",
+    "\n💡 자연스럽게 질문해주시면 정확한 답변을 찾아드립니다!",
+])
+
+MEANINGLESS_RESPONSE = '\n'.join([
+    "🤔 **더 구체적으로 질문해주세요!**",
+    "\n**예시:**",
+    "- 결과코드 검색: \"4202\", \"트래픽 초과\", \"인증 실패\"",
+    "- FAQ 검색: \"스팸 차단\", \"DB 오류\", \"전송 실패\"",
+    "- 일반 질문: \"메시지가 안 가요\", \"오류가 나와요\"",
+    "\n💡 결과코드 번호나 구체적인 문제를 말씀해주시면 도움을 드릴 수 있습니다!",
+])
+
+NO_RESULTS_TEMPLATE = '\n'.join([
+    "🤔 **죄송합니다.** '{query}'에 대한 관련 정보를 찾을 수 없습니다.",
+    "\n💡 **다른 방법을 시도해보세요:**",
+    "- 다른 키워드로 검색해보세요",
+    "- 더 간단한 단어로 검색해보세요",
+    "- 결과코드 번호를 직접 입력해보세요",
+    "\n🆘 **도움이 필요하시면** 기술지원센터로 문의해주세요.",
+])
+
+@st.cache_data(ttl=300, max_entries=256)
 def generate_ai_response(query, faq_result, rag_results):
     """AI 어시스턴트 응답 생성"""
     response_parts = []
     
-    # 인사말이나 의미없는 검색어 처리
-    greeting_words = ["안녕", "안녕하세요", "hi", "hello", "헬로", "헬로우", "하이"]
-    meaningless_words = ["ㅋㅋ", "ㅎㅎ", "ㅠㅠ", "ㅜㅜ", "?", "!", "...", "음", "어", "아"]
-    
     query_lower = query.lower().strip()
     
-    if query_lower in greeting_words:
-        response_parts.append("👋 **안녕하세요!** 무엇을 도와드릴까요?")
-        response_parts.append("\n**다음과 같은 질문을 해보세요:**")
-        response_parts.append("- 결과코드 검색: \"4202\", \"트래픽 초과\", \"인증 실패\"")
-        response_parts.append("- FAQ 검색: \"스팸 차단\", \"DB 오류\", \"전송 실패\"")
-        response_parts.append("- 일반 질문: \"메시지가 안 가요\", \"오류가 나와요\"")
-        response_parts.append("\n💡 자연스럽게 질문해주시면 정확한 답변을 찾아드립니다!")
-        return '\n'.join(response_parts)
+    # 인사말이나 의미없는 검색어 처리
+    if query_lower in GREETING_WORDS:
+        return GREETING_RESPONSE
     
     # 의미없는 단어나 너무 짧은 검색어 처리
-    if query_lower in meaningless_words or len(query.strip()) < 2:
-        response_parts.append("🤔 **더 구체적으로 질문해주세요!**")
-        response_parts.append("\n**예시:**")
-        response_parts.append("- 결과코드 검색: \"4202\", \"트래픽 초과\", \"인증 실패\"")
-        response_parts.append("- FAQ 검색: \"스팸 차단\", \"DB 오류\", \"전송 실패\"")
-        response_parts.append("- 일반 질문: \"메시지가 안 가요\", \"오류가 나와요\"")
-        response_parts.append("\n💡 결과코드 번호나 구체적인 문제를 말씀해주시면 도움을 드릴 수 있습니다!")
-        return '\n'.join(response_parts)
+    if query_lower in MEANINGLESS_WORDS or len(query.strip()) < 2:
+        return MEANINGLESS_RESPONSE
     
     # 검색 결과 요약
     faq_count = len(faq_result.get('results', [])) if faq_result.get('success') else 0
@@ -44,12 +75,7 @@ def generate_ai_response(query, faq_result, rag_results):
     total_results = faq_count + rag_count
     
     if total_results == 0:
-        response_parts.append("🤔 **죄송합니다.** '" + query + "'에 대한 관련 정보를 찾을 수 없습니다.")
-        response_parts.append("\n💡 **다른 방법을 시도해보세요:**")
-        response_parts.append("- 다른 키워드로 검색해보세요")
-        response_parts.append("- 더 간단한 단어로 검색해보세요")
-        response_parts.append("- 결과코드 번호를 직접 입력해보세요")
-        response_parts.append("\n🆘 **도움이 필요하시면** 기술지원센터로 문의해주세요.")
+        return NO_RESULTS_TEMPLATE.format(query=query)
     else:
         response_parts.append(f"✅ **{query}**에 대한 검색 결과를 {total_results}개 찾았습니다!")
         
@@ -67,21 +93,8 @@ def generate_ai_response(query, faq_result, rag_results):
             for i, faq in enumerate(faq_result['results'][:2], 1):
                 response_parts.append(f"\n**{i}. {faq['question']}**")
                 
-                # FAQ 답변을 간단하게 요약
-                answer_lines = faq['answer'].split('\n')
-                summary_lines = []
-                for line in answer_lines:
-                    if line.startswith('**🔍 결과코드:'):
-                        summary_lines.append(line)
-                    elif line.startswith('**📝 설명:'):
-                        summary_lines.append(line)
-                    elif line.startswith('**💡 이 오류는 무엇인가요?**'):
-                        summary_lines.append(line)
-                        # 다음 줄도 포함
-                        if len(answer_lines) > answer_lines.index(line) + 1:
-                            next_line = answer_lines[answer_lines.index(line) + 1]
-                            if next_line.strip():
-                                summary_lines.append(next_line)
+                # FAQ 답변을 간단하게 요약 (요약 줄은 FAQ 로드 시 미리 계산됨)
+                summary_lines = faq_system.get_answer_summary(faq['answer'])
                 
                 if summary_lines:
                     response_parts.append('\n'.join(summary_lines[:4]))  # 최대 4줄만
@@ -103,63 +116,264 @@ st.set_page_config(
     layout="wide"
 )
 
-# 커스텀 CSS로 챗봇 아이콘 변경
-st.markdown("""
-<style>
-/* Assistant 메시지 아이콘 변경 */
-div[data-testid="stChatMessage"] > div:first-child > div:first-child {
-    background: linear-gradient(135deg, #667eea 0%, #764ba2 100%) !important;
-    border-radius: 50% !important;
-    display: flex !important;
-    align-items: center !important;
-    justify-content: center !important;
-}
+# 커스텀 CSS로 챗봇 아이콘 변경 (static/chat.css, 파일은 한 번만 읽음)
+@st.cache_data(max_entries=1)
+def load_css():
+    """커스텀 CSS 로드"""
+    css = (Path(__file__).parent / "static" / "chat.css").read_text(encoding="utf-8")
+    return f"<style>\n{css}</style>"
 
-/* Assistant 아이콘을 🤖로 변경 */
-div[data-testid="stChatMessage"] > div:first-child > div:first-child > svg {
-    display: none !important;
-}
+st.markdown(load_css(), unsafe_allow_html=True)
 
-div[data-testid="stChatMessage"] > div:first-child > div:first-child::after {
-    content: "🎯" !important;
-    font-size: 20px !important;
-    color: white !important;
-}
+# 검색 시스템 초기화 (프로세스 전역 싱글톤 - 모든 세션이 공유, session_state에는 UI 상태만 저장)
+# 무거운 모듈(sentence-transformers 등)은 최초 생성 시점에만 import
+@st.cache_resource(show_spinner="결과코드 검색 시스템을 불러오는 중...")
+def get_rag_system():
+    """RAG 시스템 생성 (임베딩 모델/BM25 인덱스를 한 번만 로드)"""
+    from rag_system import RAGSystem
+    return RAGSystem()
 
-/* User 메시지 아이콘 변경 */
-div[data-testid="stChatMessage"] > div:first-child > div:last-child {
-    background: linear-gradient(135deg, #ff6b6b 0%, #ee5a24 100%) !important;
-    border-radius: 50% !important;
-    display: flex !important;
-    align-items: center !important;
-    justify-content: center !important;
-}
+@st.cache_resource(show_spinner="FAQ 검색 시스템을 불러오는 중...")
+def get_faq_system():
+    """FAQ 시스템 생성"""
+    from faq_system import FAQSystem
+    return FAQSystem()
 
-/* User 아이콘을 👤로 변경 */
-div[data-testid="stChatMessage"] > div:first-child > div:last-child > svg {
-    display: none !important;
-}
+@st.cache_resource
+def get_integrated_search(_rag_system, _faq_system):
+    """통합 검색 시스템 생성"""
+    from integrated_search import IntegratedSearch
+    return IntegratedSearch(_rag_system, _faq_system)
 
-div[data-testid="stChatMessage"] > div:first-child > div:last-child::after {
-    content: "👤" !important;
-    font-size: 20px !important;
-    color: white !important;
-}
-</style>
-""", unsafe_allow_html=True)
+rag_system = get_rag_system()
+faq_system = get_faq_system()
+integrated_search = get_integrated_search(rag_system, faq_system)
 
-# 세션 상태 초기화
-if 'rag_system' not in st.session_state:
-    st.session_state.rag_system = RAGSystem()
+@st.cache_resource
+def get_semantic_cache():
+    """AI 어시스턴트 시맨틱 캐시 생성 (유사 질문의 검색 결과 재사용)"""
+    return SemanticCache()
 
-if 'faq_system' not in st.session_state:
-    st.session_state.faq_system = FAQSystem()
+semantic_cache = get_semantic_cache()
 
-if 'integrated_search' not in st.session_state:
-    st.session_state.integrated_search = IntegratedSearch(
-        st.session_state.rag_system, 
-        st.session_state.faq_system
-    )
+# 캐시 정책: 아래 st.cache_data/st.cache_resource 헬퍼는 모두 max_entries(와 ttl)를 지정해
+# 장시간 실행/다중 사용자 환경에서 서버 메모리가 계속 늘어나지 않도록 한다.
+# 데이터 버전을 키로 쓰는 집계 캐시는 최근 몇 개 버전만 유지하면 충분하다.
+
+# 검색 결과 캐시 (동일 쿼리 재검색 시 BM25/임베딩 계산 생략)
+# (_query_embedding은 query로부터 결정되므로 캐시 키에서 제외)
+@st.cache_data(ttl=300, max_entries=256)
+def _search_faq_cached(query, top_k, _query_embedding=None):
+    """FAQ 검색 결과 캐시"""
+    return faq_system.search_faq(query, top_k, query_embedding=_query_embedding)
+
+@st.cache_data(ttl=300, max_entries=256)
+def _search_rag_cached(query, top_k, _query_embedding=None):
+    """결과코드 상세 검색 결과 캐시"""
+    return rag_system.get_detailed_results(query, top_k, query_embedding=_query_embedding)
+
+# 결과코드 집계 캐시 (데이터 버전을 키로 사용해 변경 시에만 다시 계산)
+@st.cache_data(ttl="5m", max_entries=4)
+def _codes_dataframe(data_version):
+    """전체 결과코드 DataFrame 캐시 (목록 탭 필터링, 카테고리 집계 공용)"""
+    df_codes = pd.DataFrame(rag_system.get_all_codes()).reindex(columns=['code', 'description', 'category'])
+    df_codes = df_codes.fillna({'code': '', 'description': '', 'category': '기타'}).astype(str)
+    # 카테고리는 종류가 적으므로 Categorical로 저장 (필터/집계 시 정수 코드로 비교)
+    df_codes['category'] = df_codes['category'].astype('category')
+    # 검색용 소문자 열 미리 계산 (검색어 입력마다 행별 lower() 반복 방지)
+    df_codes['code_lower'] = df_codes['code'].str.lower()
+    df_codes['description_lower'] = df_codes['description'].str.lower()
+    return df_codes
+
+@st.cache_data(ttl="5m", max_entries=4)
+def _code_category_counts(data_version):
+    """결과코드 카테고리별 개수 캐시 (개수 내림차순 Series)"""
+    return _codes_dataframe(data_version)['category'].value_counts()
+
+@st.cache_resource(max_entries=2)
+def faq_index(_faq_system, data_version):
+    """FAQ 목록/우선순위 정렬 목록/카테고리별 개수/선택 목록 캐시 (사이드바, FAQ 목록, FAQ 관리 탭 공용, FAQ 데이터 버전별)"""
+    all_faqs = _faq_system.get_all_faqs()
+    return {
+        'list': all_faqs,
+        'options': {f"{faq['id']} - {faq['question'][:50]}...": faq['id'] for faq in all_faqs},
+        'sorted': _faq_system.get_all_faqs_sorted(),
+        'by_cat': pd.Series([faq.get('category', '기타') for faq in all_faqs], dtype=object).value_counts()
+    }
+
+@st.cache_data(ttl="5m", max_entries=4)
+def _code_select_options(data_version):
+    """결과코드 선택 목록 캐시 (표시 문자열 -> 결과코드)"""
+    return {f"{code['code']} - {code['description'][:30]}...": code['code']
+            for code in rag_system.get_all_codes()}
+
+@st.cache_data(ttl="10m", max_entries=4)
+def _faq_statistics(data_version):
+    """FAQ 통계 캐시 (FAQ 데이터 버전별)"""
+    return faq_system.get_faq_statistics()
+
+@st.cache_data(ttl="30s", max_entries=4)
+def _history_snapshot(version):
+    """검색 내역 통계/인기 검색어/전체 내역 스냅샷 (내역 버전별)"""
+    return {
+        'stats': search_history_manager.get_statistics(),
+        'popular': search_history_manager.get_popular_searches(5),
+        'history': list(search_history_manager.history)
+    }
+
+def invalidate_code_caches():
+    """결과코드 데이터 변경 시 관련 캐시 무효화"""
+    _search_rag_cached.clear()
+    semantic_cache.clear()
+
+def invalidate_faq_caches():
+    """FAQ 데이터 변경 시 관련 캐시 무효화"""
+    _search_faq_cached.clear()
+    semantic_cache.clear()
+
+@st.cache_data(max_entries=8, ttl="15m")
+def _excel_preview_cached(text_hash, allow_duplicate, manual_category, data_version, _excel_text):
+    """엑셀 미리보기 캐시 (텍스트 해시/옵션/데이터 버전을 키로 사용, 원문은 해시하지 않음)"""
+    return rag_system.get_excel_preview(_excel_text, allow_duplicate, manual_category)
+
+def build_preview_dataframe(preview_data, include_page=False):
+    """
+    업로드 미리보기 테이블 생성 (열 단위로 구성, 표시용 설명/상태는 미리보기 생성 시 계산됨)
+    
+    Returns:
+        (표시용 DataFrame, 중복 코드 수)
+    """
+    df = pd.DataFrame.from_records(preview_data)
+    columns = {
+        "코드": df['code'],
+        "설명": df['description_short'],
+        "카테고리": df['category'],
+    }
+    if include_page:
+        columns["페이지"] = df['page']
+    columns["신뢰도"] = df['confidence']  # 숫자 그대로 두고 표시 형식은 렌더링 시 지정
+    columns["상태"] = df['status_label']
+    return pd.DataFrame(columns), int(df['is_duplicate'].sum())
+
+def filter_select_options(options, query):
+    """선택 목록을 검색어로 필터링하고 최대 표시 개수로 제한 (브라우저로 전송되는 옵션 수 축소)"""
+    query = query.strip().lower()
+    matched = [label for label in options if query in label.lower()] if query else list(options)
+    return matched[:config.SELECT_OPTIONS_LIMIT]
+
+def render_filtered_count(total_count, shown_count):
+    """필터링된 선택 목록 안내 문구 표시"""
+    if shown_count < total_count:
+        st.caption(f"전체 {total_count}개 중 {shown_count}개 표시 (검색어로 범위를 좁혀 보세요)")
+
+def render_preview_table(df):
+    """미리보기 테이블 표시 (작은 표는 정적 st.table, 큰 표만 정렬 가능한 st.dataframe)"""
+    if len(df) > config.PREVIEW_TABLE_MAX_ROWS:
+        # 큰 표는 브라우저에서 숫자 형식 적용
+        st.dataframe(df, use_container_width=True,
+                     column_config={"신뢰도": st.column_config.NumberColumn(format="%.2f")})
+    else:
+        st.table(df.style.format({"신뢰도": "{:.2f}"}))
+
+def render_preview_details(preview_data, include_page=False):
+    """업로드 미리보기 상세 정보를 하나의 마크다운 문자열로 생성 (항목별 st.write 호출 대신 한 번에 출력)"""
+    blocks = []
+    for i, item in enumerate(preview_data, 1):
+        lines = [
+            f"**{i}. 결과코드 {item['code']}**",
+            f"- 설명: {item['description']}",
+            f"- 카테고리: {item['category']}",
+        ]
+        if include_page:
+            lines.append(f"- 페이지: {item['page']}")
+        lines.append(f"- 신뢰도: {item['confidence']:.3f}")
+        lines.append(f"- 상태: {'중복 (추가되지 않음)' if item['is_duplicate'] else '신규 (추가됨)'}")
+        blocks.append('\n'.join(lines))
+    return '\n\n---\n\n'.join(blocks)
+
+def render_added_codes(added_codes, include_page=False):
+    """업로드로 추가된 결과코드 목록을 하나의 마크다운 목록으로 생성 (코드별 expander 대신 한 번에 출력)"""
+    lines = []
+    for code in added_codes:
+        details = [f"페이지 {code['page']}" if include_page else code['category'], f"신뢰도 {code['confidence']:.3f}"]
+        lines.append(f"- **{code['code']}** ({', '.join(details)}): {code['description']}")
+    return '\n'.join(lines)
+
+def render_db_stats(empty_message):
+    """현재 데이터베이스 상태 표시 (총 코드 수 + 카테고리별 분포, PDF/엑셀 업로드 탭 공용)"""
+    code_count = len(rag_system.get_all_codes())
+    if not code_count:
+        st.info(empty_message)
+        return
+    
+    # 카테고리별 통계 (데이터 버전별 캐시)
+    categories = _code_category_counts(rag_system.data_version)
+    
+    col1, col2 = st.columns(2)
+    with col1:
+        st.metric("총 결과코드 수", code_count)
+    with col2:
+        st.markdown("**카테고리별 분포:**\n" + "\n".join(f"- {cat}: {count}개" for cat, count in categories.sort_index().items()))
+
+class _ListLogHandler(logging.Handler):
+    """포맷한 로그 메시지를 리스트에 바로 추가하는 핸들러 (버퍼 용량 제한/flush로 인한 누락 없음)"""
+    def __init__(self, lines):
+        super().__init__()
+        self.lines = lines
+    
+    def emit(self, record):
+        self.lines.append(self.format(record))
+
+@contextmanager
+def capture_logs(logger_name):
+    """
+    지정한 로거의 로그를 현재 스레드(세션) 것만 수집 (sys.stdout 교체 없이 디버깅 정보 확보)
+    
+    Yields:
+        로그 메시지가 기록되는 대로 채워지는 리스트
+    """
+    lines = []
+    handler = _ListLogHandler(lines)
+    handler.addFilter(lambda record: record.thread == threading.get_ident())
+    handler.setFormatter(logging.Formatter("%(message)s"))
+    logger = logging.getLogger(logger_name)
+    logger.addHandler(handler)
+    try:
+        yield lines
+    finally:
+        logger.removeHandler(handler)
+        handler.close()
+
+def render_history_entry(search):
+    """검색 내역 한 건의 상세 정보를 하나의 마크다운 문자열로 생성 (줄마다 st.write 호출 대신 한 번에 출력)"""
+    blocks = [
+        f"**검색어:** {search['query']}",
+        f"**검색 유형:** {search['search_type']}",
+        f"**검색 시간:** {search['date']} {search['time']}",
+        f"**결과 개수:** {search['result_count']}개",
+    ]
+    
+    # 결과 미리보기
+    if search['results_preview']:
+        preview_lines = []
+        for preview in search['results_preview']:
+            if search['search_type'] == 'result_code':
+                preview_lines.append(f"- {preview['code']}: {preview['description']}")
+            elif search['search_type'] == 'faq':
+                preview_lines.append(f"- {preview['question']} ({preview['category']})")
+            elif search['search_type'] == 'integrated':
+                if preview['faq_count'] > 0:
+                    preview_lines.append(f"- FAQ: {preview['faq_preview']}")
+                if preview['rag_count'] > 0:
+                    preview_lines.append(f"- 결과코드: {preview['rag_preview']}")
+        blocks.append("**결과 미리보기:**\n" + "\n".join(preview_lines))
+    return "\n\n".join(blocks)
+
+def stream_ai_response(response):
+    """AI 응답을 줄 단위로 내보내는 제너레이터 (st.write_stream용)"""
+    lines = response.split('\n')
+    for idx, line in enumerate(lines):
+        yield line + '\n' if idx + 1 < len(lines) else line
 
 # 메인 타이틀
 st.title("🔍 결과코드 RAG 시스템")
@@ -169,23 +383,27 @@ st.markdown("**Hybrid Search 기반 결과코드 검색 및 설명 시스템**")
 with st.sidebar:
     st.header("⚙️ 설정")
     
-    # 가중치 조정
-    st.subheader("검색 가중치")
-    bm25_weight = st.slider("BM25 가중치", 0.0, 1.0, config.BM25_WEIGHT, 0.1)
-    embedding_weight = st.slider("임베딩 가중치", 0.0, 1.0, config.EMBEDDING_WEIGHT, 0.1)
-    
-    # 임계값 설정
-    confidence_threshold = st.slider("신뢰도 임계값", 0.0, 1.0, config.CONFIDENCE_THRESHOLD, 0.1)
-    
-    # 결과 수 설정
-    top_k = st.slider("상위 결과 수", 1, 20, config.TOP_K_RESULTS, 1)
+    # 검색 설정 (폼으로 묶어 슬라이더를 조정할 때마다가 아니라 적용 시 한 번만 다시 실행)
+    with st.form("search_settings"):
+        # 가중치 조정
+        st.subheader("검색 가중치")
+        bm25_weight = st.slider("BM25 가중치", 0.0, 1.0, config.BM25_WEIGHT, 0.1)
+        embedding_weight = st.slider("임베딩 가중치", 0.0, 1.0, config.EMBEDDING_WEIGHT, 0.1)
+        
+        # 임계값 설정
+        confidence_threshold = st.slider("신뢰도 임계값", 0.0, 1.0, config.CONFIDENCE_THRESHOLD, 0.1)
+        
+        # 결과 수 설정
+        top_k = st.slider("상위 결과 수", 1, 20, config.TOP_K_RESULTS, 1)
+        
+        st.form_submit_button("설정 적용", use_container_width=True)
     
     st.divider()
     
     # 통계 정보
     st.subheader("📊 데이터 통계")
-    all_codes = st.session_state.rag_system.get_all_codes()
-    all_faqs = st.session_state.faq_system.get_all_faqs()
+    all_codes = rag_system.get_all_codes()
+    all_faqs = faq_index(faq_system, faq_system.data_version)['list']
     
     col1, col2 = st.columns(2)
     with col1:
@@ -195,25 +413,16 @@ with st.sidebar:
     
     # 카테고리별 통계
     if all_codes:
-        categories = {}
-        for code in all_codes:
-            cat = code.get('category', '기타')
-            categories[cat] = categories.get(cat, 0) + 1
-        
-        st.write("**결과코드 카테고리별 분포:**")
-        for cat, count in categories.items():
-            st.write(f"- {cat}: {count}개")
+        categories = _code_category_counts(rag_system.data_version)
+        
+        st.markdown("**결과코드 카테고리별 분포:**\n" + "\n".join(f"- {cat}: {count}개" for cat, count in categories.items()))
+        st.bar_chart(categories)
     
     # FAQ 카테고리별 통계
     if all_faqs:
-        faq_categories = {}
-        for faq in all_faqs:
-            cat = faq.get('category', '기타')
-            faq_categories[cat] = faq_categories.get(cat, 0) + 1
-        
-        st.write("**FAQ 카테고리별 분포:**")
-        for cat, count in faq_categories.items():
-            st.write(f"- {cat}: {count}개")
+        faq_categories = faq_index(faq_system, faq_system.data_version)['by_cat']
+        
+        st.markdown("**FAQ 카테고리별 분포:**\n" + "\n".join(f"- {cat}: {count}개" for cat, count in faq_categories.items()))
 
 # 탭 전환 처리
 if hasattr(st.session_state, 'switch_to_tab'):
@@ -227,10 +436,9 @@ if hasattr(st.session_state, 'switch_to_tab'):
 # 메인 컨텐츠
 tab1, tab2, tab3, tab4, tab5, tab6, tab7, tab8, tab9 = st.tabs(["🤖 AI 어시스턴트", "❓ FAQ 검색", "📋 전체 목록", "➕ 코드 추가", "📄 PDF 업로드", "📊 엑셀 붙여넣기", "🗑️ 데이터 관리", "📚 FAQ 관리", "📝 검색 내역"])
 
-with tab1:
-    st.header("🤖 AI 어시스턴트")
-    st.markdown("**안녕하세요! 결과코드와 FAQ 검색을 도와드리는 AI 어시스턴트입니다.**")
-    
+@st.fragment
+def chat_fragment():
+    """AI 어시스턴트 채팅 영역 (대화 시 사이드바/통계는 다시 계산하지 않음)"""
     # 채팅 히스토리 초기화
     if 'chat_history' not in st.session_state:
         st.session_state.chat_history = []
@@ -266,34 +474,68 @@ with tab1:
         # 사용자 메시지 추가
         st.session_state.chat_history.append({"role": "user", "content": prompt})
         
-        # AI 응답 생성
-        with st.spinner("검색 중..."):
-            # FAQ 검색
-            faq_result = st.session_state.faq_system.search_faq(prompt, 5)
-            
-            # 결과코드 검색
-            detailed_results = st.session_state.rag_system.get_detailed_results(prompt, 5)
-            
-            # 검색 내역 저장
-            integrated_results = {
-                'faq_results': faq_result.get('results', []) if faq_result.get('success') else [],
-                'rag_results': detailed_results
-            }
-            search_history_manager.add_search(
-                query=prompt,
-                search_type='integrated',
-                results=[integrated_results],
-                result_count=len(faq_result.get('results', [])) + len(detailed_results)
-            )
-            
-            # AI 응답 생성
-            ai_response = generate_ai_response(prompt, faq_result, detailed_results)
-            
-            # AI 응답을 채팅 히스토리에 추가
-            st.session_state.chat_history.append({"role": "assistant", "content": ai_response})
+        with chat_container:
+            with st.chat_message("user"):
+                st.write(prompt)
             
-            # 채팅 화면 새로고침
-            st.rerun()
+            with st.chat_message("assistant"):
+                # AI 응답 생성
+                with st.spinner("검색 중..."):
+                    # 색인에 있는 결과코드 번호 질문("4007", "결과코드 4007")은 색인에서 바로 조회 (임베딩 계산/시맨틱 캐시 생략)
+                    # 색인에 없는 번호는 Hybrid Search로 넘겨 유사한 코드/FAQ를 찾음
+                    code_query = prompt.strip()
+                    code_match = CODE_QUERY_PATTERN.fullmatch(code_query)
+                    if code_match and code_match.group(1) in rag_system.hybrid_search.code_index:
+                        code_query = code_match.group(1)
+                        detailed_results = rag_system.lookup_by_code(code_query)
+                        faq_result = faq_system.search_faq_by_code(code_query)
+                    else:
+                        # 쿼리 임베딩은 시스템별 전처리 문자열로 계산 (전처리 결과가 같으면 한 번만 계산)
+                        code_embedding, faq_embedding = integrated_search.embed_search_queries(prompt)
+                        
+                        # 시맨틱 캐시 조회 (코드 번호가 포함된 질문은 정확히 식별해야 하므로 제외)
+                        # 숫자가 없는 질문은 FAQ 전처리(?/! 제거)만 거치므로 FAQ용 임베딩을 캐시 키로 사용
+                        use_semantic_cache = not re.search(r'\d', prompt)
+                        cached = semantic_cache.get(faq_embedding) if use_semantic_cache else None
+                        
+                        if cached:
+                            faq_result, detailed_results = cached
+                        else:
+                            # FAQ 검색
+                            faq_result = _search_faq_cached(prompt, 5, faq_embedding)
+                            
+                            # 결과코드 검색
+                            detailed_results = _search_rag_cached(prompt, 5, code_embedding)
+                            
+                            if use_semantic_cache:
+                                semantic_cache.put(faq_embedding, (faq_result, detailed_results))
+                    
+                    # 검색 내역 저장
+                    integrated_results = {
+                        'faq_results': faq_result.get('results', []) if faq_result.get('success') else [],
+                        'rag_results': detailed_results
+                    }
+                    search_history_manager.add_search(
+                        query=prompt,
+                        search_type='integrated',
+                        results=[integrated_results],
+                        result_count=len(faq_result.get('results', [])) + len(detailed_results)
+                    )
+                    
+                    # AI 응답 생성
+                    ai_response = generate_ai_response(prompt, faq_result, detailed_results)
+                
+                # 응답을 줄 단위로 스트리밍 표시 (chat_input 제출 시 이미 재실행되므로 st.rerun 불필요)
+                ai_response = st.write_stream(stream_ai_response(ai_response))
+        
+        # AI 응답을 채팅 히스토리에 추가
+        st.session_state.chat_history.append({"role": "assistant", "content": ai_response})
+
+with tab1:
+    st.header("🤖 AI 어시스턴트")
+    st.markdown("**안녕하세요! 결과코드와 FAQ 검색을 도와드리는 AI 어시스턴트입니다.**")
+    
+    chat_fragment()
     
     # 하단 버튼들
     col1, col2, col3 = st.columns([1, 1, 1])
@@ -322,13 +564,10 @@ with tab1:
         st.markdown("---")
         st.subheader("📋 전체 FAQ 목록")
         
-        # FAQ 목록 가져오기
-        all_faqs = st.session_state.faq_system.get_all_faqs()
+        # FAQ 목록 가져오기 (우선순위 높은 순, 캐시된 FAQ 색인 사용)
+        sorted_faqs = faq_index(faq_system, faq_system.data_version)['sorted']
         
-        if all_faqs:
-            # 우선순위별로 정렬 (높은 우선순위부터)
-            sorted_faqs = sorted(all_faqs, key=lambda x: x.get('priority', 0), reverse=True)
-            
+        if sorted_faqs:
             # FAQ 리스트를 확장 가능한 형태로 표시
             for i, faq in enumerate(sorted_faqs, 1):
                 with st.expander(f"{i}. {faq['question']}", expanded=False):
@@ -380,7 +619,7 @@ with tab2:
     # FAQ 검색 결과 (폼 제출 시)
     if faq_search_submitted and faq_query:
         with st.spinner("FAQ 검색 중..."):
-            faq_result = st.session_state.faq_system.search_faq(faq_query, top_k)
+            faq_result = _search_faq_cached(faq_query, top_k)
             
             # 검색 내역 저장
             search_history_manager.add_search(
@@ -421,13 +660,10 @@ with tab2:
         # 검색하지 않았을 때 자주 묻는 질문 리스트 표시
         st.subheader("📋 자주 묻는 질문")
         
-        # FAQ 목록 가져오기
-        all_faqs = st.session_state.faq_system.get_all_faqs()
+        # FAQ 목록 가져오기 (우선순위 높은 순, 캐시된 FAQ 색인 사용)
+        sorted_faqs = faq_index(faq_system, faq_system.data_version)['sorted']
         
-        if all_faqs:
-            # 우선순위별로 정렬 (높은 우선순위부터)
-            sorted_faqs = sorted(all_faqs, key=lambda x: x.get('priority', 0), reverse=True)
-            
+        if sorted_faqs:
             # FAQ 리스트를 확장 가능한 형태로 표시
             for i, faq in enumerate(sorted_faqs, 1):
                 with st.expander(f"{i}. {faq['question']}", expanded=False):
@@ -455,12 +691,15 @@ with tab3:
     st.header("전체 결과코드 목록")
     
     if all_codes:
+        df_codes = _codes_dataframe(rag_system.data_version)
+        
         # 필터링 옵션
         col1, col2 = st.columns(2)
         
         with col1:
-            categories = list(set(code.get('category', '기타') for code in all_codes))
-            selected_category = st.selectbox("카테고리 필터", ["전체"] + sorted(categories))
+            # Categorical 열의 카테고리 목록은 이미 정렬되어 있음
+            code_categories = df_codes['category'].cat.categories.tolist()
+            selected_category = st.selectbox("카테고리 필터", ["전체"] + code_categories)
         
         with col2:
             search_term = st.text_input("코드/설명 검색", placeholder="검색어 입력...")
@@ -468,53 +707,67 @@ with tab3:
         # 카테고리 수정 모드 토글
         edit_mode = st.checkbox("카테고리 수정 모드", help="체크하면 각 결과코드의 카테고리를 수정할 수 있습니다.")
         
-        # 필터링된 데이터
-        filtered_codes = all_codes
-        if selected_category != "전체":
-            filtered_codes = [code for code in filtered_codes if code.get('category') == selected_category]
+        # 필터링된 데이터 (DataFrame 마스크로 한 번에 필터링)
+        if selected_category == "전체":
+            mask = pd.Series(True, index=df_codes.index)
+        else:
+            mask = df_codes['category'] == selected_category
         
         if search_term:
-            filtered_codes = [code for code in filtered_codes 
-                            if search_term.lower() in code.get('code', '').lower() 
-                            or search_term.lower() in code.get('description', '').lower()]
+            search_lower = search_term.lower()
+            mask &= (df_codes['code_lower'].str.contains(search_lower, regex=False) |
+                     df_codes['description_lower'].str.contains(search_lower, regex=False))
+        
+        filtered_codes = df_codes.loc[mask]
         
         # 결과 표시
         st.write(f"**총 {len(filtered_codes)}개의 결과코드**")
         
-        # 카드 형태로 표시
-        for i, code in enumerate(filtered_codes):
-            if edit_mode:
-                # 수정 모드: 카테고리 선택 가능
+        if edit_mode:
+            # 수정 모드: 행마다 위젯이 생성되므로 페이지 단위로 표시
+            page_size = config.CODE_EDIT_PAGE_SIZE
+            page_count = max(1, -(-len(filtered_codes) // page_size))
+            page = st.number_input("페이지", min_value=1, max_value=page_count, value=1, step=1,
+                                   help=f"한 페이지에 {page_size}개씩 표시합니다. (전체 {page_count}페이지)")
+            page_start = (page - 1) * page_size
+            page_codes = filtered_codes.iloc[page_start:page_start + page_size]
+            
+            for i, code in enumerate(page_codes.itertuples(index=False), page_start):
                 col1, col2, col3 = st.columns([1, 2, 1])
                 
                 with col1:
-                    st.write(f"**결과코드 {code['code']}**")
+                    st.write(f"**결과코드 {code.code}**")
                 
                 with col2:
-                    current_category = code.get('category', '기타')
+                    current_category = code.category
                     new_category = st.selectbox(
                         f"카테고리 {i}",
-                        ["알림톡", "RCS", "일반", "기타"],
-                        index=["알림톡", "RCS", "일반", "기타"].index(current_category) if current_category in ["알림톡", "RCS", "일반", "기타"] else 3,
-                        key=f"category_{code['code']}_{i}"
+                        CODE_CATEGORIES,
+                        index=CODE_CATEGORY_INDEX.get(current_category, CODE_CATEGORY_INDEX["기타"]),
+                        key=f"category_{code.code}_{i}"
                     )
                     
                     if new_category != current_category:
-                        if st.button("수정", key=f"update_{code['code']}_{i}"):
-                            if st.session_state.rag_system.update_code_category(code['code'], new_category):
+                        if st.button("수정", key=f"update_{code.code}_{i}"):
+                            if rag_system.update_code_category(code.code, new_category):
+                                invalidate_code_caches()
                                 st.success(f"카테고리가 '{new_category}'로 변경되었습니다!")
                                 st.rerun()
                             else:
                                 st.error("카테고리 수정에 실패했습니다.")
                 
                 with col3:
-                    st.write(f"**설명:** {code['description']}")
-            else:
-                # 일반 모드: 기존 방식
-                with st.expander(f"결과코드 {code['code']} - {code.get('category', '기타')}", expanded=False):
-                    st.write(f"**설명:** {code['description']}")
-                    if code.get('category'):
-                        st.write(f"**카테고리:** {code['category']}")
+                    st.write(f"**설명:** {code.description}")
+        else:
+            # 일반 모드: 한 번의 표로 표시 (행별 expander 대신 데이터를 한 번에 전송, 스크롤은 브라우저에서 처리)
+            st.dataframe(
+                filtered_codes[['code', 'category', 'description']].rename(
+                    columns={'code': '결과코드', 'category': '카테고리', 'description': '설명'}
+                ),
+                use_container_width=True,
+                hide_index=True,
+                height=600
+            )
     else:
         st.warning("데이터를 불러올 수 없습니다.")
 
@@ -526,7 +779,7 @@ with tab4:
         
         with col1:
             new_code = st.text_input("결과코드", placeholder="예: 9999")
-            new_category = st.selectbox("카테고리", ["알림톡", "RCS", "일반", "기타"])
+            new_category = st.selectbox("카테고리", CODE_CATEGORIES)
         
         with col2:
             new_description = st.text_area("설명", placeholder="결과코드에 대한 상세 설명을 입력하세요.", height=100)
@@ -548,7 +801,7 @@ with tab4:
         
         manual_category = None
         if category_option == "수동 선택":
-            manual_category = st.selectbox("카테고리 선택", ["알림톡", "RCS", "일반", "기타"])
+            manual_category = st.selectbox("카테고리 선택", CODE_CATEGORIES)
         
         submitted = st.form_submit_button("➕ 코드 추가", type="primary")
         
@@ -559,14 +812,15 @@ with tab4:
                 if category_option == "수동 선택" and manual_category:
                     final_category = manual_category
                 
-                success = st.session_state.rag_system.add_code(new_code, new_description, final_category, allow_duplicate)
+                success = rag_system.add_code(new_code, new_description, final_category, allow_duplicate)
                 if success:
+                    invalidate_code_caches()
                     if allow_duplicate:
                         st.success(f"결과코드 {new_code}이(가) 성공적으로 추가되었습니다! (중복 허용)")
                     else:
                         st.success(f"결과코드 {new_code}이(가) 성공적으로 추가되었습니다!")
                     # 데이터 저장
-                    if st.session_state.rag_system.save_data():
+                    if rag_system.save_data():
                         st.info("데이터가 저장되었습니다.")
                     st.rerun()
                 else:
@@ -601,7 +855,7 @@ with tab5:
         
         # 카테고리 선택
         st.write("**카테고리 선택:**")
-        pdf_manual_category = st.selectbox("카테고리 선택", ["알림톡", "RCS", "일반", "기타"], key="pdf_manual_category")
+        pdf_manual_category = st.selectbox("카테고리 선택", CODE_CATEGORIES, key="pdf_manual_category")
         
         # 미리보기 버튼
         col1, col2 = st.columns([1, 1])
@@ -615,27 +869,21 @@ with tab5:
         # 미리보기
         if preview_button:
             with st.spinner("PDF 분석 중..."):
-                # 디버깅 정보를 위한 임시 출력 캡처
-                import sys
-                from io import StringIO
-                
-                # stdout 캡처
-                old_stdout = sys.stdout
-                sys.stdout = captured_output = StringIO()
-                
-                try:
-                    preview_data = st.session_state.rag_system.get_pdf_preview(uploaded_file, allow_duplicate, pdf_manual_category)
-                finally:
-                    # stdout 복원
-                    sys.stdout = old_stdout
-                    debug_output = captured_output.getvalue()
+                # 디버깅 정보를 위해 PDF 파서 로그 수집 (다른 세션의 로그는 제외)
+                # 파싱 결과 캐시에 적중하면 파서가 실행되지 않아 로그가 없지만, 디버깅 정보를 보여주는
+                # 추출 실패(빈 결과)는 캐시하지 않으므로 항상 다시 파싱되어 로그가 수집됨
+                with capture_logs("pdf_parser") as debug_lines:
+                    preview_data = rag_system.get_pdf_preview(uploaded_file, allow_duplicate, pdf_manual_category)
+                debug_output = "\n".join(debug_lines)
                 
                 if preview_data:
                     st.subheader("📋 추출될 결과코드 미리보기")
                     
+                    # 결과 테이블과 통계를 한 번에 계산
+                    df, duplicate_count = build_preview_dataframe(preview_data, include_page=True)
+                    
                     # 통계 정보
                     total_count = len(preview_data)
-                    duplicate_count = sum(1 for item in preview_data if item['is_duplicate'])
                     new_count = total_count - duplicate_count
                     
                     col1, col2, col3 = st.columns(3)
@@ -647,30 +895,11 @@ with tab5:
                         st.metric("중복 제외", duplicate_count)
                     
                     # 결과 테이블
-                    df_data = []
-                    for item in preview_data:
-                        df_data.append({
-                            "코드": item['code'],
-                            "설명": item['description'][:50] + "..." if len(item['description']) > 50 else item['description'],
-                            "카테고리": item['category'],
-                            "페이지": item['page'],
-                            "신뢰도": f"{item['confidence']:.2f}",
-                            "상태": "🔄 중복" if item['is_duplicate'] else "✅ 신규"
-                        })
-                    
-                    df = pd.DataFrame(df_data)
-                    st.dataframe(df, use_container_width=True)
+                    render_preview_table(df)
                     
                     # 상세 정보 (확장 가능)
                     with st.expander("🔍 상세 정보"):
-                        for i, item in enumerate(preview_data, 1):
-                            st.write(f"**{i}. 결과코드 {item['code']}**")
-                            st.write(f"- 설명: {item['description']}")
-                            st.write(f"- 카테고리: {item['category']}")
-                            st.write(f"- 페이지: {item['page']}")
-                            st.write(f"- 신뢰도: {item['confidence']:.3f}")
-                            st.write(f"- 상태: {'중복 (추가되지 않음)' if item['is_duplicate'] else '신규 (추가됨)'}")
-                            st.divider()
+                        st.markdown(render_preview_details(preview_data, include_page=True))
                 else:
                     st.warning("PDF에서 결과코드를 찾을 수 없습니다.")
                     
@@ -682,9 +911,10 @@ with tab5:
         # 업로드
         if upload_button:
             with st.spinner("PDF 업로드 및 분석 중..."):
-                result = st.session_state.rag_system.upload_pdf(uploaded_file, allow_duplicate, pdf_manual_category)
+                result = rag_system.upload_pdf(uploaded_file, allow_duplicate, pdf_manual_category)
                 
                 if result['success']:
+                    invalidate_code_caches()
                     st.success(f"✅ {result['message']}")
                     
                     # 결과 통계
@@ -699,11 +929,9 @@ with tab5:
                     # 추가된 코드 목록
                     if result['added_count'] > 0:
                         st.subheader("📋 추가된 결과코드")
-                        for code in result['extracted_codes']:
-                            if not any(item['code'] == code['code'] for item in st.session_state.rag_system.hybrid_search.data[:-result['added_count']]):
-                                with st.expander(f"결과코드 {code['code']} (페이지 {code['page']})"):
-                                    st.write(f"**설명:** {code['description']}")
-                                    st.write(f"**신뢰도:** {code['confidence']:.3f}")
+                        added_codes = result['added_codes']
+                        with st.expander(f"추가된 {len(added_codes)}개 코드"):
+                            st.markdown(render_added_codes(added_codes, include_page=True))
                     
                     # 페이지 새로고침
                     st.rerun()
@@ -737,26 +965,7 @@ with tab5:
     
     # 현재 데이터베이스 상태
     st.subheader("📊 현재 데이터베이스 상태")
-    all_codes = st.session_state.rag_system.get_all_codes()
-    
-    if all_codes:
-        # 카테고리별 통계
-        categories = {}
-        for code in all_codes:
-            cat = code.get('category', '기타')
-            categories[cat] = categories.get(cat, 0) + 1
-        
-        col1, col2 = st.columns(2)
-        
-        with col1:
-            st.metric("총 결과코드 수", len(all_codes))
-        
-        with col2:
-            st.write("**카테고리별 분포:**")
-            for cat, count in sorted(categories.items()):
-                st.write(f"- {cat}: {count}개")
-    else:
-        st.info("데이터베이스가 비어있습니다. PDF를 업로드하거나 수동으로 코드를 추가해주세요.")
+    render_db_stats("데이터베이스가 비어있습니다. PDF를 업로드하거나 수동으로 코드를 추가해주세요.")
 
 with tab6:
     st.header("📊 엑셀 붙여넣기")
@@ -791,7 +1000,7 @@ with tab6:
     
     if excel_text:
         # 데이터 검증
-        validation_result = st.session_state.rag_system.validate_excel_data(excel_text)
+        validation_result = rag_system.validate_excel_data(excel_text)
         
         if validation_result['is_valid']:
             st.success(f"✅ {validation_result['message']}")
@@ -814,7 +1023,7 @@ with tab6:
             
             excel_manual_category = None
             if excel_category_option == "수동 선택":
-                excel_manual_category = st.selectbox("카테고리 선택", ["알림톡", "RCS", "일반", "기타"], key="excel_manual_category")
+                excel_manual_category = st.selectbox("카테고리 선택", CODE_CATEGORIES, key="excel_manual_category")
             
             # 미리보기 및 업로드 버튼
             col1, col2 = st.columns([1, 1])
@@ -828,14 +1037,19 @@ with tab6:
             # 미리보기
             if preview_button:
                 with st.spinner("엑셀 데이터 분석 중..."):
-                    preview_data = st.session_state.rag_system.get_excel_preview(excel_text, allow_duplicate, excel_manual_category)
+                    text_hash = hashlib.blake2b(excel_text.encode('utf-8'), digest_size=16).hexdigest()
+                    preview_data = _excel_preview_cached(
+                        text_hash, allow_duplicate, excel_manual_category, rag_system.data_version, excel_text
+                    )
                     
                     if preview_data:
                         st.subheader("📋 추출될 결과코드 미리보기")
                         
+                        # 결과 테이블과 통계를 한 번에 계산
+                        df, duplicate_count = build_preview_dataframe(preview_data)
+                        
                         # 통계 정보
                         total_count = len(preview_data)
-                        duplicate_count = sum(1 for item in preview_data if item['is_duplicate'])
                         new_count = total_count - duplicate_count
                         
                         col1, col2, col3 = st.columns(3)
@@ -847,37 +1061,21 @@ with tab6:
                             st.metric("중복 제외", duplicate_count)
                         
                         # 결과 테이블
-                        df_data = []
-                        for item in preview_data:
-                            df_data.append({
-                                "코드": item['code'],
-                                "설명": item['description'][:50] + "..." if len(item['description']) > 50 else item['description'],
-                                "카테고리": item['category'],
-                                "신뢰도": f"{item['confidence']:.2f}",
-                                "상태": "🔄 중복" if item['is_duplicate'] else "✅ 신규"
-                            })
-                        
-                        df = pd.DataFrame(df_data)
-                        st.dataframe(df, use_container_width=True)
+                        render_preview_table(df)
                         
                         # 상세 정보 (확장 가능)
                         with st.expander("🔍 상세 정보"):
-                            for i, item in enumerate(preview_data, 1):
-                                st.write(f"**{i}. 결과코드 {item['code']}**")
-                                st.write(f"- 설명: {item['description']}")
-                                st.write(f"- 카테고리: {item['category']}")
-                                st.write(f"- 신뢰도: {item['confidence']:.3f}")
-                                st.write(f"- 상태: {'중복 (추가되지 않음)' if item['is_duplicate'] else '신규 (추가됨)'}")
-                                st.divider()
+                            st.markdown(render_preview_details(preview_data))
                     else:
                         st.warning("엑셀 데이터에서 결과코드를 찾을 수 없습니다.")
             
             # 업로드
             if upload_button:
                 with st.spinner("엑셀 데이터 업로드 및 분석 중..."):
-                    result = st.session_state.rag_system.upload_excel_data(excel_text, allow_duplicate, excel_manual_category)
+                    result = rag_system.upload_excel_data(excel_text, allow_duplicate, excel_manual_category)
                     
                     if result['success']:
+                        invalidate_code_caches()
                         st.success(f"✅ {result['message']}")
                         
                         # 결과 통계
@@ -892,12 +1090,9 @@ with tab6:
                         # 추가된 코드 목록
                         if result['added_count'] > 0:
                             st.subheader("📋 추가된 결과코드")
-                            for code in result['extracted_codes']:
-                                if not any(item['code'] == code['code'] for item in st.session_state.rag_system.hybrid_search.data[:-result['added_count']]):
-                                    with st.expander(f"결과코드 {code['code']}"):
-                                        st.write(f"**설명:** {code['description']}")
-                                        st.write(f"**카테고리:** {code['category']}")
-                                        st.write(f"**신뢰도:** {code['confidence']:.3f}")
+                            added_codes = result['added_codes']
+                            with st.expander(f"추가된 {len(added_codes)}개 코드"):
+                                st.markdown(render_added_codes(added_codes))
                         
                         # 페이지 새로고침
                         st.rerun()
@@ -909,48 +1104,30 @@ with tab6:
     
     # 현재 데이터베이스 상태
     st.subheader("📊 현재 데이터베이스 상태")
-    all_codes = st.session_state.rag_system.get_all_codes()
-    
-    if all_codes:
-        # 카테고리별 통계
-        categories = {}
-        for code in all_codes:
-            cat = code.get('category', '기타')
-            categories[cat] = categories.get(cat, 0) + 1
-        
-        col1, col2 = st.columns(2)
-        
-        with col1:
-            st.metric("총 결과코드 수", len(all_codes))
-        
-        with col2:
-            st.write("**카테고리별 분포:**")
-            for cat, count in sorted(categories.items()):
-                st.write(f"- {cat}: {count}개")
-    else:
-        st.info("데이터베이스가 비어있습니다. 엑셀 데이터를 붙여넣거나 수동으로 코드를 추가해주세요.")
+    render_db_stats("데이터베이스가 비어있습니다. 엑셀 데이터를 붙여넣거나 수동으로 코드를 추가해주세요.")
 
-with tab7:
+@st.fragment
+def data_management_fragment():
+    """데이터 관리 탭 (선택/확인 위젯 조작 시 이 영역만 다시 실행)"""
     st.header("🗑️ 데이터 관리")
     st.markdown("데이터베이스의 결과코드를 관리합니다.")
     
     # 현재 데이터 상태
-    all_codes = st.session_state.rag_system.get_all_codes()
+    all_codes = rag_system.get_all_codes()
     
     if all_codes:
         st.subheader("📊 현재 데이터 상태")
         
+        # 카테고리별 통계 (상단 지표와 카테고리별 삭제에서 공용)
+        category_stats = _code_category_counts(rag_system.data_version)
+        
         # 통계 정보
         col1, col2, col3 = st.columns(3)
         with col1:
             st.metric("총 결과코드 수", len(all_codes))
         
         with col2:
-            categories = {}
-            for code in all_codes:
-                cat = code.get('category', '기타')
-                categories[cat] = categories.get(cat, 0) + 1
-            st.metric("카테고리 수", len(categories))
+            st.metric("카테고리 수", category_stats.size)
         
         with col3:
             # 최근 추가된 코드 (마지막 5개)
@@ -963,21 +1140,24 @@ with tab7:
         st.subheader("🔍 개별 코드 삭제")
         
         # 코드 선택
-        code_options = {f"{code['code']} - {code['description'][:30]}...": code['code'] 
-                       for code in all_codes}
+        code_options = _code_select_options(rag_system.data_version)
         
         if code_options:
+            code_search = st.text_input("코드 검색", placeholder="코드 번호 또는 설명으로 검색", key="delete_code_search")
+            filtered_code_options = filter_select_options(code_options, code_search)
+            render_filtered_count(len(code_options), len(filtered_code_options))
+            
             selected_code_display = st.selectbox(
                 "삭제할 결과코드를 선택하세요:",
-                options=list(code_options.keys()),
+                options=filtered_code_options,
                 help="삭제할 결과코드를 선택하세요."
             )
             
             if selected_code_display:
                 selected_code = code_options[selected_code_display]
                 
-                # 선택된 코드 정보 표시
-                selected_code_info = next(code for code in all_codes if code['code'] == selected_code)
+                # 선택된 코드 정보 표시 (코드 색인에서 첫 번째 항목 조회)
+                selected_code_info = rag_system.hybrid_search.code_index[selected_code][0]
                 
                 col1, col2 = st.columns([2, 1])
                 with col1:
@@ -987,7 +1167,8 @@ with tab7:
                 
                 with col2:
                     if st.button("🗑️ 삭제", type="secondary", help="선택된 코드를 삭제합니다."):
-                        if st.session_state.rag_system.delete_code(selected_code):
+                        if rag_system.delete_code(selected_code):
+                            invalidate_code_caches()
                             st.success(f"✅ 결과코드 {selected_code}이(가) 삭제되었습니다!")
                             st.rerun()
                         else:
@@ -998,24 +1179,18 @@ with tab7:
         # 카테고리별 삭제
         st.subheader("📂 카테고리별 삭제")
         
-        # 카테고리별 통계
-        category_stats = {}
-        for code in all_codes:
-            cat = code.get('category', '기타')
-            category_stats[cat] = category_stats.get(cat, 0) + 1
-        
-        if category_stats:
+        if not category_stats.empty:
             col1, col2 = st.columns([1, 1])
             
             with col1:
                 st.write("**카테고리별 코드 수:**")
-                for cat, count in sorted(category_stats.items()):
+                for cat, count in category_stats.sort_index().items():
                     st.write(f"- {cat}: {count}개")
             
             with col2:
                 selected_category = st.selectbox(
                     "삭제할 카테고리를 선택하세요:",
-                    options=list(category_stats.keys()),
+                    options=list(category_stats.index),
                     help="선택한 카테고리의 모든 코드가 삭제됩니다."
                 )
                 
@@ -1024,8 +1199,9 @@ with tab7:
                     st.warning(f"⚠️ {selected_category} 카테고리의 {category_count}개 코드가 삭제됩니다.")
                     
                     if st.button(f"🗑️ {selected_category} 카테고리 삭제", type="secondary"):
-                        deleted_count = st.session_state.rag_system.delete_codes_by_category(selected_category)
+                        deleted_count = rag_system.delete_codes_by_category(selected_category)
                         if deleted_count > 0:
+                            invalidate_code_caches()
                             st.success(f"✅ {selected_category} 카테고리의 {deleted_count}개 코드가 삭제되었습니다!")
                             st.rerun()
                         else:
@@ -1043,7 +1219,8 @@ with tab7:
         
         if confirm_delete:
             if st.button("🗑️ 전체 데이터 삭제", type="primary"):
-                if st.session_state.rag_system.delete_all_codes():
+                if rag_system.delete_all_codes():
+                    invalidate_code_caches()
                     st.success("✅ 모든 데이터가 삭제되었습니다!")
                     st.rerun()
                 else:
@@ -1083,12 +1260,15 @@ with tab7:
         ```
         """)
 
+with tab7:
+    data_management_fragment()
+
 with tab8:
     st.header("📚 FAQ 관리")
     st.markdown("FAQ 항목을 추가, 수정, 삭제할 수 있습니다.")
     
     # FAQ 통계 정보
-    faq_stats = st.session_state.faq_system.get_faq_statistics()
+    faq_stats = _faq_statistics(faq_system.data_version)
     
     if 'error' not in faq_stats:
         st.subheader("📊 FAQ 통계")
@@ -1129,7 +1309,7 @@ with tab8:
             
             with col1:
                 new_faq_question = st.text_area("질문", placeholder="FAQ 질문을 입력하세요.", height=100)
-                new_faq_category = st.selectbox("카테고리", ["일반", "RCS", "알림톡"])
+                new_faq_category = st.selectbox("카테고리", FAQ_CATEGORIES)
             
             with col2:
                 new_faq_answer = st.text_area("답변", placeholder="FAQ 답변을 입력하세요.", height=200)
@@ -1158,9 +1338,10 @@ with tab8:
                     }
                     
                     # FAQ 추가
-                    result = st.session_state.faq_system.add_faq(faq_data)
+                    result = faq_system.add_faq(faq_data)
                     
                     if result['success']:
+                        invalidate_faq_caches()
                         st.success(f"✅ {result['message']}")
                         st.rerun()
                     else:
@@ -1172,20 +1353,25 @@ with tab8:
         st.subheader("FAQ 수정")
         
         # 수정할 FAQ 선택
-        all_faqs = st.session_state.faq_system.get_all_faqs()
+        faq_views = faq_index(faq_system, faq_system.data_version)
+        all_faqs = faq_views['list']
         
         if all_faqs:
-            faq_options = {f"{faq['id']} - {faq['question'][:50]}...": faq['id'] for faq in all_faqs}
+            faq_options = faq_views['options']
+            
+            update_faq_search = st.text_input("FAQ 검색", placeholder="ID 또는 질문으로 검색", key="update_faq_search")
+            filtered_faq_options = filter_select_options(faq_options, update_faq_search)
+            render_filtered_count(len(faq_options), len(filtered_faq_options))
             
             selected_faq_display = st.selectbox(
                 "수정할 FAQ를 선택하세요:",
-                options=list(faq_options.keys()),
+                options=filtered_faq_options,
                 help="수정할 FAQ를 선택하세요."
             )
             
             if selected_faq_display:
                 selected_faq_id = faq_options[selected_faq_display]
-                selected_faq = st.session_state.faq_system.get_faq_by_id(selected_faq_id)
+                selected_faq = faq_system.get_faq_by_id(selected_faq_id)
                 
                 if selected_faq['success']:
                     faq_data = selected_faq['faq']
@@ -1195,9 +1381,8 @@ with tab8:
                         
                         with col1:
                             update_question = st.text_area("질문", value=faq_data['question'], height=100)
-                            update_category = st.selectbox("카테고리", ["일반", "RCS", "알림톡"], 
-                                                         index=["일반", "RCS", "알림톡"].index(faq_data['category']) 
-                                                         if faq_data['category'] in ["일반", "RCS", "알림톡"] else 0)
+                            update_category = st.selectbox("카테고리", FAQ_CATEGORIES,
+                                                         index=FAQ_CATEGORY_INDEX.get(faq_data['category'], 0))
                         
                         with col2:
                             update_answer = st.text_area("답변", value=faq_data['answer'], height=200)
@@ -1225,9 +1410,10 @@ with tab8:
                             }
                             
                             # FAQ 수정
-                            result = st.session_state.faq_system.update_faq(selected_faq_id, update_data)
+                            result = faq_system.update_faq(selected_faq_id, update_data)
                             
                             if result['success']:
+                                invalidate_faq_caches()
                                 st.success(f"✅ {result['message']}")
                                 st.rerun()
                             else:
@@ -1242,11 +1428,15 @@ with tab8:
         
         # 삭제할 FAQ 선택
         if all_faqs:
-            delete_faq_options = {f"{faq['id']} - {faq['question'][:50]}...": faq['id'] for faq in all_faqs}
+            delete_faq_options = faq_views['options']
+            
+            delete_faq_search = st.text_input("FAQ 검색", placeholder="ID 또는 질문으로 검색", key="delete_faq_search")
+            filtered_delete_faq_options = filter_select_options(delete_faq_options, delete_faq_search)
+            render_filtered_count(len(delete_faq_options), len(filtered_delete_faq_options))
             
             selected_delete_faq_display = st.selectbox(
                 "삭제할 FAQ를 선택하세요:",
-                options=list(delete_faq_options.keys()),
+                options=filtered_delete_faq_options,
                 help="삭제할 FAQ를 선택하세요.",
                 key="delete_faq_select"
             )
@@ -1255,7 +1445,7 @@ with tab8:
                 selected_delete_faq_id = delete_faq_options[selected_delete_faq_display]
                 
                 # 선택된 FAQ 정보 표시
-                faq_info = st.session_state.faq_system.get_faq_by_id(selected_delete_faq_id)
+                faq_info = faq_system.get_faq_by_id(selected_delete_faq_id)
                 
                 if faq_info['success']:
                     faq_data = faq_info['faq']
@@ -1271,9 +1461,10 @@ with tab8:
                     
                     if confirm_delete:
                         if st.button("🗑️ FAQ 삭제", type="primary"):
-                            result = st.session_state.faq_system.delete_faq(selected_delete_faq_id)
+                            result = faq_system.delete_faq(selected_delete_faq_id)
                             
                             if result['success']:
+                                invalidate_faq_caches()
                                 st.success(f"✅ {result['message']}")
                                 st.rerun()
                             else:
@@ -1289,8 +1480,9 @@ with tab9:
     st.header("📝 검색 내역")
     st.markdown("이전에 검색한 내용들을 확인하고 관리할 수 있습니다.")
     
-    # 검색 통계
-    stats = search_history_manager.get_statistics()
+    # 검색 통계 (내역 변경 시에만 다시 계산되는 스냅샷 사용)
+    history_snapshot = _history_snapshot(search_history_manager.version)
+    stats = history_snapshot['stats']
     
     col1, col2, col3, col4 = st.columns(4)
     with col1:
@@ -1325,10 +1517,10 @@ with tab9:
         # 버튼을 상단에 정렬하기 위해 빈 공간 추가
         st.markdown("<div style='height: 30px;'></div>", unsafe_allow_html=True)
         if st.button("🗑️ 내역 삭제", help="전체 검색 내역을 삭제합니다", use_container_width=True):
-            if st.session_state.get('confirm_clear', False):
+            # 확인 플래그는 읽으면서 바로 제거
+            if st.session_state.pop('confirm_clear', False):
                 search_history_manager.clear_history()
                 st.success("✅ 검색 내역이 모두 삭제되었습니다.")
-                st.session_state.confirm_clear = False
                 st.rerun()
             else:
                 st.session_state.confirm_clear = True
@@ -1337,7 +1529,7 @@ with tab9:
     # 인기 검색어
     if not history_search:
         st.subheader("🔥 인기 검색어")
-        popular_searches = search_history_manager.get_popular_searches(5)
+        popular_searches = history_snapshot['popular']
         
         if popular_searches:
             cols = st.columns(len(popular_searches))
@@ -1356,17 +1548,19 @@ with tab9:
     # 검색 내역 표시
     st.subheader("📋 최근 검색 내역")
     
-    # 필터링된 검색 내역 가져오기
+    # 필터링된 검색 내역 가져오기 (스냅샷에서 필터링)
+    all_history = history_snapshot['history']
     if history_search:
         # 검색어로 필터링
-        filtered_history = search_history_manager.search_history(history_search)
+        history_search_lower = history_search.lower()
+        filtered_history = [s for s in all_history if history_search_lower in s.get('query', '').lower()]
     elif search_filter == "통합 검색":
-        filtered_history = search_history_manager.get_searches_by_type('integrated')
+        filtered_history = [s for s in all_history if s.get('search_type') == 'integrated']
     elif search_filter == "FAQ 검색":
-        filtered_history = search_history_manager.get_searches_by_type('faq')
+        filtered_history = [s for s in all_history if s.get('search_type') == 'faq']
     else:
         # 전체 내역
-        filtered_history = search_history_manager.get_recent_searches(20)
+        filtered_history = all_history[:20]
     
     if filtered_history:
         for i, search in enumerate(filtered_history, 1):
@@ -1374,24 +1568,7 @@ with tab9:
                 col1, col2 = st.columns([3, 1])
                 
                 with col1:
-                    st.write(f"**검색어:** {search['query']}")
-                    st.write(f"**검색 유형:** {search['search_type']}")
-                    st.write(f"**검색 시간:** {search['date']} {search['time']}")
-                    st.write(f"**결과 개수:** {search['result_count']}개")
-                    
-                    # 결과 미리보기
-                    if search['results_preview']:
-                        st.write("**결과 미리보기:**")
-                        for preview in search['results_preview']:
-                            if search['search_type'] == 'result_code':
-                                st.write(f"- {preview['code']}: {preview['description']}")
-                            elif search['search_type'] == 'faq':
-                                st.write(f"- {preview['question']} ({preview['category']})")
-                            elif search['search_type'] == 'integrated':
-                                if preview['faq_count'] > 0:
-                                    st.write(f"- FAQ: {preview['faq_preview']}")
-                                if preview['rag_count'] > 0:
-                                    st.write(f"- 결과코드: {preview['rag_preview']}")
+                    st.markdown(render_history_entry(search))
                 
     else:
         if history_search:
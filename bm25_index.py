@@ -0,0 +1,63 @@
+"""
+희소 행렬 기반 BM25 인덱스
+rank_bm25.BM25Okapi와 같은 점수를 내지만 문서별 Python 루프 대신 미리 계산한 가중치 행렬의 행 합으로 계산
+"""
+from typing import Dict, List, Sequence
+import numpy as np
+from scipy import sparse
+
+class BM25Index:
+    def __init__(self, corpus: Sequence[Sequence[str]], k1: float = 1.5, b: float = 0.75, epsilon: float = 0.25):
+        """
+        BM25 인덱스 구축
+
+        Args:
+            corpus: 토큰화된 문서 목록
+            k1, b, epsilon: BM25Okapi와 같은 의미의 파라미터
+        """
+        self.corpus_size = len(corpus)
+        self.vocab: Dict[str, int] = {}  # 토큰 -> 가중치 행렬의 행 번호
+
+        # 문서별 토큰 빈도를 (토큰, 문서) 좌표로 수집
+        rows, cols, freqs = [], [], []
+        doc_lens = np.empty(self.corpus_size, dtype=np.float64)
+        for doc_idx, document in enumerate(corpus):
+            doc_lens[doc_idx] = len(document)
+            counts: Dict[int, int] = {}
+            for token in document:
+                col = self.vocab.setdefault(token, len(self.vocab))
+                counts[col] = counts.get(col, 0) + 1
+            rows.extend(counts.keys())
+            cols.extend([doc_idx] * len(counts))
+            freqs.extend(counts.values())
+
+        rows = np.asarray(rows, dtype=np.int64)
+        cols = np.asarray(cols, dtype=np.int64)
+        freqs = np.asarray(freqs, dtype=np.float64)
+
+        # IDF (음수 IDF는 BM25Okapi와 같이 평균 IDF * epsilon으로 대체)
+        doc_freqs = np.bincount(rows, minlength=len(self.vocab)).astype(np.float64)
+        idf = np.log(self.corpus_size - doc_freqs + 0.5) - np.log(doc_freqs + 0.5)
+        if len(idf) > 0:
+            idf[idf < 0] = epsilon * idf.mean()
+
+        # IDF와 Okapi 분자/분모를 미리 곱해 둔 (토큰 x 문서) 가중치 행렬
+        avgdl = doc_lens.mean() if self.corpus_size else 0.0
+        norms = k1 * (1 - b + b * doc_lens / avgdl) if avgdl > 0 else np.full(self.corpus_size, k1)
+        weights = idf[rows] * freqs * (k1 + 1) / (freqs + norms[cols])
+        self._weights = sparse.csr_matrix((weights, (rows, cols)), shape=(len(self.vocab), self.corpus_size))
+
+    def token_ids(self, query_tokens: Sequence[str]) -> List[int]:
+        """쿼리 토큰 중 인덱스 어휘에 있는 토큰의 행 번호 (중복 토큰은 중복 유지)"""
+        vocab = self.vocab
+        return [vocab[token] for token in query_tokens if token in vocab]
+
+    def get_scores(self, query_tokens: Sequence[str]) -> np.ndarray:
+        """쿼리 토큰에 대한 문서별 BM25 점수"""
+        return self.get_scores_by_ids(self.token_ids(query_tokens))
+
+    def get_scores_by_ids(self, token_ids: List[int]) -> np.ndarray:
+        """행 번호로 변환된 쿼리 토큰에 대한 문서별 BM25 점수"""
+        if not token_ids:
+            return np.zeros(self.corpus_size)
+        return np.asarray(self._weights[token_ids].sum(axis=0)).ravel()
@@ -12,5 +12,22 @@ EMBEDDING_WEIGHT = 0.4  # 임베딩 가중치
 TOP_K_RESULTS = 10  # 상위 K개 결과 반환
 CONFIDENCE_THRESHOLD = 0.7  # 신뢰도 임계값 (더 정확한 관련성 필터링)
 
+# 시맨틱 캐시 설정 (유사 질문의 검색 결과 재사용)
+SEMANTIC_CACHE_THRESHOLD = 0.9  # 캐시 히트로 판단할 코사인 유사도
+SEMANTIC_CACHE_MAX_ENTRIES = 500  # 최대 캐시 항목 수
+SEMANTIC_CACHE_TTL = 300  # 캐시 유효 시간 (초)
+HYBRID_QUERY_CACHE_SIZE = 512  # 결과코드 검색 결과를 쿼리 문자열별로 보관할 최대 개수
+PDF_PARSE_CACHE_SIZE = 8  # PDF 파일 내용별 추출 결과를 보관할 최대 개수 (미리보기 후 업로드 시 재파싱 방지)
+
+# 쿼리 임베딩 캐시 크기 (동일 질문 반복 시 모델 호출 생략)
+EMBEDDING_CACHE_SIZE = 1024
+EMBEDDING_BATCH_SIZE = 500  # 대량 추가 시 임베딩 인코딩 배치 크기
+FAQ_EMBEDDING_BATCH_SIZE = 64  # FAQ 임베딩 인코딩 배치 크기
+PREVIEW_TABLE_MAX_ROWS = 100  # 미리보기를 정적 테이블(st.table)로 표시할 최대 행 수
+SELECT_OPTIONS_LIMIT = 50  # 선택 목록(selectbox)에 한 번에 표시할 최대 옵션 수
+CODE_EDIT_PAGE_SIZE = 50  # 카테고리 수정 모드에서 한 페이지에 표시할 결과코드 수
+
 # 데이터 파일 경로
 DATA_FILE = "data/result_codes.json"
+FAQ_EMBEDDING_CACHE_FILE = "data/faq_embeddings.npz"  # FAQ 임베딩 캐시 (텍스트 해시별 벡터, 재시작 시 재인코딩 방지)
+CODE_EMBEDDING_CACHE_FILE = "data/code_embeddings.npz"  # 결과코드 임베딩 캐시 (텍스트 해시별 벡터, 재시작 시 재인코딩 방지)
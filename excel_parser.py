@@ -1,11 +1,21 @@
 """
 엑셀 데이터 파싱 및 결과코드 추출 모듈
 """
+import csv
+import io
+import numpy as np
 import pandas as pd
 import re
+import threading
+from collections import OrderedDict
 from typing import List, Dict, Tuple
 from dataclasses import dataclass
 
+# 신뢰도 계산용 정규식 (파싱마다 다시 만들지 않도록 미리 컴파일)
+HANGUL_PATTERN = re.compile(r'[가-힣]')
+CONFIDENCE_KEYWORD_PATTERN = re.compile('|'.join(map(re.escape, ['알림톡', 'rcs', 'RCS', '일반', 'sms', 'SMS', '메시지', '톡'])))
+NUMERIC_CODE_PATTERN = re.compile(r'\s*-?\d+\s*')
+
 @dataclass
 class ExcelCode:
     """엑셀에서 추출된 결과코드 정보"""
@@ -22,6 +32,11 @@ class ExcelParser:
         self.required_columns = ['code', 'description']  # 필수 컬럼
         self.optional_columns = ['category', '설명', '코드', '카테고리']  # 선택적 컬럼
         
+        # 파싱 결과 캐시 (미리보기 후 업로드 시 같은 텍스트를 다시 파싱하지 않도록)
+        self._parse_cache = OrderedDict()
+        self._parse_cache_lock = threading.Lock()  # RAGSystem과 함께 세션 간 공유되므로 조회/순서 갱신/제거를 잠금 안에서 수행
+        self.parse_cache_size = 8
+        
     def parse_excel_data(self, excel_text: str) -> List[ExcelCode]:
         """
         엑셀 붙여넣기 텍스트에서 결과코드 추출
@@ -32,6 +47,23 @@ class ExcelParser:
         Returns:
             추출된 결과코드 리스트
         """
+        with self._parse_cache_lock:
+            cached = self._parse_cache.get(excel_text)
+            if cached is not None:
+                self._parse_cache.move_to_end(excel_text)
+                return list(cached)
+        
+        # 파싱은 잠금 밖에서 수행 (다른 세션의 캐시 조회를 막지 않음)
+        codes = self._parse_excel_data(excel_text)
+        with self._parse_cache_lock:
+            self._parse_cache[excel_text] = tuple(codes)
+            self._parse_cache.move_to_end(excel_text)
+            while len(self._parse_cache) > self.parse_cache_size:
+                self._parse_cache.popitem(last=False)
+        return codes
+    
+    def _parse_excel_data(self, excel_text: str) -> List[ExcelCode]:
+        """엑셀 붙여넣기 텍스트 파싱 (캐시 없이 실제 추출 수행)"""
         try:
             # 텍스트를 DataFrame으로 변환
             df = self._text_to_dataframe(excel_text)
@@ -45,19 +77,23 @@ class ExcelParser:
             # 데이터 검증 및 정리
             df = self._validate_and_clean_data(df)
             
-            # 결과코드 객체 생성
-            codes = []
-            for _, row in df.iterrows():
-                if pd.notna(row['code']) and pd.notna(row['description']):
-                    code = ExcelCode(
-                        code=str(row['code']).strip(),
-                        description=str(row['description']).strip(),
-                        category=row.get('category', '기타'),
-                        confidence=self._calculate_confidence(row)
-                    )
-                    codes.append(code)
+            if df.empty:
+                return []
             
-            return codes
+            # 결과코드 객체 생성 (행별 Series 생성 없이 열 단위로 처리)
+            df = df.dropna(subset=['code', 'description'])
+            confidences = self._calculate_confidences(df)
+            return [
+                ExcelCode(
+                    code=str(code).strip(),
+                    description=str(description).strip(),
+                    category=category,
+                    confidence=float(confidence)
+                )
+                for code, description, category, confidence in zip(
+                    df['code'].to_numpy(), df['description'].to_numpy(), df['category'].to_numpy(), confidences
+                )
+            ]
             
         except Exception as e:
             print(f"엑셀 데이터 파싱 오류: {e}")
@@ -75,39 +111,37 @@ class ExcelParser:
             # 첫 번째 줄을 헤더로 사용
             # 탭과 공백 모두 구분자로 사용
             if '\t' in lines[0]:
+                # 탭 구분은 pandas C 파서로 한 번에 읽기 (따옴표는 일반 문자로 취급,
+                # 헤더보다 긴 행은 잘라내고 짧은 행은 빈 문자열로 채움)
                 headers = [col.strip() for col in lines[0].split('\t')]
-                separator = '\t'
+                df = pd.read_csv(
+                    io.StringIO(text.strip()),
+                    sep='\t',
+                    dtype=str,
+                    keep_default_na=False,
+                    quoting=csv.QUOTE_NONE,
+                    usecols=range(len(headers))
+                )
+                df.columns = [col.strip() for col in df.columns]
+                return df.apply(lambda column: column.str.strip())
+            
+            # 공백으로 구분된 경우, 첫 번째 공백을 기준으로 분리
+            first_space = lines[0].find(' ')
+            if first_space > 0:
+                headers = [lines[0][:first_space].strip(), lines[0][first_space:].strip()]
             else:
-                # 공백으로 구분된 경우, 첫 번째 공백을 기준으로 분리
-                first_space = lines[0].find(' ')
-                if first_space > 0:
-                    headers = [lines[0][:first_space].strip(), lines[0][first_space:].strip()]
-                else:
-                    headers = [lines[0].strip()]
-                separator = ' '
-            
-            # 데이터 행들
-            data_rows = []
-            for line in lines[1:]:
-                if line.strip():
-                    if separator == '\t':
-                        row_data = [cell.strip() for cell in line.split('\t')]
-                    else:
-                        # 공백으로 구분된 경우, 첫 번째 공백을 기준으로 분리
-                        first_space = line.find(' ')
-                        if first_space > 0:
-                            row_data = [line[:first_space].strip(), line[first_space:].strip()]
-                        else:
-                            row_data = [line.strip()]
-                    
-                    # 컬럼 수에 맞춰 조정
-                    while len(row_data) < len(headers):
-                        row_data.append('')
-                    data_rows.append(row_data[:len(headers)])
-            
-            # DataFrame 생성
-            df = pd.DataFrame(data_rows, columns=headers)
-            return df
+                headers = [lines[0].strip()]
+            
+            # 데이터 행들 (빈 줄 제외, 첫 공백 기준 분리를 열 단위로 처리)
+            rows = pd.Series(lines[1:], dtype=str)
+            rows = rows[rows.str.strip() != '']
+            if rows.empty:
+                return pd.DataFrame(columns=headers)
+            
+            df = rows.str.split(' ', n=1, expand=True).reindex(columns=range(len(headers)))
+            df = df.fillna('').apply(lambda column: column.str.strip())
+            df.columns = headers
+            return df.reset_index(drop=True)
             
         except Exception as e:
             print(f"텍스트를 DataFrame으로 변환 실패: {e}")
@@ -150,15 +184,13 @@ class ExcelParser:
         # 빈 행 제거
         df = df.dropna(subset=['code', 'description'])
         
-        # 코드 정리 (숫자 추출, 음수 포함)
-        df['code'] = df['code'].astype(str).str.extract(r'(-?\d+)')[0]
+        # 코드 정리 (숫자 추출, 음수 포함) / 설명 정리
+        codes = df['code'].astype(str).str.extract(r'(-?\d+)', expand=False)
+        descriptions = df['description'].astype(str).str.strip()
         
-        # 설명 정리
-        df['description'] = df['description'].astype(str).str.strip()
-        
-        # 빈 값 제거
-        df = df[(df['code'] != '') & (df['code'] != 'nan') & 
-                (df['description'] != '') & (df['description'] != 'nan')]
+        # 빈 값 제거 (마스크 하나로 한 번에 선택)
+        mask = codes.notna() & descriptions.ne('') & descriptions.ne('nan')
+        df = df.loc[mask].assign(code=codes[mask], description=descriptions[mask])
         
         # 카테고리 기본값 설정
         if 'category' not in df.columns:
@@ -168,31 +200,26 @@ class ExcelParser:
         
         return df
     
-    def _calculate_confidence(self, row: pd.Series) -> float:
-        """추출된 코드의 신뢰도 계산"""
-        confidence = 0.5  # 기본 신뢰도
+    def _calculate_confidences(self, df: pd.DataFrame) -> np.ndarray:
+        """추출된 코드들의 신뢰도 일괄 계산 (열 단위 벡터 연산)"""
+        codes = df['code'].astype(str)
+        descriptions = df['description'].astype(str)
         
         # 코드가 숫자인지 확인 (음수 포함)
-        try:
-            int(row['code'])
-            confidence += 0.2
-        except (ValueError, TypeError):
-            pass
+        is_numeric = codes.str.fullmatch(NUMERIC_CODE_PATTERN).to_numpy(dtype=bool)
         
         # 설명이 충분한 길이인지 확인
-        if len(str(row['description'])) > 5:
-            confidence += 0.2
+        is_long = (descriptions.str.len() > 5).to_numpy()
         
         # 설명에 한국어가 포함되어 있는지 확인
-        if re.search(r'[가-힣]', str(row['description'])):
-            confidence += 0.1
+        has_hangul = descriptions.str.contains(HANGUL_PATTERN).to_numpy(dtype=bool)
         
         # 특정 키워드가 포함되어 있는지 확인
-        keywords = ['알림톡', 'rcs', 'RCS', '일반', 'sms', 'SMS', '메시지', '톡']
-        if any(keyword in str(row['description']) for keyword in keywords):
-            confidence += 0.1
+        has_keyword = descriptions.str.contains(CONFIDENCE_KEYWORD_PATTERN).to_numpy(dtype=bool)
         
-        return min(confidence, 1.0)
+        # 기본 신뢰도 0.5에 항목별 가산점 적용
+        confidences = 0.5 + 0.2 * is_numeric + 0.2 * is_long + 0.1 * has_hangul + 0.1 * has_keyword
+        return np.minimum(confidences, 1.0)
     
     def get_preview_data(self, excel_text: str) -> List[Dict]:
         """엑셀 데이터 미리보기"""
@@ -2,14 +2,87 @@
 FAQ 전용 Hybrid Search 엔진
 질문-답변 매칭을 위한 검색 시스템
 """
-import json
+import os
+import hashlib
+import logging
 import numpy as np
 import re
-from typing import List, Dict, Optional
+import tempfile
+import threading
+from functools import lru_cache
+from typing import List, Dict, Optional, Tuple
 from sentence_transformers import SentenceTransformer
-from rank_bm25 import BM25Okapi
+from bm25_index import BM25Index
+from json_io import json_loads, json_dumps
 import config
 
+# 검색 디버깅 로그 (DEBUG 레벨이 켜져 있을 때만 점수 범위 등을 계산해 기록)
+logger = logging.getLogger(__name__)
+
+# 형태소 분석기 (설치되어 있으면 한글 단어의 2글자 조합 대신 명사/용언 형태소를 토큰으로 사용)
+try:
+    from konlpy.tag import Mecab
+    _mecab = Mecab()
+except Exception:
+    _mecab = None
+
+# 단어 분류용 정규식 (한글 2글자 이상 / 영어 2글자 이상 / 숫자 중 어느 그룹이 매칭됐는지로 분기)
+WORD_TOKEN_PATTERN = re.compile(r'([가-힣]{2,})$|([a-zA-Z]{2,})$|(\d+)$')
+MIXED_TOKEN_PATTERN = re.compile(r'[가-힣]+|[a-zA-Z]+|\d+')
+
+# 사용자가 수정할 수 있는 FAQ 필드 (수정 요청이 실제 변경인지 판단할 때 비교, 수정일 등 자동 기록 필드 제외)
+FAQ_EDITABLE_FIELDS = ('id', 'question', 'answer', 'category', 'tags', 'related_codes', 'priority')
+
+@lru_cache(maxsize=8192)
+def _tokenize_cached(text: str) -> Tuple[str, ...]:
+    """텍스트 토큰화 (한글, 영어, 숫자 지원) - 같은 텍스트는 한 번만 계산 (인스턴스와 무관한 모듈 함수로 캐시)"""
+    tokens = []
+    seen = set()  # tokens에 들어간 토큰 집합 (2글자 조합 중복 검사를 리스트 순회 대신 O(1)로)
+    
+    # 1. 공백으로 먼저 분리
+    words = text.split()
+    
+    for word in words:
+        match = WORD_TOKEN_PATTERN.match(word)
+        # 한글 단어 처리 (2글자 이상)
+        if match and match.group(1):
+            tokens.append(word)
+            seen.add(word)
+            
+            # 형태소 분석기가 있으면 명사/용언 형태소 추가 (예: "스팸차단" -> "스팸차단", "스팸", "차단")
+            if _mecab is not None:
+                for morpheme, pos in _mecab.pos(word):
+                    if pos.startswith(('N', 'V')) and morpheme not in seen:
+                        tokens.append(morpheme)
+                        seen.add(morpheme)
+            
+            # 없으면 3글자 이상인 경우 2글자 조합도 추가 (예: "스팸차단" -> "스팸차단", "스팸", "팸차", "차단")
+            elif len(word) >= 3:
+                for i in range(len(word) - 1):
+                    sub_word = word[i:i+2]
+                    if sub_word not in seen:
+                        tokens.append(sub_word)
+                        seen.add(sub_word)
+        
+        # 영어 단어는 소문자로 변환
+        elif match and match.group(2):
+            tokens.append(word.lower())
+            seen.add(word.lower())
+        
+        # 숫자는 그대로 유지
+        elif match:
+            tokens.append(word)
+            seen.add(word)
+        # 혼합된 경우 더 세분화
+        else:
+            # 한글, 영어, 숫자로 분리
+            mixed_tokens = MIXED_TOKEN_PATTERN.findall(word)
+            mixed_tokens = [token.lower() if token.isalpha() else token for token in mixed_tokens if len(token) >= 2]
+            tokens.extend(mixed_tokens)
+            seen.update(mixed_tokens)
+    
+    return tuple(tokens)
+
 class FAQSearch:
     def __init__(self, faq_data_file: str = "data/faq_data.json"):
         """
@@ -20,17 +93,19 @@ class FAQSearch:
         """
         self.faq_data_file = faq_data_file
         self.data = self._load_faq_data()
+        self._next_faq_num = self._find_next_faq_num()  # 다음 자동 생성 FAQ 번호 (추가 시마다 전체 스캔하지 않도록 유지)
         self.embedding_model = SentenceTransformer(config.EMBEDDING_MODEL)
+        self._embedding_cache = self._load_embedding_cache()  # 텍스트 해시 -> 정규화된 임베딩
+        self.lock = threading.RLock()  # st.cache_resource로 세션 간 공유되므로 데이터 변경/인덱스 재구축과 검색 점수 계산을 직렬화
         
         # 검색 인덱스 구축
-        self.bm25 = self._build_bm25_index()
-        self.embeddings = self._build_embeddings()
+        self._rebuild_indexes()
     
     def _load_faq_data(self) -> List[Dict]:
         """FAQ 데이터 로드"""
         try:
-            with open(self.faq_data_file, 'r', encoding='utf-8') as f:
-                return json.load(f)
+            with open(self.faq_data_file, 'rb') as f:
+                return json_loads(f.read())
         except FileNotFoundError:
             print(f"FAQ 데이터 파일을 찾을 수 없습니다: {self.faq_data_file}")
             return []
@@ -38,71 +113,97 @@ class FAQSearch:
             print(f"FAQ 데이터 로드 실패: {e}")
             return []
     
-    def _build_bm25_index(self) -> BM25Okapi:
-        """BM25 인덱스 구축"""
+    def _build_bm25_index(self) -> BM25Index:
+        """BM25 인덱스 구축 (관련성 필터용 FAQ별 검색 텍스트/토큰 집합도 함께 미리 계산)"""
+        # 질문 + 답변 + 태그를 하나의 텍스트로 결합
+        combined_texts = [f"{item['question']} {item['answer']} {' '.join(item.get('tags', []))}" for item in self.data]
+        self._faq_search_texts = [text.lower() for text in combined_texts]
+        
+        # FAQ 텍스트 토큰화 (카테고리별 부분 인덱스 구축 시에도 재사용)
+        # 토큰화가 영어를 소문자로 바꾸므로 소문자 텍스트를 따로 토큰화하지 않고 같은 토큰으로 집합 구성
+        self._faq_tokens_list = [self._tokenize(text) for text in combined_texts]
+        self._faq_token_sets = [set(tokens) for tokens in self._faq_tokens_list]
+        
+        # 전체 FAQ 검색 텍스트의 2글자 조합 (관련 FAQ가 있을 수 없는 쿼리를 점수 계산 전에 걸러내는 용도)
+        self._corpus_sub_tokens = {text[j:j+2] for text in self._faq_search_texts for j in range(len(text) - 1)}
+        
         if not self.data:
             return None
         
-        # FAQ 텍스트 토큰화
-        faq_texts = []
-        for item in self.data:
-            # 질문 + 답변 + 태그를 하나의 텍스트로 결합
-            combined_text = f"{item['question']} {item['answer']} {' '.join(item.get('tags', []))}"
-            tokens = self._tokenize(combined_text)
-            faq_texts.append(tokens)
-        
-        return BM25Okapi(faq_texts)
+        return BM25Index(self._faq_tokens_list)
+    
+    def _rebuild_indexes(self):
+        """BM25 인덱스와 임베딩 행렬, ID 조회용 인덱스 재구축"""
+        self._id_index = {item['id']: i for i, item in enumerate(self.data)}
+        self._categories = sorted({item['category'] for item in self.data})
+        self.bm25 = self._build_bm25_index()
+        self.embeddings = self._build_embeddings()
     
     def _build_embeddings(self) -> np.ndarray:
-        """임베딩 벡터 구축"""
+        """임베딩 벡터 구축 (캐시에 없는 FAQ만 인코딩, L2 정규화된 벡터)"""
         if not self.data:
             return np.array([])
         
-        # FAQ 텍스트 임베딩
-        texts = []
-        for item in self.data:
-            # 질문과 답변을 결합하여 임베딩
-            combined_text = f"{item['question']} {item['answer']}"
-            texts.append(combined_text)
+        # FAQ 텍스트 임베딩 (질문과 답변을 결합)
+        texts = [f"{item['question']} {item['answer']}" for item in self.data]
+        keys = [self._embedding_key(text) for text in texts]
+        
+        # 내용이 바뀌었거나 새로 추가된 FAQ만 배치 인코딩
+        missing = [i for i, key in enumerate(keys) if key not in self._embedding_cache]
+        if missing:
+            vectors = self.embedding_model.encode(
+                [texts[i] for i in missing],
+                batch_size=config.FAQ_EMBEDDING_BATCH_SIZE,
+                convert_to_numpy=True,
+                normalize_embeddings=True
+            )
+            for i, vector in zip(missing, vectors):
+                # 디스크 저장 형식(float16)과 같은 정밀도로 맞춰 재시작 전후 점수를 동일하게 유지
+                self._embedding_cache[keys[i]] = np.asarray(vector, dtype=np.float16).astype(np.float32)
+            
+            # 현재 FAQ 기준으로 캐시 저장 (삭제/수정된 FAQ의 벡터는 정리)
+            self._embedding_cache = {key: self._embedding_cache[key] for key in keys}
+            self._save_embedding_cache()
         
-        embeddings = self.embedding_model.encode(texts)
-        return embeddings
+        return np.stack([self._embedding_cache[key] for key in keys])
+    
+    def _embedding_key(self, text: str) -> str:
+        """임베딩 캐시 키 (모델명 + 텍스트 내용 해시)"""
+        return hashlib.blake2b(f"{config.EMBEDDING_MODEL}\n{text}".encode('utf-8'), digest_size=8).hexdigest()
+    
+    def _load_embedding_cache(self) -> Dict[str, np.ndarray]:
+        """디스크에 저장된 FAQ 임베딩 캐시 로드"""
+        if not os.path.exists(config.FAQ_EMBEDDING_CACHE_FILE):
+            return {}
+        try:
+            with np.load(config.FAQ_EMBEDDING_CACHE_FILE) as cache:
+                vectors = cache['vectors'].astype(np.float32)
+                return dict(zip(cache['keys'].tolist(), vectors))
+        except Exception as e:
+            print(f"FAQ 임베딩 캐시 로드 실패: {e}")
+            return {}
+    
+    def _save_embedding_cache(self):
+        """FAQ 임베딩 캐시 저장 (디스크 용량 절약을 위해 float16으로 저장)"""
+        try:
+            os.makedirs(os.path.dirname(config.FAQ_EMBEDDING_CACHE_FILE), exist_ok=True)
+            temp_file = f"{config.FAQ_EMBEDDING_CACHE_FILE}.tmp"
+            with open(temp_file, 'wb') as f:
+                np.savez(
+                    f,
+                    keys=np.array(list(self._embedding_cache.keys())),
+                    vectors=np.stack(list(self._embedding_cache.values())).astype(np.float16)
+                )
+            os.replace(temp_file, config.FAQ_EMBEDDING_CACHE_FILE)
+        except Exception as e:
+            print(f"FAQ 임베딩 캐시 저장 실패: {e}")
     
     def _tokenize(self, text: str) -> List[str]:
         """텍스트 토큰화 (한글, 영어, 숫자 지원) - 개선된 버전"""
-        tokens = []
-        
-        # 1. 공백으로 먼저 분리
-        words = text.split()
-        
-        for word in words:
-            # 한글 단어 처리 (2글자 이상)
-            if re.match(r'^[가-힣]{2,}$', word):
-                tokens.append(word)
-                
-                # 3글자 이상인 경우 2글자 조합도 추가 (예: "스팸차단" -> "스팸차단", "스팸", "차단")
-                if len(word) >= 3:
-                    for i in range(len(word) - 1):
-                        sub_word = word[i:i+2]
-                        if sub_word not in tokens:
-                            tokens.append(sub_word)
-            
-            # 영어 단어는 소문자로 변환
-            elif re.match(r'^[a-zA-Z]{2,}$', word):
-                tokens.append(word.lower())
-            
-            # 숫자는 그대로 유지
-            elif re.match(r'^\d+$', word):
-                tokens.append(word)
-            # 혼합된 경우 더 세분화
-            else:
-                # 한글, 영어, 숫자로 분리
-                mixed_tokens = re.findall(r'[가-힣]+|[a-zA-Z]+|\d+', word)
-                tokens.extend([token.lower() if token.isalpha() else token for token in mixed_tokens if len(token) >= 2])
-        
-        return tokens
+        return list(_tokenize_cached(text))
     
-    def search(self, query: str, top_k: int = None, confidence_threshold: float = 0.3) -> List[Dict]:
+    def search(self, query: str, top_k: int = None, confidence_threshold: float = 0.3,
+               query_embedding: np.ndarray = None) -> List[Dict]:
         """
         FAQ 검색 수행
         
@@ -110,13 +211,49 @@ class FAQSearch:
             query: 검색 쿼리
             top_k: 반환할 상위 결과 수
             confidence_threshold: 신뢰도 임계값 (이 값보다 낮은 결과는 제외)
+            query_embedding: 미리 계산된 쿼리 임베딩 (embedding_text(query)의 임베딩, 주어지면 임베딩 계산 생략)
             
         Returns:
             검색 결과 리스트
         """
-        if not self.data:
-            return []
+        return self._search(query, top_k, confidence_threshold, query_embedding)
+    
+    def search_many(self, queries: List[str], top_k: int = None,
+                    confidence_threshold: float = 0.3) -> List[List[Dict]]:
+        """
+        여러 쿼리 FAQ 검색 (쿼리 임베딩을 한 번의 배치 인코딩으로 계산)
         
+        Args:
+            queries: 검색 쿼리 목록
+            top_k: 쿼리별 반환할 상위 결과 수
+            confidence_threshold: 신뢰도 임계값
+            
+        Returns:
+            쿼리 순서와 같은 순서의 검색 결과 리스트 목록
+        """
+        if not queries or not self.data:
+            return [[] for _ in queries]
+        
+        query_embeddings = self.embedding_model.encode(
+            [self._preprocess_query(query) for query in queries],
+            batch_size=config.FAQ_EMBEDDING_BATCH_SIZE,
+            convert_to_numpy=True,
+            normalize_embeddings=True,
+            show_progress_bar=False
+        )
+        return [
+            self._search(query, top_k, confidence_threshold, query_embedding)
+            for query, query_embedding in zip(queries, query_embeddings)
+        ]
+    
+    def _search(self, query: str, top_k: int = None, confidence_threshold: float = 0.3,
+                query_embedding: np.ndarray = None, indices: List[int] = None) -> List[Dict]:
+        """
+        FAQ 검색 수행 (indices가 주어지면 해당 위치의 FAQ만 대상으로 검색)
+        
+        부분 검색 시 BM25는 미리 토큰화된 목록으로 부분 인덱스를 만들고
+        임베딩은 행 선택으로 재사용하므로 self.data를 바꾸거나 다시 인코딩하지 않음
+        """
         top_k = top_k or config.TOP_K_RESULTS
         
         # 쿼리 전처리
@@ -126,31 +263,66 @@ class FAQSearch:
         if not processed_query or len(processed_query.strip()) < 2:
             return []
         
-        # BM25 검색
-        bm25_scores = self._get_bm25_scores(processed_query)
-        
-        # 임베딩 검색
-        embedding_scores = self._get_embedding_scores(processed_query)
+        # 관련성 판단용 쿼리 토큰/2글자 조합 (한 번만 계산)
+        query_tokens = set(self._tokenize(query.lower().strip()))
+        query_sub_tokens = {token[j:j+2] for token in query_tokens for j in range(len(token) - 1)}
         
-        # 하이브리드 점수 계산
-        hybrid_scores = self._calculate_hybrid_scores(bm25_scores, embedding_scores)
+        # 데이터/인덱스는 데이터 변경 잠금 안에서만 읽음 (delete_faq 등이 data와 BM25/임베딩을 교체하는 도중의
+        # 어긋난 상태로 점수를 계산하지 않도록 함, 쿼리 인코딩은 다른 세션을 막지 않도록 잠금 밖에서 수행)
+        with self.lock:
+            # 쿼리 토큰이 어휘에 없고 2글자 조합도 어느 FAQ에도 없으면 관련성 필터를 통과할 결과가 없으므로
+            # BM25/임베딩 점수 계산 없이 종료 (오타 등)
+            if not self.data or (query_tokens.isdisjoint(self.bm25.vocab) and query_sub_tokens.isdisjoint(self._corpus_sub_tokens)):
+                return []
         
-        # 디버깅 정보 출력
-        print(f"[FAQ 검색] 쿼리: '{processed_query}'")
-        print(f"[FAQ 검색] 토큰: {self._tokenize(processed_query)}")
-        print(f"[FAQ 검색] BM25 점수 범위: {bm25_scores.min():.3f} ~ {bm25_scores.max():.3f}")
-        print(f"[FAQ 검색] 임베딩 점수 범위: {embedding_scores.min():.3f} ~ {embedding_scores.max():.3f}")
-        print(f"[FAQ 검색] 하이브리드 점수 범위: {hybrid_scores.min():.3f} ~ {hybrid_scores.max():.3f}")
-        print(f"[FAQ 검색] 임계값: {confidence_threshold}")
+        if query_embedding is None:
+            query_embedding = self._encode_query(processed_query)
         
-        # 결과 생성 및 임계값 필터링
-        results = []
-        for i, score in enumerate(hybrid_scores):
-            if i < len(self.data) and score >= confidence_threshold:
-                item = self.data[i]
+        with self.lock:
+            if not self.data:
+                return []
+            
+            if indices is None:
+                indices = list(range(len(self.data)))
+                bm25, embeddings = self.bm25, self.embeddings
+            elif not indices:
+                return []
+            else:
+                bm25 = BM25Index([self._faq_tokens_list[i] for i in indices])
+                embeddings = self.embeddings[indices] if len(self.embeddings) > 0 else self.embeddings
+            
+            # BM25 검색 (쿼리 토큰은 한 번만 계산해 디버깅 로그에도 재사용)
+            processed_tokens = self._tokenize(processed_query)
+            bm25_scores = self._get_bm25_scores(processed_tokens, bm25)
+            
+            # 임베딩 검색
+            embedding_scores = self._get_embedding_scores(processed_query, query_embedding, embeddings)
+            
+            # 하이브리드 점수 계산
+            hybrid_scores = self._calculate_hybrid_scores(bm25_scores, embedding_scores)
+            
+            # 디버깅 정보 기록 (점수 범위 계산은 DEBUG 로그가 켜져 있을 때만 수행)
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("[FAQ 검색] 쿼리: '%s'", processed_query)
+                logger.debug("[FAQ 검색] 토큰: %s", processed_tokens)
+                for label, scores in (("BM25", bm25_scores), ("임베딩", embedding_scores), ("하이브리드", hybrid_scores)):
+                    if len(scores) > 0:
+                        logger.debug("[FAQ 검색] %s 점수 범위: %.3f ~ %.3f", label, scores.min(), scores.max())
+                logger.debug("[FAQ 검색] 임계값: %s", confidence_threshold)
+            
+            # 임계값 이상인 후보만 점수 내림차순으로 정렬 (동점은 원래 순서 유지)
+            candidates = np.flatnonzero(hybrid_scores[:len(indices)] >= confidence_threshold)
+            candidates = candidates[np.argsort(-hybrid_scores[candidates], kind='stable')]
+            
+            # 관련성 검사는 top_k개가 채워질 때까지만 수행
+            results = []
+            for i in candidates:
+                if len(results) >= top_k:
+                    break
                 
                 # 키워드 정확도 필터링 추가
-                if self._is_relevant_result(query, item):
+                if self._is_relevant_result(query_tokens, query_sub_tokens, indices[i]):
+                    item = self.data[indices[i]]
                     results.append({
                         'id': item['id'],
                         'question': item['question'],
@@ -159,15 +331,16 @@ class FAQSearch:
                         'tags': item.get('tags', []),
                         'related_codes': item.get('related_codes', []),
                         'priority': item.get('priority', 0),
-                        'score': float(score),
+                        'score': float(hybrid_scores[i]),
                         'bm25_score': float(bm25_scores[i]) if len(bm25_scores) > i else 0.0,
                         'embedding_score': float(embedding_scores[i]) if len(embedding_scores) > i else 0.0
                     })
-        
-        # 점수 기준으로 정렬
-        results.sort(key=lambda x: x['score'], reverse=True)
-        
-        return results[:top_k]
+            
+            return results
+    
+    def embedding_text(self, query: str) -> str:
+        """search가 임베딩하는 전처리된 쿼리 문자열 (쿼리 임베딩을 미리 계산할 때 사용)"""
+        return self._preprocess_query(query)
     
     def _preprocess_query(self, query: str) -> str:
         """쿼리 전처리"""
@@ -181,76 +354,80 @@ class FAQSearch:
         
         return query
     
-    def _is_relevant_result(self, original_query: str, item: dict) -> bool:
-        """검색 결과가 원본 쿼리와 관련이 있는지 확인 (개선된 버전)"""
-        original_query = original_query.lower().strip()
-        
-        # 검색할 텍스트 (질문 + 답변 + 태그)
-        search_text = f"{item['question']} {item['answer']} {' '.join(item.get('tags', []))}".lower()
-        
-        # 쿼리 토큰화
-        query_tokens = set(self._tokenize(original_query))
-        search_tokens = set(self._tokenize(search_text))
-        
-        # 최소 1개 이상의 토큰이 매칭되어야 함
-        common_tokens = query_tokens.intersection(search_tokens)
+    def _is_relevant_result(self, query_tokens: set, query_sub_tokens: set, index: int) -> bool:
+        """
+        검색 결과가 원본 쿼리와 관련이 있는지 확인 (개선된 버전)
         
+        Args:
+            query_tokens: 소문자로 변환한 원본 쿼리의 토큰 집합
+            query_sub_tokens: 쿼리 토큰들의 2글자 조합 집합
+            index: self.data에서 검사할 FAQ 위치 (인덱스 구축 시 계산한 검색 텍스트/토큰 사용)
+        """
         # 의미있는 토큰이 1개 이상 매칭되면 관련성이 있다고 판단
-        if len(common_tokens) > 0:
+        if not query_tokens.isdisjoint(self._faq_token_sets[index]):
             return True
         
         # 추가: 부분 문자열 매칭 (공백 없는 경우 대비)
-        # 예: "스팸차단" -> "스팸", "차단" 각각이 검색 텍스트에 있는지 확인
-        for query_token in query_tokens:
-            if len(query_token) >= 2:
-                # 토큰의 2글자 조합이 검색 텍스트에 포함되어 있는지 확인
-                for i in range(len(query_token) - 1):
-                    sub_token = query_token[i:i+2]
-                    if sub_token in search_text:
-                        return True
-        
-        return False
-    
-    def _get_bm25_scores(self, query: str) -> np.ndarray:
-        """BM25 점수 계산"""
-        if not self.bm25:
+        # 예: "스팸차단" -> "스팸", "차단" 각각이 검색 텍스트(질문 + 답변 + 태그)에 있는지 확인
+        search_text = self._faq_search_texts[index]
+        return any(sub_token in search_text for sub_token in query_sub_tokens)
+    
+    def _get_bm25_scores(self, query_tokens: List[str], bm25: BM25Index = None) -> np.ndarray:
+        """BM25 점수 계산 (토큰화된 쿼리 사용, bm25를 생략하면 전체 인덱스 사용)"""
+        bm25 = bm25 or self.bm25
+        if not bm25:
             return np.array([])
         
-        query_tokens = self._tokenize(query)
-        scores = self.bm25.get_scores(query_tokens)
+        scores = bm25.get_scores(query_tokens)
         
-        # 점수 정규화 (Min-Max 정규화)
+        # 점수 정규화 (Min-Max 정규화, 모든 점수가 같으면 최댓값 기준으로 변환해 매칭 신호 유지)
         if len(scores) > 0:
             min_score = np.min(scores)
             max_score = np.max(scores)
             if max_score > min_score:
                 scores = (scores - min_score) / (max_score - min_score)
+            elif max_score > 0:
+                scores = scores / max_score
             else:
                 scores = np.zeros_like(scores)
         
         return scores
     
-    def _get_embedding_scores(self, query: str) -> np.ndarray:
-        """임베딩 기반 유사도 점수 계산"""
-        if len(self.embeddings) == 0:
+    def _get_embedding_scores(self, query: str, query_embedding: np.ndarray = None,
+                              embeddings: np.ndarray = None) -> np.ndarray:
+        """임베딩 기반 유사도 점수 계산 (embeddings를 생략하면 전체 FAQ 임베딩 사용)"""
+        if embeddings is None:
+            embeddings = self.embeddings
+        if len(embeddings) == 0:
             return np.array([])
         
-        # 쿼리 임베딩
-        query_embedding = self.embedding_model.encode([query])
+        # 쿼리 임베딩 (미리 계산된 값이 있으면 재사용)
+        if query_embedding is None:
+            query_embedding = self._encode_query(query)
+        query_vector = np.asarray(query_embedding, dtype=np.float32).reshape(-1)
+        norm = np.linalg.norm(query_vector)
+        if norm > 0:
+            query_vector = query_vector / norm
         
-        # 코사인 유사도 계산
-        similarities = np.dot(self.embeddings, query_embedding.T).flatten()
+        # 코사인 유사도 계산 (FAQ 임베딩은 구축 시 이미 정규화됨)
+        similarities = embeddings @ query_vector
         
-        # Min-Max 정규화로 0-1 범위로 변환
-        if len(similarities) > 0:
-            min_sim = np.min(similarities)
-            max_sim = np.max(similarities)
-            if max_sim > min_sim:
-                similarities = (similarities - min_sim) / (max_sim - min_sim)
-            else:
-                similarities = np.zeros_like(similarities)
+        # [-1, 1] 범위의 코사인 유사도를 0-1 범위로 변환 (Min-Max와 달리 유사도 크기가 보존됨)
+        return (similarities + 1.0) * 0.5
+    
+    def _encode_query(self, query: str) -> np.ndarray:
+        """
+        단일 쿼리 인코딩
         
-        return similarities
+        1개짜리 리스트 대신 문자열을 그대로 넘기고 진행률 표시(tqdm)를 끄며,
+        장치 선택과 inference 모드는 SentenceTransformer.encode 내부 처리를 그대로 사용
+        """
+        return self.embedding_model.encode(
+            query,
+            convert_to_numpy=True,
+            normalize_embeddings=True,
+            show_progress_bar=False
+        )
     
     def _calculate_hybrid_scores(self, bm25_scores: np.ndarray, embedding_scores: np.ndarray) -> np.ndarray:
         """하이브리드 점수 계산 (BM25 + 임베딩)"""
@@ -279,68 +456,64 @@ class FAQSearch:
         Returns:
             카테고리별 검색 결과
         """
+        # 카테고리 위치 목록과 검색에 쓰는 인덱스가 같은 데이터 기준이 되도록 잠금 안에서 수행
+        with self.lock:
+            return self._search_by_category(category, query, top_k)
+    
+    def _search_by_category(self, category: str, query: str, top_k: int) -> List[Dict]:
+        """카테고리별 FAQ 검색 (데이터 변경 잠금을 보유한 상태에서 호출)"""
         if not self.data:
             return []
         
-        # 카테고리 필터링
-        filtered_data = [item for item in self.data if item['category'] == category]
+        # 카테고리 필터링 (데이터 교체/인덱스 재구축 없이 위치 목록으로 검색)
+        indices = [i for i, item in enumerate(self.data) if item['category'] == category]
         
-        if not filtered_data:
+        if not indices:
             return []
         
-        # 임시로 필터링된 데이터로 검색 수행
-        original_data = self.data
-        self.data = filtered_data
+        # 검색 수행
+        if query:
+            return self._search(query, top_k, indices=indices)
         
-        try:
-            # 인덱스 재구축
-            self.bm25 = self._build_bm25_index()
-            self.embeddings = self._build_embeddings()
-            
-            # 검색 수행
-            if query:
-                results = self.search(query, top_k)
-            else:
-                # 쿼리가 없으면 우선순위 순으로 정렬
-                results = []
-                for item in filtered_data:
-                    results.append({
-                        'id': item['id'],
-                        'question': item['question'],
-                        'answer': item['answer'],
-                        'category': item['category'],
-                        'tags': item.get('tags', []),
-                        'related_codes': item.get('related_codes', []),
-                        'priority': item.get('priority', 0),
-                        'score': float(item.get('priority', 0)) / 3.0,  # 우선순위를 점수로 변환
-                        'bm25_score': 0.0,
-                        'embedding_score': 0.0
-                    })
-                results.sort(key=lambda x: x['score'], reverse=True)
-                if top_k:
-                    results = results[:top_k]
-            
-            return results
-            
-        finally:
-            # 원본 데이터 복원
-            self.data = original_data
-            self.bm25 = self._build_bm25_index()
-            self.embeddings = self._build_embeddings()
+        # 쿼리가 없으면 우선순위 순으로 정렬
+        results = []
+        for i in indices:
+            item = self.data[i]
+            results.append({
+                'id': item['id'],
+                'question': item['question'],
+                'answer': item['answer'],
+                'category': item['category'],
+                'tags': item.get('tags', []),
+                'related_codes': item.get('related_codes', []),
+                'priority': item.get('priority', 0),
+                'score': float(item.get('priority', 0)) / 3.0,  # 우선순위를 점수로 변환
+                'bm25_score': 0.0,
+                'embedding_score': 0.0
+            })
+        results.sort(key=lambda x: x['score'], reverse=True)
+        if top_k:
+            results = results[:top_k]
+        
+        return results
     
     def get_faq_by_id(self, faq_id: str) -> Optional[Dict]:
         """ID로 FAQ 조회"""
-        for item in self.data:
-            if item['id'] == faq_id:
-                return item
-        return None
+        with self.lock:
+            index = self._id_index.get(faq_id)
+            return self.data[index] if index is not None else None
+    
+    def get_faq_embedding(self, faq_id: str) -> Optional[np.ndarray]:
+        """ID로 FAQ의 정규화된 임베딩(질문 + 답변) 조회 (유사 FAQ 검색에서 쿼리 인코딩 대신 사용)"""
+        with self.lock:
+            index = self._id_index.get(faq_id)
+            if index is None or len(self.embeddings) == 0:
+                return None
+            return self.embeddings[index]
     
     def get_categories(self) -> List[str]:
-        """모든 카테고리 목록 반환"""
-        categories = set()
-        for item in self.data:
-            categories.add(item['category'])
-        return sorted(list(categories))
+        """모든 카테고리 목록 반환 (인덱스 재구축 시 계산한 목록의 복사본)"""
+        return list(self._categories)
     
     def get_related_codes(self, faq_id: str) -> List[str]:
         """FAQ와 관련된 결과코드 목록 반환"""
@@ -349,6 +522,18 @@ class FAQSearch:
             return faq.get('related_codes', [])
         return []
     
+    @staticmethod
+    def _faq_id_number(faq_id: str) -> Optional[int]:
+        """faq_XXX 형식 ID의 번호 (형식이 다르면 None)"""
+        if faq_id.startswith('faq_') and faq_id[4:].isdecimal():
+            return int(faq_id[4:])  # 'faq_' 이후 부분을 숫자로 변환
+        return None
+    
+    def _find_next_faq_num(self) -> int:
+        """로드된 데이터의 최대 FAQ 번호 + 1 (데이터 로드 시 한 번만 계산)"""
+        numbers = (self._faq_id_number(item['id']) for item in self.data)
+        return max((num for num in numbers if num is not None), default=0) + 1
+    
     def _generate_next_faq_id(self) -> str:
         """
         다음 FAQ ID 자동 생성
@@ -356,112 +541,104 @@ class FAQSearch:
         Returns:
             새로운 FAQ ID (faq_XXX 형식)
         """
-        if not self.data:
-            return "faq_001"
-        
-        # 기존 ID에서 최대 번호 찾기
-        max_num = 0
-        for item in self.data:
-            if item['id'].startswith('faq_'):
-                try:
-                    num = int(item['id'][4:])  # 'faq_' 이후 부분을 숫자로 변환
-                    max_num = max(max_num, num)
-                except ValueError:
-                    continue
-        
-        # 다음 번호 생성
-        next_num = max_num + 1
-        return f"faq_{next_num:03d}"
+        return f"faq_{self._next_faq_num:03d}"
 
-    def add_faq(self, faq_data: Dict) -> bool:
+    def add_faq(self, faq_data: Dict, commit: bool = True) -> bool:
         """
         새 FAQ 추가
         
         Args:
             faq_data: 추가할 FAQ 데이터
+            commit: False면 인덱스 재구축/저장을 미룸 (여러 건 추가 후 commit_changes 호출)
             
         Returns:
             추가 성공 여부
         """
         try:
             # ID가 없으면 자동 생성
-            if 'id' not in faq_data or not faq_data['id']:
-                faq_data['id'] = self._generate_next_faq_id()
-            
-            # 필수 필드 검증 (ID 제외)
-            required_fields = ['question', 'answer', 'category']
-            for field in required_fields:
-                if field not in faq_data:
-                    print(f"필수 필드 누락: {field}")
-                    return False
-            
-            # 중복 ID 체크
-            for item in self.data:
-                if item['id'] == faq_data['id']:
+            with self.lock:
+                if 'id' not in faq_data or not faq_data['id']:
+                    faq_data['id'] = self._generate_next_faq_id()
+                
+                # 필수 필드 검증 (ID 제외)
+                required_fields = ['question', 'answer', 'category']
+                for field in required_fields:
+                    if field not in faq_data:
+                        print(f"필수 필드 누락: {field}")
+                        return False
+                
+                # 중복 ID 체크
+                if faq_data['id'] in self._id_index:
                     print(f"중복된 FAQ ID: {faq_data['id']}")
                     return False
-            
-            # 기본값 설정
-            if 'tags' not in faq_data:
-                faq_data['tags'] = []
-            if 'related_codes' not in faq_data:
-                faq_data['related_codes'] = []
-            if 'priority' not in faq_data:
-                faq_data['priority'] = 0
-            if 'created_date' not in faq_data:
-                from datetime import datetime
-                faq_data['created_date'] = datetime.now().strftime('%Y-%m-%d')
-            if 'updated_date' not in faq_data:
-                faq_data['updated_date'] = faq_data['created_date']
-            
-            # FAQ 추가
-            self.data.append(faq_data)
-            
-            # 인덱스 재구축
-            self.bm25 = self._build_bm25_index()
-            self.embeddings = self._build_embeddings()
-            
-            # 데이터 저장
-            self.save_faq_data()
-            
-            return True
+                
+                # 기본값 설정
+                if 'tags' not in faq_data:
+                    faq_data['tags'] = []
+                if 'related_codes' not in faq_data:
+                    faq_data['related_codes'] = []
+                if 'priority' not in faq_data:
+                    faq_data['priority'] = 0
+                if 'created_date' not in faq_data:
+                    from datetime import datetime
+                    faq_data['created_date'] = datetime.now().strftime('%Y-%m-%d')
+                if 'updated_date' not in faq_data:
+                    faq_data['updated_date'] = faq_data['created_date']
+                
+                # FAQ 추가 (삭제 후에도 번호를 재사용하지 않도록 다음 번호는 증가만 함)
+                self.data.append(faq_data)
+                self._id_index[faq_data['id']] = len(self.data) - 1
+                num = self._faq_id_number(faq_data['id'])
+                if num is not None and num >= self._next_faq_num:
+                    self._next_faq_num = num + 1
+                
+                if commit:
+                    self.commit_changes()
+                
+                return True
             
         except Exception as e:
             print(f"FAQ 추가 실패: {e}")
             return False
     
-    def update_faq(self, faq_id: str, update_data: Dict) -> bool:
+    def update_faq(self, faq_id: str, update_data: Dict, commit: bool = True) -> bool:
         """
         FAQ 수정
         
         Args:
             faq_id: 수정할 FAQ ID
             update_data: 수정할 데이터
+            commit: False면 인덱스 재구축/저장을 미룸 (여러 건 수정 후 commit_changes 호출)
             
         Returns:
             수정 성공 여부
         """
         try:
-            for i, item in enumerate(self.data):
-                if item['id'] == faq_id:
-                    # 업데이트 날짜 설정
-                    from datetime import datetime
-                    update_data['updated_date'] = datetime.now().strftime('%Y-%m-%d')
-                    
-                    # 기존 데이터 업데이트
-                    self.data[i].update(update_data)
-                    
-                    # 인덱스 재구축
-                    self.bm25 = self._build_bm25_index()
-                    self.embeddings = self._build_embeddings()
-                    
-                    # 데이터 저장
-                    self.save_faq_data()
-                    
+            with self.lock:
+                i = self._id_index.get(faq_id)
+                if i is None:
+                    print(f"FAQ ID를 찾을 수 없습니다: {faq_id}")
+                    return False
+                
+                # 수정 가능한 필드가 모두 그대로면 수정일 갱신/인덱스 재구축/저장 생략
+                item = self.data[i]
+                if all(item.get(field) == update_data[field] for field in FAQ_EDITABLE_FIELDS if field in update_data):
                     return True
-            
-            print(f"FAQ ID를 찾을 수 없습니다: {faq_id}")
-            return False
+                
+                # 업데이트 날짜 설정
+                from datetime import datetime
+                update_data['updated_date'] = datetime.now().strftime('%Y-%m-%d')
+                
+                # 기존 데이터 업데이트
+                item.update(update_data)
+                if item['id'] != faq_id:
+                    del self._id_index[faq_id]
+                    self._id_index[item['id']] = i
+                
+                if commit:
+                    self.commit_changes()
+                
+                return True
             
         except Exception as e:
             print(f"FAQ 수정 실패: {e}")
@@ -478,42 +655,64 @@ class FAQSearch:
             삭제 성공 여부
         """
         try:
-            original_length = len(self.data)
-            self.data = [item for item in self.data if item['id'] != faq_id]
-            
-            if len(self.data) < original_length:
-                # 인덱스 재구축
-                self.bm25 = self._build_bm25_index()
-                self.embeddings = self._build_embeddings()
-                
-                # 데이터 저장
-                self.save_faq_data()
-                return True
-            else:
-                print(f"FAQ ID를 찾을 수 없습니다: {faq_id}")
-                return False
+            with self.lock:
+                if faq_id in self._id_index:
+                    self.data = [item for item in self.data if item['id'] != faq_id]
+                    
+                    # 인덱스 재구축 (남은 FAQ의 임베딩은 캐시에서 재사용)
+                    self._rebuild_indexes()
+                    
+                    # 데이터 저장
+                    self.save_faq_data()
+                    return True
+                else:
+                    print(f"FAQ ID를 찾을 수 없습니다: {faq_id}")
+                    return False
                 
         except Exception as e:
             print(f"FAQ 삭제 실패: {e}")
             return False
     
+    def commit_changes(self) -> bool:
+        """
+        FAQ 변경 반영 (인덱스 재구축 후 저장)
+        
+        토큰화/임베딩은 캐시되어 변경된 FAQ만 새로 계산
+        
+        Returns:
+            저장 성공 여부
+        """
+        with self.lock:
+            self._rebuild_indexes()
+            return self.save_faq_data()
+    
     def save_faq_data(self) -> bool:
-        """FAQ 데이터 저장"""
+        """FAQ 데이터 저장 (임시 파일에 쓴 뒤 교체해 저장 중 중단되어도 기존 파일 유지)"""
+        temp_file = None
         try:
-            with open(self.faq_data_file, 'w', encoding='utf-8') as f:
-                json.dump(self.data, f, ensure_ascii=False, indent=2)
+            # 같은 폴더의 고유한 임시 파일 사용 (세션마다 임시 파일이 달라 동시에 저장해도 서로 덮어쓰지 않음)
+            with self.lock:
+                with tempfile.NamedTemporaryFile(dir=os.path.dirname(self.faq_data_file) or '.', suffix='.tmp', delete=False) as f:
+                    temp_file = f.name
+                    f.write(json_dumps(self.data))
+                    f.flush()
+                    os.fsync(f.fileno())
+                os.replace(temp_file, self.faq_data_file)
             return True
         except Exception as e:
             print(f"FAQ 데이터 저장 실패: {e}")
+            if temp_file and os.path.exists(temp_file):
+                os.remove(temp_file)
             return False
     
     def reload_data(self) -> bool:
         """FAQ 데이터 재로드"""
         try:
-            self.data = self._load_faq_data()
-            self.bm25 = self._build_bm25_index()
-            self.embeddings = self._build_embeddings()
-            return True
+            with self.lock:
+                self.data = self._load_faq_data()
+                self._next_faq_num = self._find_next_faq_num()
+                self._rebuild_indexes()
+                return True
         except Exception as e:
             print(f"FAQ 데이터 재로드 실패: {e}")
             return False
@@ -2,10 +2,16 @@
 FAQ 시스템 메인 클래스
 FAQ 검색, 관리, 통합 기능 제공
 """
+import threading
+from collections import Counter
 from faq_search import FAQSearch
 from typing import Dict, List, Optional
 import config
 
+# FAQ 답변 요약에 사용할 줄 머리말
+FAQ_EXPLANATION_PREFIX = '**💡 이 오류는 무엇인가요?**'
+FAQ_SUMMARY_PREFIXES = ('**🔍 결과코드:', '**📝 설명:', FAQ_EXPLANATION_PREFIX)
+
 class FAQSystem:
     def __init__(self, faq_data_file: str = "data/faq_data.json"):
         """
@@ -15,8 +21,22 @@ class FAQSystem:
             faq_data_file: FAQ 데이터 파일 경로
         """
         self.faq_search = FAQSearch(faq_data_file)
+        
+        # 데이터 변경 잠금 (st.cache_resource로 세션 간 공유되므로 FAQ 변경, 인덱스 재구축/저장, 캐시 무효화를 한 단위로 직렬화)
+        self._lock = threading.RLock()
+        
+        # 답변 텍스트 -> 요약 줄 목록 (로드 시 한 번 계산, FAQ 데이터가 바뀌면 비우고 처음 조회할 때 다시 계산)
+        self._answer_summaries = {}
+        for faq in self.faq_search.data:
+            self.get_answer_summary(faq.get('answer', ''))
+        
+        # 우선순위 정렬 목록 / 관련 결과코드 색인 (데이터 변경 시 다시 계산)
+        self._faqs_by_priority = None
+        self._faqs_by_code = None
+        self.data_version = 0  # 추가/수정/삭제 시마다 증가 (UI 캐시 키로 사용)
     
-    def search_faq(self, query: str, top_k: int = None, confidence_threshold: float = 0.3) -> Dict:
+    def search_faq(self, query: str, top_k: int = None, confidence_threshold: float = 0.3,
+                   query_embedding=None) -> Dict:
         """
         FAQ 검색 수행
         
@@ -24,30 +44,15 @@ class FAQSystem:
             query: 검색 쿼리
             top_k: 반환할 상위 결과 수
             confidence_threshold: 신뢰도 임계값
+            query_embedding: 미리 계산된 쿼리 임베딩 (선택, embedding_text(query)의 임베딩)
             
         Returns:
             검색 결과
         """
         try:
             # FAQ 검색 수행
-            results = self.faq_search.search(query, top_k, confidence_threshold)
-            
-            if results:
-                return {
-                    'success': True,
-                    'query': query,
-                    'results': results,
-                    'total_count': len(results),
-                    'message': f'{len(results)}개의 FAQ를 찾았습니다.'
-                }
-            else:
-                return {
-                    'success': False,
-                    'query': query,
-                    'results': [],
-                    'total_count': 0,
-                    'message': '관련 FAQ를 찾을 수 없습니다.'
-                }
+            results = self.faq_search.search(query, top_k, confidence_threshold, query_embedding)
+            return self._search_response(query, results)
                 
         except Exception as e:
             return {
@@ -58,6 +63,57 @@ class FAQSystem:
                 'message': f'FAQ 검색 중 오류가 발생했습니다: {str(e)}'
             }
     
+    def embedding_text(self, query: str) -> str:
+        """search_faq가 임베딩하는 전처리된 쿼리 문자열 (쿼리 임베딩을 미리 계산할 때 사용)"""
+        return self.faq_search.embedding_text(query)
+    
+    def search_faqs_batch(self, queries: List[str], top_k: int = None,
+                          confidence_threshold: float = 0.3) -> List[Dict]:
+        """
+        여러 쿼리 FAQ 검색 (쿼리 임베딩 배치 인코딩)
+        
+        Args:
+            queries: 검색 쿼리 목록
+            top_k: 쿼리별 반환할 상위 결과 수
+            confidence_threshold: 신뢰도 임계값
+            
+        Returns:
+            쿼리 순서대로 search_faq와 같은 형식의 검색 결과 목록
+        """
+        try:
+            results_list = self.faq_search.search_many(queries, top_k, confidence_threshold)
+            return [self._search_response(query, results) for query, results in zip(queries, results_list)]
+        
+        except Exception as e:
+            return [
+                {
+                    'success': False,
+                    'query': query,
+                    'results': [],
+                    'total_count': 0,
+                    'message': f'FAQ 검색 중 오류가 발생했습니다: {str(e)}'
+                }
+                for query in queries
+            ]
+    
+    def _search_response(self, query: str, results: List[Dict]) -> Dict:
+        """FAQ 검색 결과 리스트를 search_faq 응답 형식으로 변환"""
+        if results:
+            return {
+                'success': True,
+                'query': query,
+                'results': results,
+                'total_count': len(results),
+                'message': f'{len(results)}개의 FAQ를 찾았습니다.'
+            }
+        return {
+            'success': False,
+            'query': query,
+            'results': [],
+            'total_count': 0,
+            'message': '관련 FAQ를 찾을 수 없습니다.'
+        }
+    
     def search_faq_by_category(self, category: str, query: str = "", top_k: int = None) -> Dict:
         """
         카테고리별 FAQ 검색
@@ -135,10 +191,105 @@ class FAQSystem:
                 'message': f'FAQ 조회 중 오류가 발생했습니다: {str(e)}'
             }
     
+    def get_answer_summary(self, answer: str) -> List[str]:
+        """
+        FAQ 답변의 요약 줄 목록 반환
+        
+        Args:
+            answer: FAQ 답변 텍스트
+            
+        Returns:
+            요약 머리말로 시작하는 줄 (설명 머리말 다음 줄 포함)
+        """
+        summary_lines = self._answer_summaries.get(answer)
+        if summary_lines is None:
+            answer_lines = answer.split('\n')
+            summary_lines = []
+            for idx, line in enumerate(answer_lines):
+                if line.startswith(FAQ_SUMMARY_PREFIXES):
+                    summary_lines.append(line)
+                if line.startswith(FAQ_EXPLANATION_PREFIX):
+                    # 다음 줄도 포함
+                    if idx + 1 < len(answer_lines):
+                        next_line = answer_lines[idx + 1]
+                        if next_line.strip():
+                            summary_lines.append(next_line)
+            self._answer_summaries[answer] = summary_lines
+        return summary_lines
+    
+    def _reset_cached_views(self):
+        """FAQ 데이터 변경 시 정렬 목록/코드 색인/답변 요약 초기화 및 데이터 버전 증가"""
+        self._faqs_by_priority = None
+        self._faqs_by_code = None
+        self._answer_summaries = {}
+        self.data_version += 1
+    
+    def get_faqs_by_code(self, code: str) -> List[Dict]:
+        """관련 결과코드가 code인 FAQ 목록 (코드 -> FAQ 색인은 처음 조회 시 한 번 구축, 수정하지 말 것)"""
+        with self._lock:
+            if self._faqs_by_code is None:
+                faqs_by_code = {}
+                for faq in self.faq_search.data:
+                    # 같은 FAQ에 관련 코드가 중복 입력되어 있어도 코드별 목록에는 한 번만 추가
+                    for related_code in dict.fromkeys(faq.get('related_codes', [])):
+                        faqs_by_code.setdefault(related_code, []).append(faq)
+                self._faqs_by_code = faqs_by_code
+            return self._faqs_by_code.get(code, [])
+    
+    def search_faq_by_code(self, code: str) -> Dict:
+        """
+        관련 결과코드로 FAQ 직접 조회 (Hybrid Search/임베딩 계산 생략)
+        
+        Args:
+            code: 결과코드 (예: "4202")
+            
+        Returns:
+            search_faq와 같은 형식의 검색 결과
+        """
+        code = code.strip()
+        results = [
+            {
+                'id': faq['id'],
+                'question': faq['question'],
+                'answer': faq['answer'],
+                'category': faq['category'],
+                'tags': faq.get('tags', []),
+                'related_codes': faq.get('related_codes', []),
+                'priority': faq.get('priority', 0),
+                'score': 1.0,
+                'bm25_score': 1.0,
+                'embedding_score': 1.0
+            }
+            for faq in self.get_faqs_by_code(code)
+        ]
+        
+        if results:
+            return {
+                'success': True,
+                'query': code,
+                'results': results,
+                'total_count': len(results),
+                'message': f'{len(results)}개의 FAQ를 찾았습니다.'
+            }
+        return {
+            'success': False,
+            'query': code,
+            'results': [],
+            'total_count': 0,
+            'message': '관련 FAQ를 찾을 수 없습니다.'
+        }
+    
     def get_all_faqs(self) -> List[Dict]:
         """모든 FAQ 목록 반환"""
         return self.faq_search.data
     
+    def get_all_faqs_sorted(self) -> List[Dict]:
+        """우선순위 내림차순으로 정렬된 FAQ 목록 반환"""
+        with self._lock:
+            if self._faqs_by_priority is None:
+                self._faqs_by_priority = sorted(self.faq_search.data, key=lambda x: x.get('priority', 0), reverse=True)
+            return self._faqs_by_priority
+    
     def get_categories(self) -> List[str]:
         """모든 카테고리 목록 반환"""
         return self.faq_search.get_categories()
@@ -154,20 +305,22 @@ class FAQSystem:
             추가 결과
         """
         try:
-            success = self.faq_search.add_faq(faq_data)
-            
-            if success:
-                return {
-                    'success': True,
-                    'faq_id': faq_data.get('id'),
-                    'message': f'FAQ "{faq_data.get("question", "")}"가 성공적으로 추가되었습니다.'
-                }
-            else:
-                return {
-                    'success': False,
-                    'faq_id': faq_data.get('id'),
-                    'message': 'FAQ 추가에 실패했습니다.'
-                }
+            with self._lock:
+                success = self.faq_search.add_faq(faq_data)
+                
+                if success:
+                    self._reset_cached_views()
+                    return {
+                        'success': True,
+                        'faq_id': faq_data.get('id'),
+                        'message': f'FAQ "{faq_data.get("question", "")}"가 성공적으로 추가되었습니다.'
+                    }
+                else:
+                    return {
+                        'success': False,
+                        'faq_id': faq_data.get('id'),
+                        'message': 'FAQ 추가에 실패했습니다.'
+                    }
                 
         except Exception as e:
             return {
@@ -188,20 +341,22 @@ class FAQSystem:
             수정 결과
         """
         try:
-            success = self.faq_search.update_faq(faq_id, update_data)
-            
-            if success:
-                return {
-                    'success': True,
-                    'faq_id': faq_id,
-                    'message': f'FAQ ID "{faq_id}"가 성공적으로 수정되었습니다.'
-                }
-            else:
-                return {
-                    'success': False,
-                    'faq_id': faq_id,
-                    'message': f'FAQ ID "{faq_id}" 수정에 실패했습니다.'
-                }
+            with self._lock:
+                success = self.faq_search.update_faq(faq_id, update_data)
+                
+                if success:
+                    self._reset_cached_views()
+                    return {
+                        'success': True,
+                        'faq_id': faq_id,
+                        'message': f'FAQ ID "{faq_id}"가 성공적으로 수정되었습니다.'
+                    }
+                else:
+                    return {
+                        'success': False,
+                        'faq_id': faq_id,
+                        'message': f'FAQ ID "{faq_id}" 수정에 실패했습니다.'
+                    }
                 
         except Exception as e:
             return {
@@ -221,20 +376,22 @@ class FAQSystem:
             삭제 결과
         """
         try:
-            success = self.faq_search.delete_faq(faq_id)
-            
-            if success:
-                return {
-                    'success': True,
-                    'faq_id': faq_id,
-                    'message': f'FAQ ID "{faq_id}"가 성공적으로 삭제되었습니다.'
-                }
-            else:
-                return {
-                    'success': False,
-                    'faq_id': faq_id,
-                    'message': f'FAQ ID "{faq_id}" 삭제에 실패했습니다.'
-                }
+            with self._lock:
+                success = self.faq_search.delete_faq(faq_id)
+                
+                if success:
+                    self._reset_cached_views()
+                    return {
+                        'success': True,
+                        'faq_id': faq_id,
+                        'message': f'FAQ ID "{faq_id}"가 성공적으로 삭제되었습니다.'
+                    }
+                else:
+                    return {
+                        'success': False,
+                        'faq_id': faq_id,
+                        'message': f'FAQ ID "{faq_id}" 삭제에 실패했습니다.'
+                    }
                 
         except Exception as e:
             return {
@@ -252,30 +409,20 @@ class FAQSystem:
         try:
             all_faqs = self.get_all_faqs()
             
-            # 카테고리별 통계
-            category_stats = {}
-            for faq in all_faqs:
-                category = faq.get('category', '기타')
-                category_stats[category] = category_stats.get(category, 0) + 1
-            
-            # 우선순위별 통계
-            priority_stats = {}
-            for faq in all_faqs:
-                priority = faq.get('priority', 0)
-                priority_stats[priority] = priority_stats.get(priority, 0) + 1
-            
-            # 태그 통계
-            tag_stats = {}
+            # 카테고리별 / 우선순위별 / 태그 통계 (한 번의 순회로 집계)
+            category_stats = Counter()
+            priority_stats = Counter()
+            tag_stats = Counter()
             for faq in all_faqs:
-                tags = faq.get('tags', [])
-                for tag in tags:
-                    tag_stats[tag] = tag_stats.get(tag, 0) + 1
+                category_stats[faq.get('category', '기타')] += 1
+                priority_stats[faq.get('priority', 0)] += 1
+                tag_stats.update(faq.get('tags', []))
             
             return {
                 'total_faqs': len(all_faqs),
-                'categories': category_stats,
-                'priorities': priority_stats,
-                'popular_tags': dict(sorted(tag_stats.items(), key=lambda x: x[1], reverse=True)[:10])
+                'categories': dict(category_stats),
+                'priorities': dict(priority_stats),
+                'popular_tags': dict(tag_stats.most_common(10))
             }
             
         except Exception as e:
@@ -304,9 +451,10 @@ class FAQSystem:
             if not base_faq:
                 return []
             
-            # 기준 FAQ의 질문으로 검색
+            # 기준 FAQ의 질문으로 검색 (임베딩은 다시 인코딩하지 않고 기준 FAQ의 저장된 임베딩 사용)
             query = base_faq['question']
-            results = self.faq_search.search(query, top_k + 1)  # +1은 자기 자신 제외용
+            query_embedding = self.faq_search.get_faq_embedding(faq_id)
+            results = self.faq_search.search(query, top_k + 1, query_embedding=query_embedding)  # +1은 자기 자신 제외용
             
             # 자기 자신 제외
             similar_faqs = [faq for faq in results if faq['id'] != faq_id]
@@ -352,46 +500,50 @@ class FAQSystem:
             가져오기 결과
         """
         try:
-            imported_count = 0
-            skipped_count = 0
-            error_count = 0
-            
-            for faq_data in faq_list:
-                try:
+            # 커밋 전까지 인덱스와 어긋난 데이터를 검색이 읽지 않도록 FAQ 검색 엔진 잠금도 함께 보유
+            with self._lock, self.faq_search.lock:
+                imported_count = 0
+                skipped_count = 0
+                errors = []  # (FAQ ID, 사유)
+                
+                # FAQ별로 추가/수정만 하고 인덱스 재구축/저장은 마지막에 한 번만 수행
+                for faq_data in faq_list:
                     # 필수 필드 검증
-                    if 'id' not in faq_data or 'question' not in faq_data or 'answer' not in faq_data:
-                        error_count += 1
+                    if not all(field in faq_data for field in ('id', 'question', 'answer')):
+                        errors.append((faq_data.get('id', 'unknown'), '필수 필드 누락'))
                         continue
                     
                     # 중복 체크
-                    existing_faq = self.faq_search.get_faq_by_id(faq_data['id'])
-                    if existing_faq and not overwrite:
+                    exists = self.faq_search.get_faq_by_id(faq_data['id']) is not None
+                    if exists and not overwrite:
                         skipped_count += 1
                         continue
                     
-                    # FAQ 추가/수정
-                    if existing_faq and overwrite:
-                        success = self.faq_search.update_faq(faq_data['id'], faq_data)
+                    # FAQ 추가/수정 (실패 사유는 add_faq/update_faq에서 처리)
+                    if exists:
+                        success = self.faq_search.update_faq(faq_data['id'], faq_data, commit=False)
                     else:
-                        success = self.faq_search.add_faq(faq_data)
+                        success = self.faq_search.add_faq(faq_data, commit=False)
                     
                     if success:
                         imported_count += 1
                     else:
-                        error_count += 1
-                        
-                except Exception as e:
-                    print(f"FAQ 가져오기 실패 (ID: {faq_data.get('id', 'unknown')}): {e}")
-                    error_count += 1
-            
-            return {
-                'success': True,
-                'imported_count': imported_count,
-                'skipped_count': skipped_count,
-                'error_count': error_count,
-                'total_count': len(faq_list),
-                'message': f'{imported_count}개 가져오기 성공, {skipped_count}개 건너뛰기, {error_count}개 오류'
-            }
+                        errors.append((faq_data['id'], '추가/수정 실패'))
+                
+                if imported_count > 0:
+                    self.faq_search.commit_changes()
+                    self._reset_cached_views()
+                
+                error_count = len(errors)
+                return {
+                    'success': True,
+                    'imported_count': imported_count,
+                    'skipped_count': skipped_count,
+                    'error_count': error_count,
+                    'errors': errors,
+                    'total_count': len(faq_list),
+                    'message': f'{imported_count}개 가져오기 성공, {skipped_count}개 건너뛰기, {error_count}개 오류'
+                }
             
         except Exception as e:
             return {
@@ -405,6 +557,8 @@ class FAQSystem:
     
     def reload_data(self) -> bool:
         """FAQ 데이터 재로드"""
-        return self.faq_search.reload_data()
+        with self._lock:
+            self._reset_cached_views()
+            return self.faq_search.reload_data()
 
 
@@ -1,14 +1,36 @@
 """
 Hybrid Search 구현 (임베딩 + BM25)
 """
-import json
+import os
+import hashlib
+import re
+import threading
+from collections import OrderedDict
+from functools import lru_cache
 import numpy as np
 from sentence_transformers import SentenceTransformer
-from rank_bm25 import BM25Okapi
-from sklearn.metrics.pairwise import cosine_similarity
-from typing import List, Dict
+from bm25_index import BM25Index
+from typing import List, Dict, Tuple
+from json_io import json_loads
 import config
 
+# 토큰 분리 정규식 (한국어, 영어, 숫자, 특수문자)
+TOKEN_PATTERN = re.compile(r'[가-힣]+|[a-zA-Z]+|\d+|[^\s]')
+
+# 쿼리 해석용 정규식 (호출마다 컴파일/캐시 조회하지 않도록 미리 컴파일)
+CODE_QUERY_PATTERN = re.compile(r'결과코드\s*(-?\d+)')
+NUMBER_PATTERN = re.compile(r'-?\d+')
+EXACT_CODE_PATTERN = re.compile(r'(?:결과코드\s*)?(-?\d+)')  # 코드 번호만 있는 쿼리 ("4202", "결과코드 4202")
+
+def _tokenize_text(text: str) -> List[str]:
+    """텍스트 토큰화 (한국어, 영어, 숫자 혼합 처리) - 소문자 변환은 토큰별이 아니라 원문에 한 번만 적용"""
+    return TOKEN_PATTERN.findall(text.lower())
+
+@lru_cache(maxsize=1024)
+def _tokenize_query_cached(text: str) -> Tuple[str, ...]:
+    """쿼리 토큰화 결과 캐시 (반복 검색어용, 말뭉치 토큰화는 캐시를 거치지 않음)"""
+    return tuple(_tokenize_text(text))
+
 class HybridSearch:
     def __init__(self, data_file: str = None):
         """
@@ -20,49 +42,112 @@ class HybridSearch:
         self.data_file = data_file or config.DATA_FILE # file 경로 
         self.data = self._load_data() # json load data/result_codes.json 읽기(없으면 빈 리스트 반환)
         self.embedding_model = SentenceTransformer(config.EMBEDDING_MODEL) # 임베딩 백터 생성
+        self._embedding_cache = self._load_embedding_cache() # 텍스트 해시 -> 정규화된 임베딩 (재시작 시 재인코딩 방지)
         self.bm25 = self._build_bm25() # 각 데이터 항목을 "결과코드 {code} {description}" 문자열로 합친 뒤 토큰화하여 BM25 인덱스 생성
         self.embeddings = self._build_embeddings() # 임베딩 백터 생성 (각 항목 문자열을 임베딩 모델로 인코딩하여 self.embeddings 에 저장)
+        self.code_index = self._build_code_index() # 결과코드 -> 항목 리스트 (코드 번호 직접 조회용, 중복 코드 포함)
+        self.data_version = 0 # 데이터 변경 시마다 증가 (UI 캐시 키로 사용)
+        self.lock = threading.RLock() # st.cache_resource로 세션 간 공유되므로 데이터 변경/색인 재구축과 검색 점수 계산을 직렬화
+        
+        # 검색 결과 캐시 (정확히 같은 쿼리 -> 결과), data_version이 바뀌면 비움
+        # 표현만 다른 유사 쿼리의 결과 재사용(시맨틱 캐시)은 검색 API가 아니라 앱(AI 어시스턴트)에서만 수행
+        self._query_cache = OrderedDict()
+        self._query_cache_lock = threading.Lock()
+        self._cache_version = self.data_version
         
     def _load_data(self) -> List[Dict]:
         """데이터 로드"""
         try:
-            with open(self.data_file, 'r', encoding='utf-8') as f:
-                return json.load(f)
+            with open(self.data_file, 'rb') as f:
+                return json_loads(f.read())
         except FileNotFoundError:
             print(f"데이터 파일을 찾을 수 없습니다: {self.data_file}")
             return []
     
-    def _build_bm25(self) -> BM25Okapi:
-        """BM25 인덱스 구축"""
+    def _build_bm25(self) -> BM25Index:
+        """BM25 인덱스 구축 (전체 항목 토큰화)"""
         # 검색 가능한 텍스트 생성 (코드 + 설명)
         corpus = []
         for item in self.data:
             text = f"결과코드 {item['code']} {item['description']}"
             corpus.append(text)
         
-        # 빈 데이터 처리
-        if not corpus:
-            # 빈 리스트로 BM25 인덱스 생성
-            try:
-                return BM25Okapi([[]])
-            except Exception as e:
-                print(f"빈 BM25 인덱스 생성 실패: {e}")
-                # 더미 데이터로 인덱스 생성
-                return BM25Okapi([["dummy"]])
-        
-        # 토큰화 (한국어, 영어, 숫자 혼합 처리)
-        tokenized_corpus = [self._tokenize(text) for text in corpus]
-        return BM25Okapi(tokenized_corpus)
-    
-    def _tokenize(self, text: str) -> List[str]:
-        """텍스트 토큰화 (한국어, 영어, 숫자 혼합 처리)"""
-        import re
-        # 한국어, 영어, 숫자, 특수문자 분리
-        tokens = re.findall(r'[가-힣]+|[a-zA-Z]+|\d+|[^\s]', text)
-        return [token.lower() for token in tokens if token.strip()]
+        # 토큰화 (한국어, 영어, 숫자 혼합 처리) - 항목 추가/삭제 시 재사용하도록 보관
+        self._tokenized_corpus = [_tokenize_text(text) for text in corpus]
+        return BM25Index(self._tokenized_corpus)
+    
+    def _build_code_index(self) -> Dict[str, List[Dict]]:
+        """결과코드별 항목 색인 구축 (같은 코드에 여러 설명이 있을 수 있음)"""
+        code_index = {}
+        for item in self.data:
+            code_index.setdefault(item['code'], []).append(item)
+        return code_index
+    
+    def rebuild_indexes(self):
+        """데이터 변경 후 BM25/임베딩/코드 색인 재구축"""
+        with self.lock:
+            self.bm25 = self._build_bm25()
+            self.embeddings = self._build_embeddings()
+            self.code_index = self._build_code_index()
+            self.data_version += 1
+    
+    def add_items(self, items: List[Dict], batch_size: int = None):
+        """
+        여러 항목을 한 번에 추가하고 색인 갱신
+        
+        기존 항목의 임베딩은 재사용하고 새 항목만 배치 인코딩하여 이어 붙임
+        
+        Args:
+            items: 추가할 항목 리스트 (code, description, category)
+            batch_size: 임베딩 인코딩 배치 크기
+        """
+        if not items:
+            return
+        
+        with self.lock:
+            texts = [f"결과코드 {item['code']} {item['description']}" for item in items]
+            new_embeddings = self._embed_texts(texts, batch_size)
+            self._save_embedding_cache()
+            
+            self.data.extend(items)
+            if len(self.embeddings) == 0:
+                self.embeddings = new_embeddings
+            else:
+                self.embeddings = np.vstack([self.embeddings, new_embeddings])
+            self._tokenized_corpus.extend(_tokenize_text(text) for text in texts)
+            self.bm25 = BM25Index(self._tokenized_corpus)
+            self.code_index = self._build_code_index()
+            self.data_version += 1
+    
+    def remove_items(self, predicate) -> int:
+        """
+        조건에 맞는 항목을 한 번에 삭제하고 색인 갱신
+        
+        남은 항목의 임베딩은 다시 인코딩하지 않고 행 선택으로 재사용
+        
+        Args:
+            predicate: 항목을 받아 삭제 대상이면 True를 반환하는 함수
+            
+        Returns:
+            삭제된 항목 수
+        """
+        with self.lock:
+            keep = [i for i, item in enumerate(self.data) if not predicate(item)]
+            removed_count = len(self.data) - len(keep)
+            if removed_count == 0:
+                return 0
+            
+            self.data = [self.data[i] for i in keep]
+            if len(self.embeddings) > 0:
+                self.embeddings = self.embeddings[keep] if keep else np.array([])
+            self._tokenized_corpus = [self._tokenized_corpus[i] for i in keep]
+            self.bm25 = BM25Index(self._tokenized_corpus)
+            self.code_index = self._build_code_index()
+            self.data_version += 1
+            return removed_count
     
     def _build_embeddings(self) -> np.ndarray:
-        """임베딩 벡터 구축"""
+        """임베딩 벡터 구축 (캐시에 없는 항목만 인코딩)"""
         texts = []
         for item in self.data:
             text = f"결과코드 {item['code']} {item['description']}"
@@ -73,15 +158,81 @@ class HybridSearch:
             # 빈 배열 반환
             return np.array([])
         
-        return self.embedding_model.encode(texts)
+        embeddings = self._embed_texts(texts)
+        
+        # 현재 항목 기준으로 캐시 정리 (삭제/수정된 항목의 벡터 제거) 후 변경 시에만 저장
+        keys = {self._embedding_key(text) for text in texts}
+        if self._cache_dirty or len(keys) != len(self._embedding_cache):
+            self._embedding_cache = {key: self._embedding_cache[key] for key in keys}
+            self._save_embedding_cache()
+        return embeddings
     
-    def search(self, query: str, top_k: int = None) -> List[Dict]:
+    def _embed_texts(self, texts: List[str], batch_size: int = None) -> np.ndarray:
+        """텍스트 임베딩 행렬 (캐시에 없는 텍스트만 배치 인코딩해 캐시에 추가)"""
+        keys = [self._embedding_key(text) for text in texts]
+        missing = [i for i, key in enumerate(keys) if key not in self._embedding_cache]
+        if missing:
+            vectors = self._encode_corpus([texts[i] for i in missing], batch_size)
+            for i, vector in zip(missing, vectors):
+                # 디스크 저장 형식(float16)과 같은 정밀도로 맞춰 재시작 전후 점수를 동일하게 유지
+                self._embedding_cache[keys[i]] = vector.astype(np.float16).astype(np.float32)
+            self._cache_dirty = True
+        return np.stack([self._embedding_cache[key] for key in keys])
+    
+    def _embedding_key(self, text: str) -> str:
+        """임베딩 캐시 키 (모델명 + 텍스트 내용 해시)"""
+        return hashlib.blake2b(f"{config.EMBEDDING_MODEL}\n{text}".encode('utf-8'), digest_size=8).hexdigest()
+    
+    def _load_embedding_cache(self) -> Dict[str, np.ndarray]:
+        """디스크에 저장된 결과코드 임베딩 캐시 로드"""
+        self._cache_dirty = False
+        if not os.path.exists(config.CODE_EMBEDDING_CACHE_FILE):
+            return {}
+        try:
+            with np.load(config.CODE_EMBEDDING_CACHE_FILE) as cache:
+                vectors = cache['vectors'].astype(np.float32)
+                return dict(zip(cache['keys'].tolist(), vectors))
+        except Exception as e:
+            print(f"결과코드 임베딩 캐시 로드 실패: {e}")
+            return {}
+    
+    def _save_embedding_cache(self):
+        """결과코드 임베딩 캐시 저장 (디스크 용량 절약을 위해 float16으로 저장)"""
+        self._cache_dirty = False
+        if not self._embedding_cache:
+            return
+        try:
+            os.makedirs(os.path.dirname(config.CODE_EMBEDDING_CACHE_FILE), exist_ok=True)
+            temp_file = f"{config.CODE_EMBEDDING_CACHE_FILE}.tmp"
+            with open(temp_file, 'wb') as f:
+                np.savez(
+                    f,
+                    keys=np.array(list(self._embedding_cache.keys())),
+                    vectors=np.stack(list(self._embedding_cache.values())).astype(np.float16)
+                )
+            os.replace(temp_file, config.CODE_EMBEDDING_CACHE_FILE)
+        except Exception as e:
+            print(f"결과코드 임베딩 캐시 저장 실패: {e}")
+    
+    def _encode_corpus(self, texts: List[str], batch_size: int = None) -> np.ndarray:
+        """결과코드 텍스트 배치 인코딩 (L2 정규화된 C 연속 float32 배열, 검색 시 내적만으로 코사인 유사도 계산)"""
+        embeddings = self.embedding_model.encode(
+            texts,
+            batch_size=batch_size or config.EMBEDDING_BATCH_SIZE,
+            convert_to_numpy=True,
+            normalize_embeddings=True,
+            show_progress_bar=False
+        )
+        return np.ascontiguousarray(embeddings, dtype=np.float32)
+    
+    def search(self, query: str, top_k: int = None, query_embedding: np.ndarray = None) -> List[Dict]:
         """
         Hybrid Search 수행
         
         Args:
             query: 검색 쿼리
             top_k: 반환할 상위 결과 수
+            query_embedding: 미리 계산된 쿼리 임베딩 (embedding_text(query)의 임베딩, 주어지면 임베딩 계산 생략)
             
         Returns:
             검색 결과 리스트 (score 내림차순 정렬)
@@ -91,46 +242,129 @@ class HybridSearch:
         
         top_k = top_k or config.TOP_K_RESULTS
         
+        # 색인에 있는 결과코드 번호만 입력된 경우 코드 색인에서 바로 조회 (임베딩/점수 계산 생략)
+        code_match = EXACT_CODE_PATTERN.fullmatch(query.strip())
+        if code_match and code_match.group(1) in self.code_index:
+            return self.lookup_code(code_match.group(1))[:top_k]
+        
+        # 같은 쿼리의 이전 결과 재사용 (임베딩 인코딩/점수 계산 생략)
+        # 검색 시작 시점의 데이터 버전을 함께 저장해, 검색 중 데이터가 바뀌면 이전 데이터의 결과를 캐시하지 않음
+        data_version = self.data_version
+        cache_key = (query.strip(), top_k)
+        cached = self._get_cached_results(cache_key)
+        if cached is not None:
+            return cached
+        
         # 쿼리 전처리
         processed_query = self._preprocess_query(query)
         
+        if query_embedding is None:
+            query_embedding = self.encode_query(processed_query)
+        
+        # 점수 계산/결과 생성은 데이터 변경 잠금 안에서 수행 (add_items/remove_items가 data/임베딩/BM25를
+        # 하나씩 교체하는 도중의 길이가 다른 상태를 읽지 않도록 함, 쿼리 인코딩은 잠금 밖에서 수행)
+        with self.lock:
+            results = self._search(processed_query, top_k, query_embedding)
+        
+        self._put_cached_results(cache_key, results, data_version)
+        return [dict(result) for result in results]
+    
+    def lookup_code(self, code: str) -> List[Dict]:
+        """
+        결과코드 번호로 직접 조회 (search와 같은 형식, 중복 코드 포함, 없으면 빈 리스트)
+        
+        Args:
+            code: 결과코드 (예: "4202")
+        """
+        return [
+            {
+                'code': item['code'],
+                'description': item['description'],
+                'category': item.get('category', '기타'),
+                'score': 1.0,
+                'bm25_score': 1.0,
+                'embedding_score': 1.0
+            }
+            for item in self.code_index.get(code.strip(), [])
+        ]
+    
+    def _get_cached_results(self, cache_key) -> List[Dict]:
+        """정확히 같은 쿼리의 캐시된 결과 (데이터가 바뀌었으면 캐시를 비우고 None, 호출 측 수정에 대비해 복사본 반환)"""
+        with self._query_cache_lock:
+            if self._cache_version != self.data_version:
+                self._query_cache.clear()
+                self._cache_version = self.data_version
+                return None
+            
+            results = self._query_cache.get(cache_key)
+            if results is None:
+                return None
+            self._query_cache.move_to_end(cache_key)
+        return [dict(result) for result in results]
+    
+    def _put_cached_results(self, cache_key, results: List[Dict], data_version: int):
+        """
+        검색 결과 캐시 저장 (최대 개수 초과 시 가장 오래 사용되지 않은 항목 제거)
+        
+        data_version은 검색을 시작할 때의 데이터 버전이며, 그 사이 데이터가 바뀌었으면 저장하지 않음
+        """
+        with self._query_cache_lock:
+            if data_version != self.data_version:
+                return
+            if self._cache_version != data_version:
+                self._query_cache.clear()
+                self._cache_version = data_version
+            self._query_cache[cache_key] = results
+            self._query_cache.move_to_end(cache_key)
+            while len(self._query_cache) > config.HYBRID_QUERY_CACHE_SIZE:
+                self._query_cache.popitem(last=False)
+    
+    def _search(self, processed_query: str, top_k: int, query_embedding: np.ndarray) -> List[Dict]:
+        """전처리된 쿼리로 BM25/임베딩 점수를 계산해 검색 결과 생성"""
         # BM25 점수 계산
         bm25_scores = self._get_bm25_scores(processed_query)
         
         # 임베딩 유사도 계산
-        embedding_scores = self._get_embedding_scores(processed_query)
+        embedding_scores = self._get_embedding_scores(query_embedding)
         
         # Hybrid 점수 계산 (가중 평균)
         hybrid_scores = self._calculate_hybrid_scores(bm25_scores, embedding_scores)
         
-        # 결과 생성 및 정렬 (bm25/embedding 점수 접근 안전화)
-        results = []
+        if len(hybrid_scores) == 0:
+            return []
+        
+        # 신뢰도 임계값 이상인 후보 (없으면 임계값과 관계없이 최고점 1개라도 반환)
+        candidates = np.flatnonzero(hybrid_scores >= config.CONFIDENCE_THRESHOLD)
+        if len(candidates) == 0:
+            candidates = np.array([int(np.argmax(hybrid_scores))])
+        scores = hybrid_scores[candidates]
+        
+        # 상위 top_k개만 선택 (k번째 점수 이상인 후보만 남긴 뒤 정렬, 동점은 원래 순서 유지)
+        if len(candidates) > top_k:
+            kth_score = np.partition(scores, len(scores) - top_k)[len(scores) - top_k]
+            keep = scores >= kth_score
+            candidates, scores = candidates[keep], scores[keep]
+        top_indices = candidates[np.argsort(-scores, kind='stable')[:top_k]]
+        
+        # 선택된 항목만 결과 생성 (bm25/embedding 점수 접근 안전화)
         bm25_len = len(bm25_scores)
         emb_len = len(embedding_scores)
-        for i, score in enumerate(hybrid_scores):
-            data_item = self.data[i] if i < len(self.data) else None
-            if data_item:
-                results.append({
-                    'code': data_item['code'],
-                    'description': data_item['description'],
-                    'category': data_item.get('category', '기타'),
-                    'score': float(score),
-                    'bm25_score': float(bm25_scores[i]) if bm25_len > i else 0.0,
-                    'embedding_score': float(embedding_scores[i]) if emb_len > i else 0.0
-                })
-        
-        # score 내림차순 정렬
-        results.sort(key=lambda x: x['score'], reverse=True)
-        
-        # 신뢰도 임계값 필터링
-        filtered_results = [result for result in results if result['score'] >= config.CONFIDENCE_THRESHOLD]
-        
-        # 필터링된 결과가 있으면 그것을 반환, 없으면 상위 결과 반환
-        if filtered_results:
-            return filtered_results[:top_k]
-        else:
-            # 임계값을 만족하는 결과가 없으면 상위 1개라도 반환
-            return results[:1] if results else []
+        results = []
+        for i in top_indices:
+            data_item = self.data[i]
+            results.append({
+                'code': data_item['code'],
+                'description': data_item['description'],
+                'category': data_item.get('category', '기타'),
+                'score': float(hybrid_scores[i]),
+                'bm25_score': float(bm25_scores[i]) if bm25_len > i else 0.0,
+                'embedding_score': float(embedding_scores[i]) if emb_len > i else 0.0
+            })
+        return results
+    
+    def embedding_text(self, query: str) -> str:
+        """search가 임베딩하는 전처리된 쿼리 문자열 (쿼리 임베딩을 미리 계산할 때 사용)"""
+        return self._preprocess_query(query)
     
     def _preprocess_query(self, query: str) -> str:
         """쿼리 전처리"""
@@ -144,10 +378,7 @@ class HybridSearch:
         if len(query) < 15 and "결과코드" in query:
             return f"{query} 설명"
         
-        # 특정 키워드가 포함된 경우 정확한 매칭을 위해 강화
-        if any(keyword in query for keyword in ["트래픽", "초과", "인증", "실패", "시스템", "장애", "스팸"]):
-            return query  # 정확한 키워드는 그대로 유지
-        
+        # 그 외(특정 키워드 포함 쿼리 포함)는 정확한 매칭을 위해 그대로 유지
         return query
     
     def _get_bm25_scores(self, query: str) -> np.ndarray:
@@ -155,21 +386,45 @@ class HybridSearch:
         if len(self.data) == 0:
             return np.array([])
         
-        tokenized_query = self._tokenize(query)
+        tokenized_query = list(_tokenize_query_cached(query))
         scores = self.bm25.get_scores(tokenized_query)
-        # 정규화 (0-1 범위)
-        if len(scores) > 0 and scores.max() > 0:
-            scores = scores / scores.max()
+        # 정규화 (0-1 범위, 새로 만든 점수 배열이므로 제자리에서 나눔)
+        max_score = scores.max() if len(scores) > 0 else 0.0
+        if max_score > 0:
+            scores /= max_score
         return scores
     
-    def _get_embedding_scores(self, query: str) -> np.ndarray:
-        """임베딩 유사도 점수 계산"""
+    def encode_query(self, query: str) -> np.ndarray:
+        """쿼리 1건 인코딩 (L2 정규화된 1차원 벡터, 진행률 표시 없음)"""
+        return self.embedding_model.encode(
+            query,
+            convert_to_numpy=True,
+            normalize_embeddings=True,
+            show_progress_bar=False
+        )
+    
+    def encode_queries(self, queries: List[str]) -> np.ndarray:
+        """여러 쿼리를 한 번의 배치 인코딩으로 계산 (쿼리 순서대로 L2 정규화된 2차원 배열)"""
+        return self.embedding_model.encode(
+            queries,
+            batch_size=config.EMBEDDING_BATCH_SIZE,
+            convert_to_numpy=True,
+            normalize_embeddings=True,
+            show_progress_bar=False
+        )
+    
+    def _get_embedding_scores(self, query_embedding: np.ndarray) -> np.ndarray:
+        """임베딩 유사도 점수 계산 (search에서 한 번 계산한 쿼리 임베딩 사용)"""
         if len(self.data) == 0 or len(self.embeddings) == 0:
             return np.array([])
         
-        query_embedding = self.embedding_model.encode([query])
-        similarities = cosine_similarity(query_embedding, self.embeddings)[0]
-        return similarities
+        query_vector = np.asarray(query_embedding, dtype=np.float32).reshape(-1)
+        norm = np.linalg.norm(query_vector)
+        if norm > 0:
+            query_vector = query_vector / norm
+        
+        # 코사인 유사도 (결과코드 임베딩은 구축 시 이미 정규화됨)
+        return self.embeddings @ query_vector
     
     def _calculate_hybrid_scores(self, bm25_scores: np.ndarray, embedding_scores: np.ndarray) -> np.ndarray:
         """Hybrid 점수 계산 (가중 평균)"""
@@ -182,8 +437,10 @@ class HybridSearch:
         if len(embedding_scores) == 0:
             return bm25_scores
         
-        return (config.BM25_WEIGHT * bm25_scores + 
-                config.EMBEDDING_WEIGHT * embedding_scores)
+        # 가중 평균을 하나의 결과 배열에 누적 (중간 배열 생성 최소화)
+        hybrid_scores = np.multiply(bm25_scores, config.BM25_WEIGHT)
+        hybrid_scores += config.EMBEDDING_WEIGHT * embedding_scores
+        return hybrid_scores
     
     def find_code_description(self, query: str) -> Dict:
         """
@@ -195,8 +452,19 @@ class HybridSearch:
         Returns:
             규칙에 따른 출력 형식
         """
-        results = self.search(query, top_k=1)
+        return self.describe_best(query, self.search(query, top_k=1))
+    
+    def describe_best(self, query: str, results: List[Dict]) -> Dict:
+        """
+        이미 계산된 검색 결과에서 최상위 결과를 규칙에 따른 출력 형식으로 변환
         
+        Args:
+            query: 검색 쿼리 (결과가 없을 때 코드 추출용)
+            results: search() 결과 리스트 (score 내림차순)
+            
+        Returns:
+            규칙에 따른 출력 형식
+        """
         if not results or results[0]['score'] < config.CONFIDENCE_THRESHOLD:
             # 코드 추출 시도
             code = self._extract_code_from_query(query)
@@ -215,15 +483,14 @@ class HybridSearch:
     
     def _extract_code_from_query(self, query: str) -> str:
         """쿼리에서 코드 추출"""
-        import re
         # "결과코드 -4007" -> "-4007", "결과코드 4007" -> "4007"
-        match = re.search(r'결과코드\s*(-?\d+)', query)
+        match = CODE_QUERY_PATTERN.search(query)
         if match:
             return match.group(1)
         
-        # 숫자만 추출 (음수 기호 포함)
-        numbers = re.findall(r'-?\d+', query)
-        if numbers:
-            return numbers[0]
+        # 첫 번째 숫자 추출 (음수 기호 포함)
+        match = NUMBER_PATTERN.search(query)
+        if match:
+            return match.group(0)
         
         return query.strip()
@@ -1,11 +1,54 @@
 """
 결과코드와 FAQ 통합 검색 시스템
 """
-from typing import Dict, List, Optional
+import re
+import threading
+from collections import Counter
+from functools import lru_cache
+from itertools import islice
+from typing import Dict, List, Optional, Tuple
+import numpy as np
 from rag_system import RAGSystem
 from faq_system import FAQSystem
 import config
 
+# 쿼리 유형 분석용 결과코드 숫자 패턴 (쿼리마다 다시 컴파일하지 않도록 미리 컴파일)
+_CODE_NUMBER_RE = re.compile(r'\b\d{3,5}\b')
+
+# 결과코드 관련 키워드 (소문자, 쿼리마다 목록을 새로 만들지 않도록 모듈 상수로 둠)
+_CODE_KEYWORDS = frozenset([
+    '결과코드', '코드', '에러코드', '오류코드', '상태코드',
+    'result code', 'error code', 'status code',
+    '4007', '5000', '6000'  # 실제 코드 번호들
+])
+
+# FAQ 관련 키워드 (소문자)
+_FAQ_KEYWORDS = frozenset([
+    '어떻게', '방법', '해결', '문제', '오류', '실패', '안돼', '못해',
+    '왜', '이유', '원인', '확인', '체크', '설정', '등록',
+    'how', 'why', 'what', 'solution', 'problem', 'error', 'help'
+])
+
+@lru_cache(maxsize=1024)
+def _classify_query(query: str) -> str:
+    """쿼리 유형 분류 결과 캐시 (쿼리 문자열만으로 결정되므로 반복 검색어는 재계산 생략)"""
+    query_lower = query.lower()
+    
+    # 숫자 패턴 (결과코드)
+    has_code_number = bool(_CODE_NUMBER_RE.search(query))
+    
+    # 키워드 점수 계산
+    code_score = sum(1 for keyword in _CODE_KEYWORDS if keyword in query_lower)
+    faq_score = sum(1 for keyword in _FAQ_KEYWORDS if keyword in query_lower)
+    
+    # 점수 기반 판단
+    if has_code_number or code_score > faq_score:
+        return 'code'
+    elif faq_score > 0 and code_score == 0:
+        return 'faq'
+    else:
+        return 'mixed'
+
 class IntegratedSearch:
     def __init__(self, rag_system: RAGSystem = None, faq_system: FAQSystem = None):
         """
@@ -17,6 +60,58 @@ class IntegratedSearch:
         """
         self.rag_system = rag_system or RAGSystem()
         self.faq_system = faq_system or FAQSystem()
+        
+        # 동일 쿼리 반복 시 임베딩 모델 호출을 생략하기 위한 LRU 캐시
+        self._embed_query_cached = lru_cache(maxsize=config.EMBEDDING_CACHE_SIZE)(self._encode_query)
+        
+        # 데이터 버전별 캐시 갱신 잠금 (st.cache_resource로 세션 간 공유되므로 목록과 버전이 어긋나지 않도록 함께 교체)
+        self._views_lock = threading.Lock()
+        
+        # 카테고리 -> 결과코드 목록 색인 (결과코드 data_version이 바뀌면 다시 구축)
+        self._codes_by_category: Optional[Dict[str, List[Dict]]] = None
+        self._codes_by_category_version = None
+        
+        # 검색 제안용 소문자 변환 목록 (쿼리마다 전체를 다시 소문자로 바꾸지 않도록 데이터 버전별로 캐시)
+        self._suggestion_codes = None
+        self._suggestion_codes_version = None
+        self._suggestion_faqs = None
+        self._suggestion_faqs_version = None
+    
+    def embed_query(self, query: str) -> np.ndarray:
+        """
+        쿼리 임베딩 계산 (결과코드/FAQ 검색에서 공통으로 재사용)
+        
+        Args:
+            query: 검색 쿼리
+            
+        Returns:
+            쿼리 임베딩 벡터 (캐시 공유 값이므로 읽기 전용)
+        """
+        # 앞뒤 공백은 임베딩에 영향이 없으므로 제거해 캐시 적중률을 높임
+        return self._embed_query_cached(query.strip())
+    
+    def _encode_query(self, query: str) -> np.ndarray:
+        """임베딩 모델로 쿼리 인코딩 (캐시된 배열이 변경되지 않도록 읽기 전용으로 반환)"""
+        embedding = np.asarray(self.rag_system.hybrid_search.encode_query(query))
+        embedding.flags.writeable = False
+        return embedding
+    
+    def embed_search_queries(self, query: str) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        결과코드/FAQ 검색용 쿼리 임베딩 계산
+        
+        두 시스템은 쿼리 전처리가 달라("결과코드 " 접두어, " 설명" 확장, ?/! 제거) 각자 전처리한
+        문자열을 임베딩하며, 전처리 결과가 같을 때만 같은 임베딩을 공유 (임베딩 캐시 키가 같음)
+        
+        Args:
+            query: 검색 쿼리
+            
+        Returns:
+            (결과코드 검색용 임베딩, FAQ 검색용 임베딩)
+        """
+        code_embedding = self.embed_query(self.rag_system.embedding_text(query))
+        faq_embedding = self.embed_query(self.faq_system.embedding_text(query))
+        return code_embedding, faq_embedding
     
     def search_all(self, query: str, top_k: int = None) -> Dict:
         """
@@ -29,14 +124,53 @@ class IntegratedSearch:
         Returns:
             통합 검색 결과
         """
+        # 쿼리 임베딩은 시스템별 전처리 문자열로 계산 (전처리 결과가 같으면 한 번만 계산)
+        try:
+            code_embedding, faq_embedding = self.embed_search_queries(query)
+        except Exception as e:
+            return self._search_all_error(query, e)
+        return self._search_all(query, top_k, code_embedding, faq_embedding)
+    
+    def search_all_batch(self, queries: List[str], top_k: int = None) -> List[Dict]:
+        """
+        여러 쿼리 통합 검색 (중복을 뺀 쿼리 임베딩을 한 번의 배치 인코딩으로 계산)
+        
+        Args:
+            queries: 검색 쿼리 목록
+            top_k: 각 시스템별 반환할 상위 결과 수
+            
+        Returns:
+            쿼리 순서대로 search_all과 같은 형식의 통합 검색 결과 목록
+        """
+        try:
+            # 쿼리별 (결과코드용, FAQ용) 전처리 문자열 - 중복을 뺀 문자열만 배치 인코딩
+            texts = [
+                (self.rag_system.embedding_text(query), self.faq_system.embedding_text(query))
+                for query in queries
+            ]
+            unique_texts = list(dict.fromkeys(text for pair in texts for text in pair))
+            embeddings = {}
+            if unique_texts:
+                for text, embedding in zip(unique_texts, self.rag_system.hybrid_search.encode_queries(unique_texts)):
+                    embedding.flags.writeable = False
+                    embeddings[text] = embedding
+        except Exception as e:
+            return [self._search_all_error(query, e) for query in queries]
+        return [
+            self._search_all(query, top_k, embeddings[code_text], embeddings[faq_text])
+            for query, (code_text, faq_text) in zip(queries, texts)
+        ]
+    
+    def _search_all(self, query: str, top_k: int, code_embedding: np.ndarray, faq_embedding: np.ndarray) -> Dict:
+        """미리 계산한 시스템별 쿼리 임베딩으로 결과코드와 FAQ 검색 후 통합 결과 구성"""
         try:
             top_k = top_k or config.TOP_K_RESULTS
             
             # 결과코드 검색
-            code_results = self.rag_system.get_detailed_results(query, top_k)
+            code_results = self.rag_system.get_detailed_results(query, top_k, query_embedding=code_embedding)
             
             # FAQ 검색
-            faq_results = self.faq_system.search_faq(query, top_k)
+            faq_results = self.faq_system.search_faq(query, top_k, query_embedding=faq_embedding)
             
             # 결과 통합
             integrated_results = {
@@ -57,14 +191,18 @@ class IntegratedSearch:
             return integrated_results
             
         except Exception as e:
-            return {
-                'success': False,
-                'query': query,
-                'total_count': 0,
-                'code_results': {'count': 0, 'results': []},
-                'faq_results': {'count': 0, 'results': []},
-                'message': f'통합 검색 중 오류가 발생했습니다: {str(e)}'
-            }
+            return self._search_all_error(query, e)
+    
+    def _search_all_error(self, query: str, error: Exception) -> Dict:
+        """통합 검색 실패 응답"""
+        return {
+            'success': False,
+            'query': query,
+            'total_count': 0,
+            'code_results': {'count': 0, 'results': []},
+            'faq_results': {'count': 0, 'results': []},
+            'message': f'통합 검색 중 오류가 발생했습니다: {str(error)}'
+        }
     
     def search_smart(self, query: str, top_k: int = None) -> Dict:
         """
@@ -96,8 +234,9 @@ class IntegratedSearch:
                 }
             
             elif query_type == 'faq':
-                # FAQ 검색
-                faq_result = self.faq_system.search_faq(query, top_k)
+                # FAQ 검색 (FAQ 전처리 문자열의 임베딩은 통합 검색과 같은 캐시에서 재사용)
+                faq_embedding = self.embed_query(self.faq_system.embedding_text(query))
+                faq_result = self.faq_system.search_faq(query, top_k, query_embedding=faq_embedding)
                 return {
                     'success': faq_result['success'],
                     'query': query,
@@ -131,38 +270,7 @@ class IntegratedSearch:
         Returns:
             쿼리 유형 ('code', 'faq', 'mixed')
         """
-        import re
-        
-        query_lower = query.lower()
-        
-        # 결과코드 관련 키워드
-        code_keywords = [
-            '결과코드', '코드', '에러코드', '오류코드', '상태코드',
-            'result code', 'error code', 'status code',
-            '4007', '5000', '6000'  # 실제 코드 번호들
-        ]
-        
-        # FAQ 관련 키워드
-        faq_keywords = [
-            '어떻게', '방법', '해결', '문제', '오류', '실패', '안돼', '못해',
-            '왜', '이유', '원인', '확인', '체크', '설정', '등록',
-            'how', 'why', 'what', 'solution', 'problem', 'error', 'help'
-        ]
-        
-        # 숫자 패턴 (결과코드)
-        has_code_number = bool(re.search(r'\b\d{3,5}\b', query))
-        
-        # 키워드 점수 계산
-        code_score = sum(1 for keyword in code_keywords if keyword in query_lower)
-        faq_score = sum(1 for keyword in faq_keywords if keyword in query_lower)
-        
-        # 점수 기반 판단
-        if has_code_number or code_score > faq_score:
-            return 'code'
-        elif faq_score > 0 and code_score == 0:
-            return 'faq'
-        else:
-            return 'mixed'
+        return _classify_query(query)
     
     def get_related_content(self, code: str = None, faq_id: str = None) -> Dict:
         """
@@ -185,12 +293,7 @@ class IntegratedSearch:
             
             if code:
                 # 결과코드로 관련 FAQ 검색
-                all_faqs = self.faq_system.get_all_faqs()
-                related_faqs = []
-                
-                for faq in all_faqs:
-                    if code in faq.get('related_codes', []):
-                        related_faqs.append(faq)
+                related_faqs = list(self.faq_system.get_faqs_by_code(code))
                 
                 results['related_faqs'] = related_faqs
                 results['message'] += f'결과코드 {code}와 관련된 FAQ {len(related_faqs)}개를 찾았습니다. '
@@ -240,19 +343,18 @@ class IntegratedSearch:
             
             if search_type in ['all', 'code']:
                 # 결과코드 카테고리 검색
-                all_codes = self.rag_system.get_all_codes()
-                filtered_codes = [code for code in all_codes if code.get('category') == category]
+                filtered_codes = self._get_codes_by_category(category)
                 
                 if query:
-                    # 쿼리가 있으면 필터링된 결과에서 검색
-                    filtered_results = []
-                    for code in filtered_codes:
-                        if (query.lower() in code.get('code', '').lower() or 
-                            query.lower() in code.get('description', '').lower()):
-                            filtered_results.append(code)
-                    results['code_results']['results'] = filtered_results
+                    # 쿼리가 있으면 필터링된 결과에서 검색 (쿼리 소문자 변환은 한 번만)
+                    query_lower = query.lower()
+                    results['code_results']['results'] = [
+                        code for code in filtered_codes
+                        if (query_lower in code.get('code', '').lower() or
+                            query_lower in code.get('description', '').lower())
+                    ]
                 else:
-                    results['code_results']['results'] = filtered_codes
+                    results['code_results']['results'] = list(filtered_codes)
                 
                 results['code_results']['count'] = len(results['code_results']['results'])
             
@@ -280,6 +382,44 @@ class IntegratedSearch:
                 'message': f'카테고리별 검색 중 오류가 발생했습니다: {str(e)}'
             }
     
+    def _get_codes_by_category(self, category: str) -> List[Dict]:
+        """카테고리별 결과코드 목록 (색인은 데이터 변경 후 처음 조회 시 한 번만 구축, 수정하지 말 것)"""
+        with self._views_lock:
+            version = self.rag_system.data_version
+            if self._codes_by_category is None or self._codes_by_category_version != version:
+                codes_by_category = {}
+                for code in self.rag_system.get_all_codes():
+                    codes_by_category.setdefault(code.get('category'), []).append(code)
+                self._codes_by_category = codes_by_category
+                self._codes_by_category_version = version
+            return self._codes_by_category.get(category, [])
+    
+    def _get_suggestion_codes(self) -> List[tuple]:
+        """(코드, 설명, 소문자 코드, 소문자 설명) 목록 (결과코드 데이터가 바뀐 뒤 처음 호출 시 다시 구축)"""
+        with self._views_lock:
+            version = self.rag_system.data_version
+            if self._suggestion_codes is None or self._suggestion_codes_version != version:
+                suggestion_codes = []
+                for code in self.rag_system.get_all_codes():
+                    code_str = code.get('code', '')
+                    description = code.get('description', '')
+                    suggestion_codes.append((code_str, description, code_str.lower(), description.lower()))
+                self._suggestion_codes = suggestion_codes
+                self._suggestion_codes_version = version
+            return self._suggestion_codes
+    
+    def _get_suggestion_faqs(self) -> List[tuple]:
+        """(질문, 소문자 질문) 목록 (FAQ 데이터가 바뀐 뒤 처음 호출 시 다시 구축)"""
+        with self._views_lock:
+            version = self.faq_system.data_version
+            if self._suggestion_faqs is None or self._suggestion_faqs_version != version:
+                self._suggestion_faqs = [
+                    (faq.get('question', ''), faq.get('question', '').lower())
+                    for faq in self.faq_system.get_all_faqs()
+                ]
+                self._suggestion_faqs_version = version
+            return self._suggestion_faqs
+    
     def get_search_suggestions(self, query: str, max_suggestions: int = 5) -> List[str]:
         """
         검색 제안 생성
@@ -296,13 +436,8 @@ class IntegratedSearch:
             query_lower = query.lower()
             
             # 결과코드 제안
-            all_codes = self.rag_system.get_all_codes()
-            for code in all_codes:
-                code_str = code.get('code', '')
-                description = code.get('description', '')
-                
-                if (query_lower in code_str.lower() or 
-                    query_lower in description.lower()):
+            for code_str, description, code_lower, description_lower in self._get_suggestion_codes():
+                if query_lower in code_lower or query_lower in description_lower:
                     suggestions.append(f"결과코드 {code_str}: {description}")
                     
                     if len(suggestions) >= max_suggestions:
@@ -310,10 +445,8 @@ class IntegratedSearch:
             
             # FAQ 제안
             if len(suggestions) < max_suggestions:
-                all_faqs = self.faq_system.get_all_faqs()
-                for faq in all_faqs:
-                    question = faq.get('question', '')
-                    if query_lower in question.lower():
+                for question, question_lower in self._get_suggestion_faqs():
+                    if query_lower in question_lower:
                         suggestions.append(f"FAQ: {question}")
                         
                         if len(suggestions) >= max_suggestions:
@@ -338,24 +471,20 @@ class IntegratedSearch:
         try:
             # 결과코드 통계
             all_codes = self.rag_system.get_all_codes()
-            code_categories = {}
-            for code in all_codes:
-                category = code.get('category', '기타')
-                code_categories[category] = code_categories.get(category, 0) + 1
+            code_categories = dict(Counter(code.get('category', '기타') for code in all_codes))
             
             # FAQ 통계
             faq_stats = self.faq_system.get_faq_statistics()
             
-            # 인기 검색어 (우선순위 기반)
-            popular_faqs = []
-            all_faqs = self.faq_system.get_all_faqs()
-            for faq in all_faqs:
-                if faq.get('priority', 0) >= 2:  # 우선순위 2 이상
-                    popular_faqs.append(faq['question'])
+            # 인기 검색어 (우선순위 2 이상, limit개를 채우면 중단)
+            popular_faqs = list(islice(
+                (faq['question'] for faq in self.faq_system.get_all_faqs() if faq.get('priority', 0) >= 2),
+                limit
+            ))
             
             return {
                 'success': True,
-                'popular_faq_questions': popular_faqs[:limit],
+                'popular_faq_questions': popular_faqs,
                 'code_categories': code_categories,
                 'faq_categories': faq_stats.get('categories', {}),
                 'total_codes': len(all_codes),
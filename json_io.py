@@ -0,0 +1,24 @@
+"""
+JSON 파일 입출력 헬퍼
+orjson이 설치되어 있으면 C 구현으로 파싱/직렬화하고, 없으면 표준 json 사용
+"""
+import json
+
+try:
+    import orjson
+
+    def json_loads(data: bytes):
+        """UTF-8 JSON 바이트 파싱"""
+        return orjson.loads(data)
+
+    def json_dumps(obj) -> bytes:
+        """들여쓰기 2칸, 한글을 그대로 둔 UTF-8 JSON 바이트로 직렬화"""
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2)
+except ImportError:
+    def json_loads(data: bytes):
+        """UTF-8 JSON 바이트 파싱"""
+        return json.loads(data)
+
+    def json_dumps(obj) -> bytes:
+        """들여쓰기 2칸, 한글을 그대로 둔 UTF-8 JSON 바이트로 직렬화"""
+        return json.dumps(obj, ensure_ascii=False, indent=2).encode('utf-8')
@@ -2,15 +2,33 @@
 PDF 파싱 및 결과코드 추출 모듈
 """
 import io
+import os
 import re
+import sys
 import json
-from typing import List
+import logging
+from typing import List, Union
 import PyPDF2
 import pdfplumber
 import fitz  # PyMuPDF
 from dataclasses import dataclass
 
-@dataclass
+# 파싱 진행/디버깅 로그 (UI에서 세션별로 수집해 표시, 메시지는 lazy 포맷)
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+# 신뢰도 계산용 정규식 (호출마다 키워드별 부분 문자열 검사를 반복하지 않도록 미리 컴파일)
+HANGUL_PATTERN = re.compile(r'[가-힣]')
+CONFIDENCE_KEYWORD_PATTERN = re.compile('오류|에러|실패|장애|인증|권한|네트워크|시스템')
+# 줄/탭 단위 항목마다 "코드 [:] 설명"을 뽑는 페이지 전체 패턴 (항목은 줄 시작 또는 탭 뒤에서 시작, 설명은 탭/줄바꿈 전까지)
+CODE_ENTRY_PATTERN = re.compile(r'(?m)(?:^|\t)[^\S\t\n]*(\d+)[^\S\t\n]*[:：]?[^\S\t\n]*([^\t\n]*\S)')
+# 디버깅 시 첫 페이지에서 코드로 보이는 숫자 탐색용
+_DEBUG_NUMBER_RE = re.compile(r'\d{4,5}')
+
+# 추출 코드가 많을 때 인스턴스별 __dict__를 두지 않도록 slots 사용 (dataclass slots 옵션은 Python 3.10 이상)
+_DATACLASS_SLOTS = {'slots': True} if sys.version_info >= (3, 10) else {}
+
+@dataclass(frozen=True, **_DATACLASS_SLOTS)
 class ExtractedCode:
     """추출된 결과코드 정보"""
     code: str
@@ -18,22 +36,22 @@ class ExtractedCode:
     page_number: int
     confidence: float = 0.0
 
+# 파일 경로(디스크에서 직접 열기) 또는 PDF 바이트
+PDFSource = Union[str, bytes]
+
+def _open_stream(source: PDFSource):
+    """pdfplumber/PyPDF2에 넘길 입력 (경로는 그대로, 바이트는 복사 없이 BytesIO로 감쌈)"""
+    return source if isinstance(source, str) else io.BytesIO(source)
+
 class PDFParser:
     """PDF 파싱 및 결과코드 추출 클래스"""
     
-    def __init__(self):
-        """PDF 파서 초기화"""
-        # 코드와 설명을 동시에 뽑는 단일 패턴
-        self.code_patterns = [
-            r'(\d+)\s*[:：]?\s*(.+)',  # "4007 : 설명" 또는 "4007 설명"
-        ]
-    
     def parse_pdf(self, pdf_file) -> List[ExtractedCode]:
         """
         PDF 파일에서 결과코드 추출
         
         Args:
-            pdf_file: 업로드된 PDF 파일 (Streamlit UploadedFile)
+            pdf_file: 업로드된 PDF 파일 (Streamlit UploadedFile) 또는 PDF 파일 경로
             
         Returns:
             추출된 결과코드 리스트
@@ -41,25 +59,28 @@ class PDFParser:
         extracted_codes = []
         
         try:
-            # PDF 파일을 바이트로 읽기
-            pdf_bytes = pdf_file.read()
+            # 경로는 각 라이브러리가 파일에서 직접 읽고, 업로드 파일은 한 번만 바이트로 읽어 모든 방법에서 공유
+            if isinstance(pdf_file, (str, os.PathLike)):
+                pdf_source = os.fspath(pdf_file)
+            else:
+                pdf_source = pdf_file.read()
             
-            # 여러 방법으로 PDF 파싱 시도
+            # 여러 방법으로 PDF 파싱 시도 (가장 빠른 PyMuPDF 우선, 코드가 없을 때만 다음 방법으로)
             methods = [
-                self._parse_with_pdfplumber,
                 self._parse_with_pymupdf,
+                self._parse_with_pdfplumber,
                 self._parse_with_pypdf2
             ]
             
             for method in methods:
                 try:
-                    codes = method(pdf_bytes)
+                    codes = method(pdf_source)
                     if codes:
                         extracted_codes.extend(codes)
-                        print(f"PDF 파싱 성공: {len(codes)}개 코드 추출")
+                        logger.info("PDF 파싱 성공: %d개 코드 추출", len(codes))
                         break
                 except Exception as e:
-                    print(f"PDF 파싱 방법 실패: {e}")
+                    logger.warning("PDF 파싱 방법 실패: %s", e)
                     continue
             
             # 중복 제거 및 정리
@@ -67,19 +88,19 @@ class PDFParser:
             
             # 디버깅 정보 출력
             if not extracted_codes:
-                print("PDF에서 결과코드를 찾을 수 없습니다.")
-                self._debug_pdf_content(pdf_bytes)
+                logger.warning("PDF에서 결과코드를 찾을 수 없습니다.")
+                self._debug_pdf_content(pdf_source)
             
         except Exception as e:
-            print(f"PDF 파싱 오류: {e}")
+            logger.error("PDF 파싱 오류: %s", e)
         
         return extracted_codes
     
-    def _parse_with_pdfplumber(self, pdf_bytes: bytes) -> List[ExtractedCode]:
+    def _parse_with_pdfplumber(self, pdf_source: PDFSource) -> List[ExtractedCode]:
         """pdfplumber를 사용한 PDF 파싱"""
         codes = []
         
-        with pdfplumber.open(io.BytesIO(pdf_bytes)) as pdf:
+        with pdfplumber.open(_open_stream(pdf_source)) as pdf:
             for page_num, page in enumerate(pdf.pages, 1):
                 text = page.extract_text()
                 if text:
@@ -88,26 +109,28 @@ class PDFParser:
         
         return codes
     
-    def _parse_with_pymupdf(self, pdf_bytes: bytes) -> List[ExtractedCode]:
+    def _parse_with_pymupdf(self, pdf_source: PDFSource) -> List[ExtractedCode]:
         """PyMuPDF를 사용한 PDF 파싱"""
         codes = []
         
-        doc = fitz.open(stream=pdf_bytes, filetype="pdf")
-        for page_num in range(len(doc)):
-            page = doc[page_num]
-            text = page.get_text()
-            if text:
-                page_codes = self._extract_codes_from_text(text, page_num + 1)
-                codes.extend(page_codes)
-        doc.close()
+        if isinstance(pdf_source, str):
+            doc = fitz.open(pdf_source)
+        else:
+            doc = fitz.open(stream=pdf_source, filetype="pdf")
+        with doc:
+            for page_num, page in enumerate(doc, 1):
+                text = page.get_text()
+                if text:
+                    page_codes = self._extract_codes_from_text(text, page_num)
+                    codes.extend(page_codes)
         
         return codes
     
-    def _parse_with_pypdf2(self, pdf_bytes: bytes) -> List[ExtractedCode]:
+    def _parse_with_pypdf2(self, pdf_source: PDFSource) -> List[ExtractedCode]:
         """PyPDF2를 사용한 PDF 파싱"""
         codes = []
         
-        pdf_reader = PyPDF2.PdfReader(io.BytesIO(pdf_bytes))
+        pdf_reader = PyPDF2.PdfReader(_open_stream(pdf_source))
         for page_num, page in enumerate(pdf_reader.pages, 1):
             text = page.extract_text()
             if text:
@@ -117,40 +140,25 @@ class PDFParser:
         return codes
     
     def _extract_codes_from_text(self, text: str, page_num: int) -> List[ExtractedCode]:
-        """텍스트에서 결과코드 추출"""
+        """텍스트에서 결과코드 추출 ("4007 : 설명" 또는 "4007 설명", 한 줄에 탭으로 여러 항목이 붙어 있을 수 있음)"""
         codes = []
-        lines = text.split('\n')
         
-        print(f"페이지 {page_num}에서 {len(lines)}줄 처리 중...")
-        
-        for line_num, line in enumerate(lines):
-            line = line.strip()
-            if not line:
-                continue
-
-            # PDF 줄에 여러 코드가 붙어 있을 수 있어서 탭 기준 분리
-            parts = line.split("\t")
-            for part in parts:
-                part = part.strip()
-                if not part:
-                    continue
-
-                # 각 패턴으로 코드 추출 시도
-                for pattern_idx, pattern in enumerate(self.code_patterns):
-                    match = re.match(pattern, part)
-                    if match:
-                        code, description = match.groups()
-                        if code and description:
-                            confidence = self._calculate_confidence(code, description, part)
-                            codes.append(ExtractedCode(
-                                code=code,
-                                description=description.strip(),
-                                page_number=page_num,
-                                confidence=confidence
-                            ))
-                            print(f"코드 추출: {code} - {description[:30]}... (패턴 {pattern_idx+1})")
-        
-        print(f"페이지 {page_num}에서 {len(codes)}개 코드 추출")
+        logger.info("페이지 %d에서 %d줄 처리 중...", page_num, text.count('\n') + 1)
+        
+        # 줄/탭 분리와 항목별 매칭을 파이썬 루프 대신 페이지 전체에 대한 한 번의 정규식 스캔으로 처리
+        for match in CODE_ENTRY_PATTERN.finditer(text):
+            code, description = match.groups()
+            description = description.strip()
+            confidence = self._calculate_confidence(code, description, match.group(0))
+            codes.append(ExtractedCode(
+                code=code,
+                description=description,
+                page_number=page_num,
+                confidence=confidence
+            ))
+            logger.debug("코드 추출: %s - %.30s...", code, description)
+        
+        logger.info("페이지 %d에서 %d개 코드 추출", page_num, len(codes))
         return codes
     
     def _calculate_confidence(self, code: str, description: str, line: str) -> float:
@@ -161,12 +169,12 @@ class PDFParser:
             confidence += 0.2
         if len(description) > 5:
             confidence += 0.2
-        if re.search(r'[가-힣]', description):
-            confidence += 0.1
-        
-        keywords = ['오류', '에러', '실패', '장애', '인증', '권한', '네트워크', '시스템']
-        if any(keyword in description for keyword in keywords):
+        if HANGUL_PATTERN.search(description):
             confidence += 0.1
+            
+            # 키워드는 모두 한글이므로 한글이 있을 때만 한 번의 정규식 검색으로 확인
+            if CONFIDENCE_KEYWORD_PATTERN.search(description):
+                confidence += 0.1
         
         return min(confidence, 1.0)
     
@@ -215,25 +223,22 @@ class PDFParser:
         else:
             return '기타'
     
-    def _debug_pdf_content(self, pdf_bytes: bytes):
+    def _debug_pdf_content(self, pdf_source: PDFSource):
         """PDF 내용 디버깅"""
         try:
-            with pdfplumber.open(io.BytesIO(pdf_bytes)) as pdf:
-                print(f"PDF 페이지 수: {len(pdf.pages)}")
+            with pdfplumber.open(_open_stream(pdf_source)) as pdf:
+                logger.info("PDF 페이지 수: %d", len(pdf.pages))
                 if pdf.pages:
                     first_page_text = pdf.pages[0].extract_text()
                     if first_page_text:
-                        print("첫 페이지 텍스트 샘플:")
-                        print("-" * 50)
-                        print(first_page_text[:500])
-                        print("-" * 50)
+                        logger.info("첫 페이지 텍스트 샘플:\n%s\n%.500s\n%s", "-" * 50, first_page_text, "-" * 50)
                         
-                        numbers = re.findall(r'\d{4,5}', first_page_text)
+                        numbers = _DEBUG_NUMBER_RE.findall(first_page_text)
                         if numbers:
-                            print(f"발견된 코드 숫자: {numbers[:10]}")
+                            logger.info("발견된 코드 숫자: %s", numbers[:10])
                         else:
-                            print("코드 숫자를 찾지 못함")
+                            logger.info("코드 숫자를 찾지 못함")
                     else:
-                        print("첫 페이지 텍스트 없음")
+                        logger.info("첫 페이지 텍스트 없음")
         except Exception as e:
-            print(f"PDF 디버깅 오류: {e}")
+            logger.error("PDF 디버깅 오류: %s", e)
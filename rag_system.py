@@ -2,9 +2,15 @@
 RAG 시스템 메인 로직
 규칙에 따른 결과코드 검색 및 설명 반환
 """
-from hybrid_search import HybridSearch
-from pdf_parser import PDFParser
+import hashlib
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from hybrid_search import HybridSearch, NUMBER_PATTERN
+from pdf_parser import PDFParser, ExtractedCode
 from excel_parser import ExcelParser
+from json_io import json_dumps
 from typing import Dict, List
 import config
 
@@ -14,6 +20,13 @@ class RAGSystem:
         self.hybrid_search = HybridSearch()
         self.pdf_parser = PDFParser()
         self.excel_parser = ExcelParser()
+        
+        # 데이터 변경 잠금 (st.cache_resource로 세션 간 공유되므로 중복 확인-추가, 색인 갱신, 파일 저장을 한 단위로 직렬화)
+        self._lock = threading.RLock()
+        
+        # PDF 내용 해시 -> 추출 결과 (미리보기 후 같은 파일을 업로드할 때 다시 파싱하지 않도록 최근 몇 개만 보관)
+        self._pdf_parse_cache = OrderedDict()
+        self._pdf_parse_cache_lock = threading.Lock()
     
     def process_query(self, query: str) -> Dict:
         """
@@ -47,8 +60,7 @@ class RAGSystem:
         processed_query = self._preprocess_query(query)
         
         # 코드 추출 (음수 기호 포함)
-        import re
-        code_match = re.search(r'(-?\d+)', processed_query)
+        code_match = NUMBER_PATTERN.search(processed_query)
         if not code_match:
             return {
                 'code': query,
@@ -57,16 +69,16 @@ class RAGSystem:
                 'message': '코드를 찾을 수 없습니다.'
             }
         
-        target_code = code_match.group(1)
+        target_code = code_match.group(0)
         
-        # 해당 코드의 모든 설명 찾기
-        matching_codes = []
-        for item in self.hybrid_search.data:
-            if item['code'] == target_code:
-                matching_codes.append({
-                    'description': item['description'],
-                    'category': item.get('category', '기타')
-                })
+        # 해당 코드의 모든 설명 찾기 (코드 색인 조회)
+        matching_codes = [
+            {
+                'description': item['description'],
+                'category': item.get('category', '기타')
+            }
+            for item in self.hybrid_search.code_index.get(target_code, [])
+        ]
         
         if matching_codes:
             return {
@@ -90,28 +102,54 @@ class RAGSystem:
         # "결과코드 4007" 형태로 정규화
         if not query.startswith("결과코드"):
             # 숫자가 포함된 경우 "결과코드" 추가 (음수 기호 포함)
-            import re
-            if re.search(r'-?\d+', query):
+            if NUMBER_PATTERN.search(query):
                 query = f"결과코드 {query}"
         
         return query
     
-    def get_detailed_results(self, query: str, top_k: int = None) -> List[Dict]:
+    def embedding_text(self, query: str) -> str:
+        """
+        get_detailed_results가 임베딩하는 쿼리 문자열
+        
+        RAG/Hybrid Search 전처리("결과코드 " 접두어, " 설명" 확장)를 모두 거친 문자열이므로
+        미리 계산하는 query_embedding은 원래 쿼리가 아니라 이 문자열로 인코딩해야 함
+        """
+        return self.hybrid_search.embedding_text(self._preprocess_query(query))
+    
+    def get_detailed_results(self, query: str, top_k: int = None, query_embedding=None) -> List[Dict]:
         """
         상세 검색 결과 반환 (디버깅 및 분석용)
         
         Args:
             query: 검색 쿼리
             top_k: 반환할 상위 결과 수
+            query_embedding: 미리 계산된 쿼리 임베딩 (선택, embedding_text(query)의 임베딩)
             
         Returns:
             상세 검색 결과 리스트
         """
         processed_query = self._preprocess_query(query)
-        return self.hybrid_search.search(processed_query, top_k)
+        return self.hybrid_search.search(processed_query, top_k, query_embedding)
+    
+    def lookup_by_code(self, code: str) -> List[Dict]:
+        """
+        결과코드 번호로 직접 조회 (Hybrid Search/임베딩 계산 생략)
+        
+        Args:
+            code: 결과코드 (예: "4202")
+            
+        Returns:
+            get_detailed_results와 같은 형식의 결과 리스트 (중복 코드 포함, 없으면 빈 리스트)
+        """
+        return self.hybrid_search.lookup_code(code)
+    
+    @property
+    def data_version(self) -> int:
+        """결과코드 데이터 버전 (추가/삭제/수정 시 증가)"""
+        return self.hybrid_search.data_version
     
     def get_all_codes(self) -> List[Dict]:
-        """모든 결과코드 반환"""
+        """모든 결과코드 반환 (복사 없이 내부 리스트를 그대로 반환하므로 호출 측에서 수정하지 말 것)"""
         return self.hybrid_search.data
     
     def delete_code(self, code: str) -> bool:
@@ -125,24 +163,17 @@ class RAGSystem:
             삭제 성공 여부
         """
         try:
-            # 코드 찾기
-            original_length = len(self.hybrid_search.data)
-            self.hybrid_search.data = [
-                item for item in self.hybrid_search.data 
-                if item['code'] != code
-            ]
-            
-            # 삭제되었는지 확인
-            if len(self.hybrid_search.data) < original_length:
-                # 인덱스 재구축
-                self.hybrid_search.bm25 = self.hybrid_search._build_bm25()
-                self.hybrid_search.embeddings = self.hybrid_search._build_embeddings()
+            # 코드 삭제 (남은 항목의 임베딩은 재사용)
+            with self._lock:
+                deleted_count = self.hybrid_search.remove_items(lambda item: item['code'] == code)
                 
-                # 데이터 저장
-                self.save_data()
-                return True
-            else:
-                return False
+                # 삭제되었는지 확인
+                if deleted_count > 0:
+                    # 데이터 저장
+                    self.save_data()
+                    return True
+                else:
+                    return False
                 
         except Exception as e:
             print(f"코드 삭제 실패: {e}")
@@ -157,15 +188,17 @@ class RAGSystem:
         """
         try:
             # 데이터 삭제
-            self.hybrid_search.data = []
-            
-            # 빈 인덱스 생성 (데이터가 비어있어도 안전하게 처리)
-            self.hybrid_search.bm25 = self.hybrid_search._build_bm25()
-            self.hybrid_search.embeddings = self.hybrid_search._build_embeddings()
-            
-            # 데이터 저장
-            self.save_data()
-            return True
+            with self._lock:
+                # 데이터 교체와 색인 재구축 사이에 검색이 끼어들지 않도록 검색 잠금도 함께 보유
+                with self.hybrid_search.lock:
+                    self.hybrid_search.data = []
+                    
+                    # 빈 인덱스 생성 (데이터가 비어있어도 안전하게 처리)
+                    self.hybrid_search.rebuild_indexes()
+                
+                # 데이터 저장
+                self.save_data()
+                return True
             
         except Exception as e:
             print(f"전체 데이터 삭제 실패: {e}")
@@ -182,23 +215,17 @@ class RAGSystem:
             삭제된 코드 수
         """
         try:
-            original_length = len(self.hybrid_search.data)
-            self.hybrid_search.data = [
-                item for item in self.hybrid_search.data 
-                if item.get('category', '기타') != category
-            ]
-            
-            deleted_count = original_length - len(self.hybrid_search.data)
-            
-            if deleted_count > 0:
-                # 인덱스 재구축 (데이터가 비어있어도 안전하게 처리)
-                self.hybrid_search.bm25 = self.hybrid_search._build_bm25()
-                self.hybrid_search.embeddings = self.hybrid_search._build_embeddings()
+            # 한 번의 필터링으로 삭제 (남은 항목의 임베딩은 재사용, 색인 갱신 1회)
+            with self._lock:
+                deleted_count = self.hybrid_search.remove_items(
+                    lambda item: item.get('category', '기타') == category
+                )
                 
-                # 데이터 저장
-                self.save_data()
-            
-            return deleted_count
+                if deleted_count > 0:
+                    # 데이터 저장
+                    self.save_data()
+                
+                return deleted_count
             
         except Exception as e:
             print(f"카테고리별 삭제 실패: {e}")
@@ -226,31 +253,67 @@ class RAGSystem:
             }
             
             # 중복 체크 (allow_duplicate가 False인 경우만)
-            if not allow_duplicate:
-                for item in self.hybrid_search.data:
-                    if item['code'] == code:
-                        return False
-            
-            self.hybrid_search.data.append(new_code)
-            
-            # 인덱스 재구축
-            self.hybrid_search.bm25 = self.hybrid_search._build_bm25()
-            self.hybrid_search.embeddings = self.hybrid_search._build_embeddings()
-            
-            return True
+            with self._lock:
+                if not allow_duplicate and code in self.hybrid_search.code_index:
+                    return False
+                
+                # 새 항목만 임베딩해 이어 붙임 (전체 색인 재구축 없음, 저장은 호출 측에서 save_data로)
+                self.hybrid_search.add_items([new_code])
+                
+                return True
         except Exception as e:
             print(f"코드 추가 실패: {e}")
             return False
     
+    def add_codes_bulk(self, new_codes: List[Dict], batch_size: int = None, allow_duplicate: bool = True) -> int:
+        """
+        여러 결과코드를 한 번에 추가 (임베딩 배치 인코딩, 색인 갱신/저장 1회)
+        
+        여러 건을 추가할 때는 add_code를 반복 호출하지 말고 이 메서드를 사용
+        
+        Args:
+            new_codes: 추가할 결과코드 리스트 (code, description, category)
+            batch_size: 임베딩 인코딩 배치 크기
+            allow_duplicate: False면 기존 코드 및 같은 목록 안에서 앞서 나온 코드와 중복되는 항목 제외
+            
+        Returns:
+            추가된 코드 수
+        """
+        with self._lock:
+            if not allow_duplicate:
+                existing_codes = set(self.hybrid_search.code_index)
+                unique_codes = []
+                for new_code in new_codes:
+                    if new_code['code'] not in existing_codes:
+                        existing_codes.add(new_code['code'])
+                        unique_codes.append(new_code)
+                new_codes = unique_codes
+            
+            if not new_codes:
+                return 0
+            
+            self.hybrid_search.add_items(new_codes, batch_size=batch_size)
+            self.save_data()
+            return len(new_codes)
+    
     def save_data(self) -> bool:
         """데이터 저장"""
+        temp_file = None
         try:
-            import json
-            with open(config.DATA_FILE, 'w', encoding='utf-8') as f:
-                json.dump(self.hybrid_search.data, f, ensure_ascii=False, indent=2)
+            # 직렬화 후 같은 폴더의 고유한 임시 파일에 한 번에 쓰고 교체
+            # (orjson이 있으면 사용, 저장 중 중단되어도 기존 파일 유지, 세션마다 임시 파일이 달라 서로 덮어쓰지 않음)
+            with self._lock:
+                with tempfile.NamedTemporaryFile(dir=os.path.dirname(config.DATA_FILE) or '.', suffix='.tmp', delete=False) as f:
+                    temp_file = f.name
+                    f.write(json_dumps(self.hybrid_search.data))
+                    f.flush()
+                    os.fsync(f.fileno())
+                os.replace(temp_file, config.DATA_FILE)
             return True
         except Exception as e:
             print(f"데이터 저장 실패: {e}")
+            if temp_file and os.path.exists(temp_file):
+                os.remove(temp_file)
             return False
     
     def upload_pdf(self, pdf_file, allow_duplicate: bool = False, manual_category: str = None) -> Dict:
@@ -266,8 +329,8 @@ class RAGSystem:
             업로드 결과 정보
         """
         try:
-            # PDF에서 결과코드 추출
-            extracted_codes = self.pdf_parser.parse_pdf(pdf_file)
+            # PDF에서 결과코드 추출 (미리보기에서 파싱한 파일이면 캐시 재사용)
+            extracted_codes = self._parse_pdf_cached(pdf_file)
             
             if not extracted_codes:
                 return {
@@ -276,36 +339,45 @@ class RAGSystem:
                     'extracted_count': 0
                 }
             
-            # 기존 데이터에 추가
-            added_count = 0
-            duplicate_count = 0
-            
-            for code in extracted_codes:
-                # 중복 체크 (allow_duplicate가 False인 경우만)
-                is_duplicate = False
-                if not allow_duplicate:
-                    is_duplicate = any(
-                        item['code'] == code.code for item in self.hybrid_search.data
-                    )
+            # 중복 확인부터 추가/저장까지 데이터 변경 잠금 안에서 수행 (동시에 같은 파일을 올려도 중복 추가되지 않고
+            # duplicate_count/added_codes가 실제 추가된 내용과 일치)
+            with self._lock:
+                # 기존 데이터에 추가할 신규 코드 수집
+                new_codes = []
+                extracted_info = []  # 추출된 전체 코드 정보 (결과 표시용, 같은 순회에서 생성)
+                added_info = []
+                duplicate_count = 0
+                existing_codes = set(self.hybrid_search.code_index)  # 이번 업로드에서 추가되는 코드도 포함
                 
-                if not is_duplicate:
-                    # 수동 선택된 카테고리 사용
-                    new_code = {
+                for code in extracted_codes:
+                    code_info = {
                         'code': code.code,
                         'description': code.description,
-                        'category': manual_category or '기타'
+                        'page': code.page_number,
+                        'confidence': code.confidence
                     }
-                    self.hybrid_search.data.append(new_code)
-                    added_count += 1
-                else:
-                    duplicate_count += 1
-            
-            # 인덱스 재구축
-            self.hybrid_search.bm25 = self.hybrid_search._build_bm25()
-            self.hybrid_search.embeddings = self.hybrid_search._build_embeddings()
-            
-            # 데이터 저장
-            self.save_data()
+                    extracted_info.append(code_info)
+                    
+                    # 중복 체크 (allow_duplicate가 False인 경우만)
+                    is_duplicate = False
+                    if not allow_duplicate:
+                        is_duplicate = code.code in existing_codes
+                    
+                    if not is_duplicate:
+                        # 수동 선택된 카테고리 사용
+                        new_code = {
+                            'code': code.code,
+                            'description': code.description,
+                            'category': manual_category or '기타'
+                        }
+                        new_codes.append(new_code)
+                        added_info.append(code_info)
+                        existing_codes.add(code.code)
+                    else:
+                        duplicate_count += 1
+                
+                # 신규 코드 일괄 추가 (새 항목만 임베딩, 색인 갱신/저장 1회)
+                added_count = self.add_codes_bulk(new_codes)
             
             return {
                 'success': True,
@@ -313,14 +385,8 @@ class RAGSystem:
                 'extracted_count': len(extracted_codes),
                 'added_count': added_count,
                 'duplicate_count': duplicate_count,
-                'extracted_codes': [
-                    {
-                        'code': code.code,
-                        'description': code.description,
-                        'page': code.page_number,
-                        'confidence': code.confidence
-                    } for code in extracted_codes
-                ]
+                'extracted_codes': extracted_info,
+                'added_codes': added_info
             }
             
         except Exception as e:
@@ -330,6 +396,39 @@ class RAGSystem:
                 'extracted_count': 0
             }
     
+    def _parse_pdf_cached(self, pdf_file) -> List[ExtractedCode]:
+        """
+        PDF 결과코드 추출 (파일 내용 해시별로 최근 결과를 캐시)
+        
+        Args:
+            pdf_file: Streamlit UploadedFile 객체 (경로나 되감을 수 없는 입력은 캐시 없이 파싱)
+            
+        Returns:
+            추출된 결과코드 리스트
+        """
+        if isinstance(pdf_file, (str, os.PathLike)) or not hasattr(pdf_file, 'seek'):
+            return self.pdf_parser.parse_pdf(pdf_file)
+        
+        pdf_file.seek(0)
+        cache_key = hashlib.blake2b(pdf_file.read(), digest_size=16).digest()
+        pdf_file.seek(0)
+        
+        with self._pdf_parse_cache_lock:
+            extracted_codes = self._pdf_parse_cache.get(cache_key)
+            if extracted_codes is not None:
+                self._pdf_parse_cache.move_to_end(cache_key)
+                return list(extracted_codes)
+        
+        extracted_codes = self.pdf_parser.parse_pdf(pdf_file)
+        
+        # 추출 실패(빈 결과)는 다시 시도할 수 있도록 캐시하지 않음
+        if extracted_codes:
+            with self._pdf_parse_cache_lock:
+                self._pdf_parse_cache[cache_key] = extracted_codes
+                while len(self._pdf_parse_cache) > config.PDF_PARSE_CACHE_SIZE:
+                    self._pdf_parse_cache.popitem(last=False)
+        return list(extracted_codes)
+    
     def get_pdf_preview(self, pdf_file, allow_duplicate: bool = False, manual_category: str = None) -> List[Dict]:
         """
         PDF 미리보기 (추출될 결과코드 미리보기)
@@ -343,15 +442,15 @@ class RAGSystem:
             추출될 결과코드 리스트
         """
         try:
-            extracted_codes = self.pdf_parser.parse_pdf(pdf_file)
+            extracted_codes = self._parse_pdf_cached(pdf_file)
             
             preview_data = []
+            existing_codes = set(self.hybrid_search.code_index)  # upload_pdf와 같이 같은 파일 안의 앞선 코드도 중복으로 표시
             for code in extracted_codes:
                 is_duplicate = False
                 if not allow_duplicate:
-                    is_duplicate = any(
-                        item['code'] == code.code for item in self.hybrid_search.data
-                    )
+                    is_duplicate = code.code in existing_codes
+                    existing_codes.add(code.code)
                 
                 # 수동 선택된 카테고리 사용
                 category = manual_category or '기타'
@@ -359,10 +458,12 @@ class RAGSystem:
                 preview_data.append({
                     'code': code.code,
                     'description': code.description,
+                    'description_short': self._shorten_description(code.description),
                     'page': code.page_number,
                     'confidence': code.confidence,
                     'category': category,
-                    'is_duplicate': is_duplicate
+                    'is_duplicate': is_duplicate,
+                    'status_label': self._preview_status_label(is_duplicate)
                 })
             
             return preview_data
@@ -394,41 +495,50 @@ class RAGSystem:
                     'extracted_count': 0
                 }
             
-            # 기존 데이터에 추가
-            added_count = 0
-            duplicate_count = 0
-            
-            for code in extracted_codes:
-                # 중복 체크 (allow_duplicate가 False인 경우만)
-                is_duplicate = False
-                if not allow_duplicate:
-                    is_duplicate = any(
-                        item['code'] == code.code for item in self.hybrid_search.data
-                    )
+            # 중복 확인부터 추가/저장까지 데이터 변경 잠금 안에서 수행 (동시에 같은 파일을 올려도 중복 추가되지 않고
+            # duplicate_count/added_codes가 실제 추가된 내용과 일치)
+            with self._lock:
+                # 기존 데이터에 추가할 신규 코드 수집
+                new_codes = []
+                extracted_info = []  # 추출된 전체 코드 정보 (결과 표시용, 같은 순회에서 생성)
+                added_info = []
+                duplicate_count = 0
+                existing_codes = set(self.hybrid_search.code_index)  # 이번 업로드에서 추가되는 코드도 포함
                 
-                if not is_duplicate:
-                    # 카테고리 결정
-                    if manual_category:
-                        category = manual_category
-                    else:
-                        category = code.category
-                    
-                    new_code = {
+                for code in extracted_codes:
+                    code_info = {
                         'code': code.code,
                         'description': code.description,
-                        'category': category
+                        'category': code.category,
+                        'confidence': code.confidence
                     }
-                    self.hybrid_search.data.append(new_code)
-                    added_count += 1
-                else:
-                    duplicate_count += 1
-            
-            # 인덱스 재구축
-            self.hybrid_search.bm25 = self.hybrid_search._build_bm25()
-            self.hybrid_search.embeddings = self.hybrid_search._build_embeddings()
-            
-            # 데이터 저장
-            self.save_data()
+                    extracted_info.append(code_info)
+                    
+                    # 중복 체크 (allow_duplicate가 False인 경우만)
+                    is_duplicate = False
+                    if not allow_duplicate:
+                        is_duplicate = code.code in existing_codes
+                    
+                    if not is_duplicate:
+                        # 카테고리 결정
+                        if manual_category:
+                            category = manual_category
+                        else:
+                            category = code.category
+                        
+                        new_code = {
+                            'code': code.code,
+                            'description': code.description,
+                            'category': category
+                        }
+                        new_codes.append(new_code)
+                        added_info.append(code_info)
+                        existing_codes.add(code.code)
+                    else:
+                        duplicate_count += 1
+                
+                # 신규 코드 일괄 추가 (새 항목만 임베딩, 색인 갱신/저장 1회)
+                added_count = self.add_codes_bulk(new_codes)
             
             return {
                 'success': True,
@@ -436,14 +546,8 @@ class RAGSystem:
                 'extracted_count': len(extracted_codes),
                 'added_count': added_count,
                 'duplicate_count': duplicate_count,
-                'extracted_codes': [
-                    {
-                        'code': code.code,
-                        'description': code.description,
-                        'category': code.category,
-                        'confidence': code.confidence
-                    } for code in extracted_codes
-                ]
+                'extracted_codes': extracted_info,
+                'added_codes': added_info
             }
             
         except Exception as e:
@@ -468,15 +572,16 @@ class RAGSystem:
         try:
             preview_data = self.excel_parser.get_preview_data(excel_text)
             
-            # 중복 체크 및 카테고리 적용
+            # 중복 체크 및 카테고리 적용 (upload_excel_data와 같이 같은 데이터 안의 앞선 코드도 중복으로 표시)
+            existing_codes = set(self.hybrid_search.code_index)
             for item in preview_data:
                 is_duplicate = False
                 if not allow_duplicate:
-                    is_duplicate = any(
-                        existing_item['code'] == item['code'] 
-                        for existing_item in self.hybrid_search.data
-                    )
+                    is_duplicate = item['code'] in existing_codes
+                    existing_codes.add(item['code'])
                 item['is_duplicate'] = is_duplicate
+                item['description_short'] = self._shorten_description(item['description'])
+                item['status_label'] = self._preview_status_label(is_duplicate)
                 
                 # 카테고리 결정
                 if manual_category:
@@ -488,6 +593,14 @@ class RAGSystem:
             print(f"엑셀 미리보기 오류: {e}")
             return []
     
+    def _shorten_description(self, description: str, max_length: int = 50) -> str:
+        """미리보기 표시용 설명 (max_length자 초과 시 말줄임)"""
+        return description[:max_length] + "..." if len(description) > max_length else description
+    
+    def _preview_status_label(self, is_duplicate: bool) -> str:
+        """미리보기 표시용 상태 라벨"""
+        return "🔄 중복" if is_duplicate else "✅ 신규"
+    
     def validate_excel_data(self, excel_text: str) -> Dict:
         """
         엑셀 데이터 형식 검증
@@ -524,18 +637,25 @@ class RAGSystem:
             수정 성공 여부
         """
         try:
-            updated = False
-            for item in self.hybrid_search.data:
-                if item['code'] == code:
-                    item['category'] = new_category
-                    updated = True
-            
-            if updated:
-                # 데이터 저장
-                self.save_data()
+            # 코드 색인으로 해당 코드 항목만 조회 (같은 코드가 여러 개면 모두 수정)
+            with self._lock:
+                items = self.hybrid_search.code_index.get(code, [])
+                if not items:
+                    return False
+                
+                changed = False
+                for item in items:
+                    if item.get('category') != new_category:
+                        item['category'] = new_category
+                        changed = True
+                
+                # 이미 같은 카테고리면 캐시 무효화/파일 저장 생략
+                if changed:
+                    self.hybrid_search.data_version += 1
+                    
+                    # 데이터 저장
+                    self.save_data()
                 return True
-            else:
-                return False
                 
         except Exception as e:
             print(f"카테고리 수정 실패: {e}")
@@ -1,10 +1,22 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 
-import json
+import atexit
 import os
+import tempfile
+import threading
+import time
+from collections import Counter
 from datetime import datetime
 from typing import List, Dict, Optional
+from json_io import json_loads, json_dumps
+
+# 검색 내역 저장 지연 시간 (초) - 이 시간 안에 들어온 추가/삭제는 한 번의 파일 쓰기로 합침
+SAVE_DELAY_SECONDS = 0.5
+
+def _truncate(text: str, max_length: int = 50) -> str:
+    """미리보기용 문자열 자르기 (max_length보다 길면 잘라서 '...' 추가)"""
+    return text if len(text) <= max_length else text[:max_length] + "..."
 
 class SearchHistoryManager:
     """검색 내역 관리 클래스"""
@@ -12,22 +24,70 @@ class SearchHistoryManager:
     def __init__(self, history_file: str = "data/search_history.json"):
         self.history_file = history_file
         self.history = self._load_history()
+        self._next_id_num = self._find_next_id_num()  # 다음 검색 ID 번호 (추가 시마다 ID 문자열을 파싱하지 않도록 유지)
+        self.version = 0  # 내역 추가/삭제 시마다 증가 (UI 캐시 키로 사용)
+        self._query_counts: Optional[Counter] = None  # 검색어별 횟수 (version이 바뀌면 다시 집계)
+        self._query_counts_version = None
+        
+        # 파일 저장은 요청 처리 중에 하지 않고 백그라운드 스레드가 모아서 수행 (종료 시 남은 변경 저장)
+        # 저장 스레드/종료 처리는 모듈 import 시점이 아니라 처음 변경이 생길 때 시작
+        self._lock = threading.Lock()
+        self._dirty = threading.Event()
+        self._saver_started = False
     
     def _load_history(self) -> List[Dict]:
         """검색 내역 파일 로드"""
         if os.path.exists(self.history_file):
             try:
-                with open(self.history_file, 'r', encoding='utf-8') as f:
-                    return json.load(f)
-            except (json.JSONDecodeError, FileNotFoundError):
+                with open(self.history_file, 'rb') as f:
+                    return json_loads(f.read())
+            except (ValueError, OSError):
+                # 손상된 JSON(orjson/json 디코드 오류 모두 ValueError)이나 읽기 실패 시 빈 내역으로 시작
                 return []
         return []
     
     def _save_history(self):
-        """검색 내역 파일 저장"""
-        os.makedirs(os.path.dirname(self.history_file), exist_ok=True)
-        with open(self.history_file, 'w', encoding='utf-8') as f:
-            json.dump(self.history, f, ensure_ascii=False, indent=2)
+        """검색 내역 파일 저장 (같은 폴더의 임시 파일에 쓴 뒤 교체해 저장 중 중단되어도 기존 파일 유지)"""
+        history_dir = os.path.dirname(self.history_file) or '.'
+        os.makedirs(history_dir, exist_ok=True)
+        temp_file = None
+        try:
+            with tempfile.NamedTemporaryFile(dir=history_dir, suffix='.tmp', delete=False) as f:
+                temp_file = f.name
+                f.write(json_dumps(self.history))
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(temp_file, self.history_file)
+        except Exception:
+            if temp_file and os.path.exists(temp_file):
+                os.remove(temp_file)
+            raise
+    
+    def _schedule_save(self):
+        """변경 저장 예약 (잠금 안에서 호출, 저장 스레드와 종료 시 저장은 처음 호출될 때 한 번만 등록)"""
+        if not self._saver_started:
+            self._saver_started = True
+            threading.Thread(target=self._save_loop, daemon=True).start()
+            atexit.register(self.flush)
+        self._dirty.set()
+    
+    def _save_loop(self):
+        """변경이 생기면 잠시 기다렸다가 그동안의 변경을 한 번에 저장"""
+        while True:
+            self._dirty.wait()
+            time.sleep(SAVE_DELAY_SECONDS)
+            self.flush()
+    
+    def flush(self):
+        """저장되지 않은 변경이 있으면 즉시 파일에 저장"""
+        with self._lock:
+            if not self._dirty.is_set():
+                return
+            self._dirty.clear()
+            try:
+                self._save_history()
+            except Exception as e:
+                print(f"검색 내역 저장 실패: {e}")
     
     def add_search(self, query: str, search_type: str, results: List[Dict], result_count: int):
         """검색 내역 추가
@@ -38,38 +98,41 @@ class SearchHistoryManager:
             results: 검색 결과
             result_count: 결과 개수
         """
-        search_record = {
-            "id": self._generate_id(),
-            "query": query,
-            "search_type": search_type,
-            "result_count": result_count,
-            "timestamp": datetime.now().isoformat(),
-            "date": datetime.now().strftime("%Y-%m-%d"),
-            "time": datetime.now().strftime("%H:%M:%S"),
-            "results_preview": self._get_results_preview(results, search_type)
-        }
-        
-        # 최신 검색을 맨 앞에 추가
-        self.history.insert(0, search_record)
-        
-        # 최대 100개까지만 저장 (메모리 절약)
-        if len(self.history) > 100:
-            self.history = self.history[:100]
-        
-        self._save_history()
+        # 내역 변경은 잠금 안에서 하고 파일 저장은 백그라운드 스레드에 예약만 함
+        # 타임스탬프/날짜/시간이 서로 어긋나지 않도록 현재 시각은 한 번만 조회
+        now = datetime.now()
+        with self._lock:
+            search_record = {
+                "id": self._generate_id(),
+                "query": query,
+                "search_type": search_type,
+                "result_count": result_count,
+                "timestamp": now.isoformat(),
+                "date": now.strftime("%Y-%m-%d"),
+                "time": now.strftime("%H:%M:%S"),
+                "results_preview": self._get_results_preview(results, search_type)
+            }
+            
+            # 최신 검색을 맨 앞에 추가
+            self.history.insert(0, search_record)
+            
+            # 최대 100개까지만 저장 (메모리 절약)
+            if len(self.history) > 100:
+                self.history = self.history[:100]
+            
+            self.version += 1
+            self._schedule_save()
+    
+    def _find_next_id_num(self) -> int:
+        """로드된 내역의 최대 검색 ID 번호 + 1 (search_XXX 형식이 아닌 ID는 무시, 로드 시 한 번만 계산)"""
+        numbers = (search.get('id', '')[7:] for search in self.history if search.get('id', '').startswith('search_'))
+        return max((int(num) for num in numbers if num.isdecimal()), default=0) + 1
     
     def _generate_id(self) -> str:
         """고유 ID 생성"""
-        if not self.history:
-            return "search_001"
-        
-        # 마지막 ID에서 번호 추출
-        last_id = self.history[0].get('id', 'search_000')
-        try:
-            last_num = int(last_id.split('_')[1])
-            return f"search_{last_num + 1:03d}"
-        except:
-            return "search_001"
+        search_id = f"search_{self._next_id_num:03d}"
+        self._next_id_num += 1
+        return search_id
     
     def _get_results_preview(self, results: List[Dict], search_type: str) -> List[Dict]:
         """검색 결과 미리보기 생성 (상위 3개만)"""
@@ -78,22 +141,29 @@ class SearchHistoryManager:
             if search_type == 'result_code':
                 preview.append({
                     "code": result.get('code', ''),
-                    "description": result.get('description', '')[:50] + "..." if len(result.get('description', '')) > 50 else result.get('description', '')
+                    "description": _truncate(result.get('description', ''))
                 })
             elif search_type == 'faq':
                 preview.append({
-                    "question": result.get('question', '')[:50] + "..." if len(result.get('question', '')) > 50 else result.get('question', ''),
+                    "question": _truncate(result.get('question', '')),
                     "category": result.get('category', '')
                 })
             elif search_type == 'integrated':
                 # 통합 검색의 경우 FAQ와 결과코드 결과 모두 포함
                 faq_results = result.get('faq_results', [])
                 rag_results = result.get('rag_results', [])
+                faq_preview = ""
+                if faq_results:
+                    faq_preview = faq_results[0].get('question', '')[:30] + "..."
+                rag_preview = ""
+                if rag_results:
+                    top_code = rag_results[0]
+                    rag_preview = f"{top_code.get('code', '')}: {top_code.get('description', '')[:30]}..."
                 preview.append({
                     "faq_count": len(faq_results),
                     "rag_count": len(rag_results),
-                    "faq_preview": faq_results[0].get('question', '')[:30] + "..." if faq_results else "",
-                    "rag_preview": rag_results[0].get('code', '') + ": " + rag_results[0].get('description', '')[:30] + "..." if rag_results else ""
+                    "faq_preview": faq_preview,
+                    "rag_preview": rag_preview
                 })
         return preview
     
@@ -118,45 +188,49 @@ class SearchHistoryManager:
         ]
     
     def get_popular_searches(self, limit: int = 10) -> List[Dict]:
-        """인기 검색어 조회 (빈도순)"""
-        search_counts = {}
-        for search in self.history:
-            query = search.get('query', '')
-            search_counts[query] = search_counts.get(query, 0) + 1
+        """인기 검색어 조회 (빈도순, 같은 빈도는 최근 검색어 우선)"""
+        with self._lock:
+            if self._query_counts is None or self._query_counts_version != self.version:
+                self._query_counts = Counter(search.get('query', '') for search in self.history)
+                self._query_counts_version = self.version
+            query_counts = self._query_counts
         
-        # 빈도순으로 정렬
-        popular = sorted(search_counts.items(), key=lambda x: x[1], reverse=True)
-        return [{"query": query, "count": count} for query, count in popular[:limit]]
+        return [{"query": query, "count": count} for query, count in query_counts.most_common(limit)]
     
     def clear_history(self):
         """검색 내역 전체 삭제"""
-        self.history = []
-        self._save_history()
+        with self._lock:
+            self.history = []
+            self._next_id_num = 1
+            self.version += 1
+            self._schedule_save()
     
     def get_statistics(self) -> Dict:
         """검색 통계 조회"""
-        if not self.history:
+        # 다른 세션의 추가/삭제와 섞이지 않도록 잠금 안에서 내역을 복사한 뒤 집계 (최대 100개)
+        with self._lock:
+            history = list(self.history)
+        if not history:
             return {"total_searches": 0, "today_searches": 0, "by_type": {}, "by_date": {}}
         
         today = datetime.now().strftime("%Y-%m-%d")
-        today_searches = len([s for s in self.history if s.get('date') == today])
-        
-        # 검색 유형별 통계
-        by_type = {}
-        for search in self.history:
-            search_type = search.get('search_type', 'unknown')
-            by_type[search_type] = by_type.get(search_type, 0) + 1
         
-        # 날짜별 통계 (최근 7일)
-        by_date = {}
-        for search in self.history[:50]:  # 최근 50개만 확인
+        # 오늘 검색 수, 검색 유형별, 날짜별(최근 50개만 확인) 통계를 한 번의 순회로 집계
+        today_searches = 0
+        by_type = Counter()
+        by_date = Counter()
+        for index, search in enumerate(history):
             date = search.get('date', '')
-            by_date[date] = by_date.get(date, 0) + 1
+            if date == today:
+                today_searches += 1
+            by_type[search.get('search_type', 'unknown')] += 1
+            if index < 50:
+                by_date[date] += 1
         
         return {
-            "total_searches": len(self.history),
+            "total_searches": len(history),
             "today_searches": today_searches,
-            "by_type": by_type,
+            "by_type": dict(by_type),
             "by_date": dict(sorted(by_date.items(), reverse=True)[:7])  # 최근 7일
         }
 
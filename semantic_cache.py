@@ -0,0 +1,104 @@
+"""
+쿼리 임베딩 기반 시맨틱 캐시
+표현만 다른 유사 질문(예: "트래픽 초과" / "트래픽 초과됨")에 대해 이전 검색 결과를 재사용
+"""
+import threading
+import time
+from typing import Any, Optional
+import numpy as np
+import config
+
+class SemanticCache:
+    def __init__(self, threshold: float = None, max_entries: int = None, ttl: float = None):
+        """
+        시맨틱 캐시 초기화
+
+        Args:
+            threshold: 캐시 히트로 판단할 코사인 유사도 임계값
+            max_entries: 최대 저장 항목 수 (초과 시 가장 오래 사용되지 않은 항목 제거)
+            ttl: 항목 유효 시간 (초)
+        """
+        self.threshold = threshold if threshold is not None else config.SEMANTIC_CACHE_THRESHOLD
+        self.max_entries = max_entries or config.SEMANTIC_CACHE_MAX_ENTRIES
+        self.ttl = ttl if ttl is not None else config.SEMANTIC_CACHE_TTL
+
+        self._embeddings = None  # (n, d) L2 정규화된 쿼리 임베딩
+        self._values = []  # 임베딩과 같은 순서의 캐시 값
+        self._created = []  # 항목 생성 시각
+        self._lock = threading.Lock()  # st.cache_resource로 세션 간 공유되므로 잠금 필요
+
+    def _normalize(self, embedding) -> np.ndarray:
+        """임베딩을 1차원 float32 단위 벡터로 변환"""
+        vector = np.asarray(embedding, dtype=np.float32).reshape(-1)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm > 0 else vector
+
+    def _keep(self, indices):
+        """지정한 인덱스의 항목만 남김 (순서 유지)"""
+        self._embeddings = self._embeddings[indices] if len(indices) > 0 else None
+        self._values = [self._values[i] for i in indices]
+        self._created = [self._created[i] for i in indices]
+
+    def _expire(self, now: float):
+        """TTL이 지난 항목 제거"""
+        alive = [i for i, created in enumerate(self._created) if now - created < self.ttl]
+        if len(alive) < len(self._created):
+            self._keep(alive)
+
+    def get(self, query_embedding) -> Optional[Any]:
+        """
+        유사한 쿼리의 캐시 값 조회
+
+        Args:
+            query_embedding: 쿼리 임베딩 벡터
+
+        Returns:
+            유사도가 임계값 이상인 캐시 값 (없으면 None)
+        """
+        with self._lock:
+            self._expire(time.time())
+            if self._embeddings is None:
+                return None
+
+            similarities = self._embeddings @ self._normalize(query_embedding)
+            best = int(np.argmax(similarities))
+            if similarities[best] < self.threshold:
+                return None
+
+            # 히트한 항목을 가장 최근 사용 위치로 이동 (LRU)
+            order = [i for i in range(len(self._values)) if i != best] + [best]
+            value = self._values[best]
+            self._keep(order)
+            return value
+
+    def put(self, query_embedding, value: Any):
+        """
+        캐시 항목 추가
+
+        Args:
+            query_embedding: 쿼리 임베딩 벡터
+            value: 저장할 값
+        """
+        with self._lock:
+            vector = self._normalize(query_embedding)[np.newaxis, :]
+            if self._embeddings is None:
+                self._embeddings = vector
+            else:
+                self._embeddings = np.vstack([self._embeddings, vector])
+            self._values.append(value)
+            self._created.append(time.time())
+
+            # 최대 개수 초과 시 가장 오래 사용되지 않은 항목부터 제거
+            overflow = len(self._values) - self.max_entries
+            if overflow > 0:
+                self._keep(list(range(overflow, len(self._values))))
+
+    def clear(self):
+        """캐시 전체 삭제"""
+        with self._lock:
+            self._embeddings = None
+            self._values = []
+            self._created = []
+
+    def __len__(self) -> int:
+        return len(self._values)